@@ -0,0 +1,339 @@
+import sys, os, io, time, glob, tempfile, subprocess
+from contextlib import redirect_stdout
+from src.analise_sintatica import create_parser
+from src.analise_semantica import SemanticAnalyzer
+from src.otimizar_AST import collect_used_variables, prune_unused_var_declarations, propagate_constants, \
+    inline_functions
+from src.codegen import CodeGenerator
+from src.ir import lower_program
+from src.ir_codegen import generate_from_ir
+from src.peephole import optimize
+from vm import VirtualMachine
+from bytecode import assemble_file
+
+# Configurações da VM comparadas nos benchmarks (a primeira é a referência)
+CONFIGURATIONS = {
+    "reference": {"engine": "reference", "fuse": False},
+    "table": {"engine": "table", "fuse": False},
+    "table+fuse": {"engine": "table", "fuse": True},
+    "jit": {"engine": "jit", "fuse": True},
+}
+
+# Input fixo usado pelos programas de exemplo que chamam readln
+EXAMPLE_INPUT = "5\n3\n2\n7\n1\n4\n6\n8\n9\n10\n"
+
+# Programa sintético com um ciclo apertado (N iterações)
+SYNTHETIC_LOOP = """
+program Ciclo;
+var
+    i, soma: integer;
+begin
+    soma := 0;
+    i := 0;
+    while i < {n} do
+    begin
+        soma := soma + i mod 7;
+        i := i + 1;
+    end;
+    writeln(soma);
+end.
+"""
+
+# Ciclos encaixados com a mesma expressão invariante (n * 2), calculada antes do ciclo exterior
+NESTED_INVARIANT = """
+program Encaixados;
+var
+    i, j, n, soma: integer;
+begin
+    readln(n);
+    soma := 0;
+    i := 0;
+    while i < 3 do
+    begin
+        for j := 1 to 4 do
+            soma := soma + n * 2;
+        i := i + 1;
+    end;
+    writeln(soma);
+end.
+"""
+
+def compile_source(source_code, optimize_code=False, use_ir=False):
+    """
+    Compila código Pascal para a lista de instruções da VM (com optimize_code, como main.py -O;
+    com use_ir, a partir da representação intermédia, como main.py --ir).
+    """
+    parser = create_parser()
+    ast = parser.parse(source_code)
+    prune_unused_var_declarations(ast, collect_used_variables(ast))
+    analyzer = SemanticAnalyzer()
+    if not analyzer.analyze(ast):
+        raise ValueError(f"Erros semânticos: {analyzer.errors}")
+    if optimize_code:
+        ast = propagate_constants(inline_functions(ast))
+        prune_unused_var_declarations(ast, collect_used_variables(ast))
+        analyzer = SemanticAnalyzer()
+        if not analyzer.analyze(ast):
+            raise ValueError(f"Erros semânticos: {analyzer.errors}")
+    if use_ir:
+        program = lower_program(ast, analyzer.symtab)
+        if program.errors:
+            raise ValueError(f"Erros na geração da IR: {program.errors}")
+        code = generate_from_ir(program)
+    else:
+        generator = CodeGenerator(analyzer.symtab, optimize=optimize_code)
+        code = generator.generate(ast)
+        if generator.errors:
+            raise ValueError(f"Erros na geração de código: {generator.errors}")
+    return optimize(code) if optimize_code else code
+
+def run_vm(code, input_text="", **options):
+    """Executa o código na VM e devolve (output, tempo de load_code + run em segundos)."""
+    output = io.StringIO()
+    start = time.perf_counter()
+    vm = VirtualMachine(output=output, input=input_text, **options)
+    vm.load_code(code)
+    vm.run()
+    elapsed = time.perf_counter() - start
+    return output.getvalue(), elapsed
+
+def time_vm(code, input_text="", repeat=3, **options):
+    """Devolve o melhor tempo de execução em `repeat` corridas."""
+    return min(run_vm(code, input_text, **options)[1] for _ in range(repeat))
+
+def compare_engines(pas_dir="examples/pas"):
+    """Corre todos os programas de pas_dir em todas as configurações e compara o output com o de referência."""
+    failures = 0
+    for filename in sorted(os.listdir(pas_dir)):
+        if not filename.endswith(".pas"):
+            continue
+        with open(os.path.join(pas_dir, filename), "r") as f:
+            try:
+                with redirect_stdout(io.StringIO()):
+                    code = compile_source(f.read())
+            except ValueError:
+                print(f"{filename:<30} ignorado (não compila)")
+                continue
+
+        results = {name: run_vm(code, EXAMPLE_INPUT, **options)[0] for name, options in CONFIGURATIONS.items()}
+        expected = results["reference"]
+        diffs = [name for name, output in results.items() if output != expected]
+        if diffs:
+            failures += 1
+            print(f"{filename:<30} DIFERENTE em: {', '.join(diffs)}")
+        else:
+            print(f"{filename:<30} ok")
+    return failures == 0
+
+def count_steps(code, input_text=""):
+    """Número de instruções executadas pela VM (sem fusões, para contar as instruções geradas)."""
+    vm = VirtualMachine(fuse=False, output=io.StringIO(), input=input_text)
+    vm.load_code(code)
+    return vm.run().steps
+
+def compare_optimizations(n, pas_dir="examples/pas"):
+    """Instruções executadas por cada programa compilado sem e com -O (e se o output é o mesmo)."""
+    failures = 0
+    with open(os.path.join(pas_dir, "primo.pas"), "r") as f:
+        cases = [("primo.pas (100003)", f.read(), "100003\n"),
+                 (f"ciclo sintético ({n})", SYNTHETIC_LOOP.format(n=n), ""),
+                 ("ciclos encaixados", NESTED_INVARIANT, "5\n")]
+    for filename in sorted(os.listdir(pas_dir)):
+        if filename.endswith(".pas"):
+            with open(os.path.join(pas_dir, filename), "r") as f:
+                cases.append((filename, f.read(), EXAMPLE_INPUT))
+
+    print(f"{'instruções executadas':<30}{'sem -O':>12}{'com -O':>12}{'redução':>10}")
+    for name, source, input_text in cases:
+        try:
+            with redirect_stdout(io.StringIO()):
+                plain = compile_source(source)
+                optimized = compile_source(source, optimize_code=True)
+        except ValueError:
+            continue
+        same = run_vm(plain, input_text)[0] == run_vm(optimized, input_text)[0]
+        failures += not same
+        before, after = count_steps(plain, input_text), count_steps(optimized, input_text)
+        print(f"{name:<30}{before:>12}{after:>12}{100 * (before - after) / max(before, 1):>9.1f}%"
+              f"  {'ok' if same else 'DIFERENTE'}")
+    return failures == 0
+
+def compare_backends(pas_dir="examples/pas"):
+    """Compara, em cada programa, o output e as instruções executadas do CodeGenerator e do gerador da IR."""
+    failures = 0
+    print(f"{'':<30}{'codegen':>12}{'IR':>12}")
+    for filename in sorted(os.listdir(pas_dir)):
+        if not filename.endswith(".pas"):
+            continue
+        with open(os.path.join(pas_dir, filename), "r") as f:
+            source = f.read()
+        try:
+            with redirect_stdout(io.StringIO()):
+                ast_code = compile_source(source)
+                ir_code = compile_source(source, use_ir=True)
+        except ValueError:
+            print(f"{filename:<30} ignorado (não compila)")
+            continue
+        same = run_vm(ast_code, EXAMPLE_INPUT)[0] == run_vm(ir_code, EXAMPLE_INPUT)[0]
+        failures += not same
+        steps = f"{count_steps(ast_code, EXAMPLE_INPUT):>12}{count_steps(ir_code, EXAMPLE_INPUT):>12}"
+        print(f"{filename:<30}{steps}  {'ok' if same else 'DIFERENTE'}")
+    return failures == 0
+
+def time_load(code, repeat=3):
+    """Compara o tempo de carregamento do mesmo programa em texto (.vm) e em bytecode (.vmb)."""
+    with tempfile.TemporaryDirectory() as tmp:
+        vm_file = os.path.join(tmp, "programa.vm")
+        vmb_file = os.path.join(tmp, "programa.vmb")
+        with open(vm_file, "w") as f:
+            for line in code:
+                f.write(line + "\n")
+        assemble_file(vm_file, vmb_file)
+
+        times = {}
+        for path in (vm_file, vmb_file):
+            best = None
+            for _ in range(repeat):
+                start = time.perf_counter()
+                VirtualMachine().load_file(path)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            times[os.path.splitext(path)[1]] = (best, os.path.getsize(path))
+    return times
+
+def time_command(command, env, repeat, before=None):
+    """Melhor tempo (em segundos) de `repeat` execuções do comando num processo novo."""
+    best = None
+    for _ in range(repeat):
+        if before:
+            before()
+        start = time.perf_counter()
+        subprocess.run(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def compare_startup(repeat=10, pas_file="examples/pas/hello.pas"):
+    """Tempo de arranque de `python3 main.py hello.pas` (processo completo) em cada situação."""
+    from src import tabelas_ply
+
+    def remove_tables():
+        for path in glob.glob(os.path.join(tabelas_ply.DIRECTORY, "*tab_*.py")):
+            os.remove(path)
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        env = dict(os.environ, XDG_CACHE_HOME=cache_dir)
+        env.pop("PYTHONDONTWRITEBYTECODE", None)  # como numa instalação normal, com os .pyc em __pycache__
+        main = [sys.executable, "main.py", pas_file]
+        parser = [sys.executable, "-c", "from src.analise_sintatica import create_parser; create_parser({})"]
+        cases = [
+            ("create_parser (sem tabelas)", parser[:-1] + [parser[-1].format(False)], None),
+            ("create_parser (tabelas PLY)", parser[:-1] + [parser[-1].format(True)], None),
+            ("main.py, tabelas por gerar", main + ["--no-cache"], remove_tables),
+            ("main.py --no-cache", main + ["--no-cache"], None),
+            ("main.py (cache)", main, None),
+            ("main.py -c (cache, sem VM)", main + ["-c"], None),
+            ("python3 (vazio)", [sys.executable, "-c", "pass"], None),
+        ]
+        subprocess.run(main + ["-c"], env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)  # aquecimento
+        print(f"{'arranque (' + os.path.basename(pas_file) + ')':<30}{'melhor de ' + str(repeat):>14}")
+        for name, command, before in cases:
+            print(f"{name:<30}{1000 * time_command(command, env, repeat, before):12.1f}ms")
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+def measure_load(handle, jobs, clients):
+    """Corre handle(job) para todos os jobs com `clients` pedidos em simultâneo; devolve (tempo total, latências)."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    def timed(job):
+        start = time.perf_counter()
+        handle(job)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        latencies = list(executor.map(timed, jobs))
+    return time.perf_counter() - start, latencies
+
+def compare_service(requests=200, clients=8, workers=None, pas_dir="examples/pas"):
+    """
+    Débito da interface web com `clients` pedidos simultâneos de compilação e execução dos
+    programas de pas_dir: um processo `python3 main.py` por pedido (como antes) e o CompileService
+    (src/servico.py) com `workers` processos quentes, sem e com a cache de compilação.
+    """
+    from src.servico import CompileService
+
+    workers = workers or os.cpu_count()
+    paths = sorted(os.path.join(pas_dir, name) for name in os.listdir(pas_dir) if name.endswith(".pas"))
+    jobs = [paths[i % len(paths)] for i in range(requests)]
+    sources = {}
+    for path in paths:
+        with open(path, "r") as f:
+            sources[path] = f.read()
+
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+
+    def subprocess_job(path):
+        subprocess.run([sys.executable, "main.py", path, "--no-cache", "--no-vm-file"], input=EXAMPLE_INPUT, env=env,
+                       text=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=10)
+
+    print(f"{requests} pedidos, {clients} clientes em simultâneo, {workers} processos")
+    print(f"{'':<30}{'pedidos/s':>12}{'p50':>10}{'p95':>10}")
+
+    def report(name, handle):
+        elapsed, latencies = measure_load(handle, jobs, clients)
+        print(f"{name:<30}{requests / elapsed:12.1f}{1000 * percentile(latencies, 0.5):8.1f}ms"
+              f"{1000 * percentile(latencies, 0.95):8.1f}ms")
+
+    report("python3 main.py por pedido", subprocess_job)
+    start = time.perf_counter()
+    with CompileService(workers=workers, max_pending=clients, cache_dir=None) as service:
+        startup = time.perf_counter() - start
+        report("CompileService", lambda path: service.run(sources[path], "run", EXAMPLE_INPUT))
+    with tempfile.TemporaryDirectory() as cache_dir:
+        with CompileService(workers=workers, max_pending=clients, cache_dir=cache_dir) as service:
+            report("CompileService (cache)", lambda path: service.run(sources[path], "run", EXAMPLE_INPUT))
+    print(f"\narranque do CompileService: {1000 * startup:.1f}ms")
+
+def run_benchmarks(n):
+    with open("examples/pas/primo.pas", "r") as f:
+        primo = compile_source(f.read())
+    loop = compile_source(SYNTHETIC_LOOP.format(n=n))
+
+    cases = [
+        ("primo.pas (100003)", primo, "100003\n"),
+        (f"ciclo sintético ({n})", loop, ""),
+    ]
+    print(f"{'':<30}" + "".join(f"{c:>12}" for c in CONFIGURATIONS))
+    for name, code, input_text in cases:
+        times = "".join(f"{time_vm(code, input_text, **options):11.3f}s" for options in CONFIGURATIONS.values())
+        print(f"{name:<30}{times}")
+
+    # programa grande (n/10 instruções Pascal em linha reta) para medir o carregamento
+    statements = "\n".join(f"    soma := soma + {i};" for i in range(n // 10))
+    big = compile_source(f"program Grande;\nvar soma: integer;\nbegin\n{statements}\n    writeln(soma);\nend.")
+    print(f"\ncarregamento ({len(big)} instruções)")
+    for ext, (elapsed, size) in time_load(big).items():
+        print(f"{ext:<30}{elapsed:11.3f}s {size:>10} bytes")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--engines":
+        sys.exit(0 if compare_engines() else 1)     # python3 benchmark.py --engines
+    if len(sys.argv) > 1 and sys.argv[1] == "--ir":
+        sys.exit(0 if compare_backends() else 1)     # python3 benchmark.py --ir
+    if len(sys.argv) > 1 and sys.argv[1] == "--startup":
+        compare_startup(int(sys.argv[2]) if len(sys.argv) > 2 else 10)     # python3 benchmark.py --startup [repetições]
+        sys.exit(0)
+    if len(sys.argv) > 1 and sys.argv[1] == "--service":
+        args = [int(arg) for arg in sys.argv[2:5]]
+        compare_service(*args)     # python3 benchmark.py --service [pedidos] [clientes] [processos]
+        sys.exit(0)
+    if len(sys.argv) > 1 and sys.argv[1] == "--optimizations":
+        sys.exit(0 if compare_optimizations(int(sys.argv[2]) if len(sys.argv) > 2 else 50000) else 1)     # python3 benchmark.py --optimizations [N]
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    run_benchmarks(n)     # python3 benchmark.py [iterações]
@@ -0,0 +1,199 @@
+"""
+Formato binário .vmb (little-endian):
+
+    cabeçalho   MAGIC, versão, reservado, nº de constantes, nº de labels, nº de instruções
+    constantes  tag (b'i' | b'f' | b's' | b't') seguida de int64, float64, (uint32 tamanho + UTF-8)
+                ou (uint8 tamanho + int64 * tamanho)
+    labels      uint32 índice da instrução + uint16 tamanho + nome UTF-8
+    código      uma instrução por registo de 8 bytes: opcode (uint8) + operando int32
+
+Os saltos já estão resolvidos para índices de instrução. Se o bit CONST_FLAG estiver ativo no
+opcode, o operando é um índice na tabela de constantes (strings, floats, inteiros que não cabem
+em 32 bits e os operandos múltiplos das superinstruções).
+"""
+import sys, mmap, struct
+from vm import VirtualMachine, LoadError, Op, OPCODE_NAMES, INT_OPERAND, JUMP_OPERAND, TUPLE_OPERAND, COMPARE_JUMP
+
+MAGIC = b"EWVB"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIII")
+INSTRUCTION = struct.Struct("<B3xi")
+LABEL = struct.Struct("<IH")
+CONST_FLAG = 0x80
+
+INT32_MIN, INT32_MAX = -2**31, 2**31 - 1
+
+
+def _operand(op, arg, constant):
+    """Converte o operando descodificado no campo int32 do registo (ativando CONST_FLAG se preciso)."""
+    if op in JUMP_OPERAND or (op in INT_OPERAND and INT32_MIN <= arg <= INT32_MAX):
+        return op, arg
+    if arg is None or op == Op.CALL:
+        return op, 0  # o endereço de retorno de 'call' é recalculado no carregamento
+    return op | CONST_FLAG, constant(arg)
+
+
+def assemble(program, labels):
+    """Serializa um programa descodificado (sem fusões) e as suas labels no formato .vmb."""
+    constants = []
+    constant_index = {}
+
+    def constant(value):
+        key = (type(value), value)
+        if key not in constant_index:
+            constant_index[key] = len(constants)
+            constants.append(value)
+        return constant_index[key]
+
+    code = bytearray()
+    for op, arg in program:
+        code += INSTRUCTION.pack(*_operand(op, arg, constant))
+
+    out = bytearray(HEADER.pack(MAGIC, VERSION, 0, len(constants), len(labels), len(program)))
+    for value in constants:
+        if isinstance(value, str):
+            data = value.encode("utf-8")
+            out += b"s" + struct.pack("<I", len(data)) + data
+        elif isinstance(value, tuple):
+            out += b"t" + struct.pack(f"<B{len(value)}q", len(value), *value)
+        elif isinstance(value, float):
+            out += b"f" + struct.pack("<d", value)
+        else:
+            out += b"i" + struct.pack("<q", value)
+    for name, index in labels.items():
+        data = name.encode("utf-8")
+        out += LABEL.pack(index, len(data)) + data
+    out += code
+    return bytes(out)
+
+
+def parse_bytecode(buffer):
+    """Lê (programa, labels) de um buffer .vmb sem passar por texto."""
+    magic, version, _, n_constants, n_labels, n_instructions = HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Ficheiro .vmb inválido ou de versão incompatível")
+    offset = HEADER.size
+
+    constants = []
+    for _ in range(n_constants):
+        tag = buffer[offset:offset + 1]
+        offset += 1
+        if tag == b"s":
+            (length,) = struct.unpack_from("<I", buffer, offset)
+            offset += 4
+            constants.append(bytes(buffer[offset:offset + length]).decode("utf-8"))
+            offset += length
+        elif tag == b"t":
+            length = buffer[offset]
+            constants.append(struct.unpack_from(f"<{length}q", buffer, offset + 1))
+            offset += 1 + 8 * length
+        elif tag == b"f":
+            constants.append(struct.unpack_from("<d", buffer, offset)[0])
+            offset += 8
+        else:
+            constants.append(struct.unpack_from("<q", buffer, offset)[0])
+            offset += 8
+
+    labels = {}
+    for _ in range(n_labels):
+        index, length = LABEL.unpack_from(buffer, offset)
+        offset += LABEL.size
+        labels[bytes(buffer[offset:offset + length]).decode("utf-8")] = index
+        offset += length
+
+    program = []
+    end = offset + n_instructions * INSTRUCTION.size
+    with memoryview(buffer)[offset:end] as code:
+        for op, arg in INSTRUCTION.iter_unpack(code):
+            if op & CONST_FLAG:
+                program.append((op & ~CONST_FLAG, constants[arg]))
+            elif op in INT_OPERAND or op in JUMP_OPERAND:
+                program.append((op, arg))
+            else:
+                program.append((op, None))
+    return program, labels
+
+
+def read_bytecode(path):
+    """Lê um ficheiro .vmb através de mmap."""
+    with open(path, "rb") as f:
+        if f.seek(0, 2) < HEADER.size:
+            raise ValueError(f"Ficheiro .vmb inválido: {path}")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            return parse_bytecode(buffer)
+
+
+def disassemble(program, labels):
+    """Converte um programa descodificado de volta para linhas de texto .vm."""
+    # várias labels podem apontar para a mesma instrução: todas são escritas, os saltos usam a primeira
+    at_index = {}
+    for name, index in labels.items():
+        at_index.setdefault(index, []).append(name)
+    names = {index: group[0] for index, group in at_index.items()}
+    # destinos de salto sem label (não devia acontecer em código gerado pelo assembler)
+    for op, arg in program:
+        target = arg if op in JUMP_OPERAND else arg[2] if op in COMPARE_JUMP else None
+        if target is not None and target not in names:
+            names[target] = f"L{target}"
+            at_index[target] = [names[target]]
+
+    lines = []
+    for index, (op, arg) in enumerate(program):
+        lines.extend(f"{label}:" for label in at_index.get(index, []))
+        name = OPCODE_NAMES[op]
+        if op == Op.UNKNOWN:
+            lines.append(arg)
+        elif op in JUMP_OPERAND:
+            lines.append(f"{name} {names[arg]}")
+        elif op in COMPARE_JUMP:
+            lines.append(f"{name} {arg[0]} {arg[1]} {names[arg[2]]}")
+        elif op in TUPLE_OPERAND:
+            lines.append(f"{name} {' '.join(str(a) for a in arg)}")
+        elif op == Op.PUSHS:
+            # o loader lê a linha com shlex: dentro de aspas, '\' e '"' têm de ser escapados
+            escaped = arg.replace("\\", "\\\\").replace('"', '\\"')
+            lines.append(f"{name} \"{escaped}\"")
+        elif arg is not None and op != Op.CALL:
+            lines.append(f"{name} {arg!r}")
+        else:
+            lines.append(name)
+    lines.extend(f"{label}:" for label in at_index.get(len(program), []))
+    return lines
+
+
+def assemble_file(vm_file, vmb_file):
+    with open(vm_file, "r") as f:
+        code = [line.strip() for line in f.readlines()]
+    vm = VirtualMachine(fuse=False)
+    vm.load_code(code)
+    with open(vmb_file, "wb") as f:
+        f.write(assemble(vm.program, vm.labels))
+
+
+def disassemble_file(vmb_file):
+    return disassemble(*read_bytecode(vmb_file))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (3, 4) or sys.argv[1] not in ("assemble", "disassemble"):
+        print("Comando correto: python3 bytecode.py assemble <ficheiro.vm> [ficheiro.vmb]")
+        print("                 python3 bytecode.py disassemble <ficheiro.vmb> [ficheiro.vm]")
+        sys.exit(1)
+
+    mode, source = sys.argv[1], sys.argv[2]
+    if mode == "assemble":
+        target = sys.argv[3] if len(sys.argv) == 4 else source.rsplit(".", 1)[0] + ".vmb"
+        try:
+            assemble_file(source, target)
+        except LoadError as e:
+            print(f"Erro ao carregar {source}: {e}", file=sys.stderr)
+            sys.exit(1)
+    else:
+        lines = disassemble_file(source)
+        if len(sys.argv) == 4:
+            with open(sys.argv[3], "w") as f:
+                for line in lines:
+                    f.write(line + "\n")
+        else:
+            for line in lines:
+                print(line)
@@ -0,0 +1,15 @@
+program FatorialRecursivo;
+function Fatorial(n: integer): integer;
+begin
+    if n <= 1 then
+        Fatorial := 1
+    else
+        Fatorial := n * Fatorial(n - 1);
+end;
+var
+    x: integer;
+begin
+    writeln('Introduza um número:');
+    readln(x);
+    writeln('Fatorial de ', x, ' = ', Fatorial(x));
+end.
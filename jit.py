@@ -0,0 +1,193 @@
+"""
+Compilador de blocos básicos da VM para closures Python (usado pelo motor "jit").
+
+O programa descodificado é dividido em blocos básicos nas labels e depois de cada salto.
+Quando um bloco fica "quente", block_source gera código Python especializado para ele: os
+valores da pilha passam a ser variáveis locais (t0, t1, ...) e só os que sobram no fim do
+bloco são empilhados. A função gerada devolve o índice da próxima instrução ou HALT.
+"""
+import math
+from vm import Op, HALT, JUMP_OPERAND, COMPARE_JUMP
+
+# instruções que terminam um bloco básico
+TERMINATORS = JUMP_OPERAND | COMPARE_JUMP | {Op.STOP, Op.CALL, Op.RETURN}
+
+# instruções que o JIT não compila: o bloco que as contém fica sempre no interpretador
+# (as instruções de chamadas usam o frame pointer, que só existe no interpretador)
+NOT_COMPILABLE = {Op.READ, Op.UNKNOWN, Op.PUSHA, Op.CALL, Op.RETURN, Op.PUSHL, Op.STOREL, Op.PUSHN, Op.POP}
+
+BINARY = {
+    Op.ADD: "{a} + {b}",
+    Op.SUB: "{a} - {b}",
+    Op.MUL: "{a} * {b}",
+    Op.DIV: "{a} // {b}",
+    Op.FDIV: "{a} / {b}",
+    Op.MOD: "{a} % {b}",
+    Op.SUP: "int({a} > {b})",
+    Op.INF: "int({a} < {b})",
+    Op.SUPEQ: "int({a} >= {b})",
+    Op.INFEQ: "int({a} <= {b})",
+    Op.EQUAL: "int({a} == {b})",
+    Op.AND: "int(bool({a}) and bool({b}))",
+    Op.OR: "int(bool({a}) or bool({b}))",
+}
+
+UNARY = {
+    Op.NOT: "int(not {a})",
+    Op.ATOI: "int({a})",
+    Op.ATOF: "float({a})",
+    Op.STRI: "str({a})",
+    Op.STRF: "format({a}, '.2f')",
+}
+
+# argumentos da fábrica que cria a closure de cada bloco
+ENVIRONMENT = ("gp", "push", "pop", "load_cell", "store_cell", "allocate", "out", "fail", "halt")
+
+
+def basic_blocks(program, labels):
+    """Devolve block_end: para cada início de bloco, o índice onde o bloco termina (0 nas restantes)."""
+    size = len(program)
+    leaders = {0} | {index for index in labels.values() if index < size}
+    for index, (op, arg) in enumerate(program):
+        if op in TERMINATORS:
+            leaders.add(index + 1)
+        if op in JUMP_OPERAND:
+            leaders.add(arg)
+        elif op in COMPARE_JUMP:
+            leaders.add(arg[2])
+
+    block_end = [0] * size
+    starts = sorted(index for index in leaders if index < size)
+    for start, end in zip(starts, starts[1:] + [size]):
+        block_end[start] = end
+    return block_end
+
+
+def block_source(program, start, end):
+    """Gera o código Python do bloco [start, end), ou None se o bloco não puder ser compilado."""
+    lines = []
+    stack = []  # expressões (literais ou variáveis locais) ainda não empilhadas
+    temps = 0
+
+    def temp():
+        nonlocal temps
+        temps += 1
+        return f"t{temps - 1}"
+
+    def new(expr):
+        name = temp()
+        lines.append(f"{name} = {expr}")
+        return name
+
+    def take():
+        return stack.pop() if stack else new("pop()")
+
+    def spill():
+        for value in stack:
+            lines.append(f"push({value})")
+        stack.clear()
+
+    def load(addr, error, index):
+        # fail recebe o índice da instrução, para o motor contar só as instruções executadas
+        value = temp()
+        lines.extend([
+            "try:",
+            f"    {value} = load_cell({addr})",
+            "except IndexError:",
+            f"    return fail(f\"{error}\", {index})",
+        ])
+        stack.append(value)
+
+    for index in range(start, end):
+        op, arg = program[index]
+        if op in NOT_COMPILABLE or (op == Op.LOAD and arg != 0):
+            return None
+
+        if op in (Op.PUSHI, Op.PUSHS):
+            stack.append(repr(arg))
+        elif op == Op.PUSHF:
+            if not math.isfinite(arg):
+                return None
+            stack.append(repr(arg))
+        elif op in (Op.PUSHG, Op.PUSHST):
+            stack.append(new(f"gp[{arg}]"))
+        elif op == Op.DUP and arg == 1:
+            if not stack:
+                return None  # o valor vem de fora do bloco (e a pilha pode estar vazia)
+            value = take()
+            stack.extend((value, value))
+        elif op == Op.STOREG:
+            lines.append(f"gp[{arg}] = {take()}")
+        elif op in BINARY:
+            b = take()
+            a = take()
+            stack.append(new(BINARY[op].format(a=a, b=b)))
+        elif op in UNARY:
+            stack.append(new(UNARY[op].format(a=take())))
+        elif op in (Op.WRITEI, Op.WRITES):
+            lines.append(f"out(str({take()}) + \" \")")
+        elif op == Op.WRITELN:
+            lines.append("out(\"\\n\")")
+        elif op == Op.LOAD:
+            stack.append(new(f"load_cell({take()})"))
+        elif op == Op.LOADN:
+            b = take()
+            addr = new(f"{take()} + {b}")
+            load(addr, f"[ERRO] LOADN: endereço {{{addr}}} fora da memória", index)
+        elif op == Op.LOADIDX:
+            addr = new(f"gp[{arg[0]}] + gp[{arg[1]}] - {arg[2]}")
+            load(addr, f"[ERRO] LOADN: endereço {{{addr}}} fora da memória", index)
+        elif op == Op.STOREN:
+            value = take()
+            index_value = take()
+            lines.append(f"store_cell({take()} + {index_value}, {value})")
+        elif op == Op.STORE:
+            value = take()
+            lines.append(f"store_cell({take()} + {arg}, {value})")
+        elif op == Op.ALLOCN:
+            stack.append(new(f"allocate({take()})"))
+        elif op == Op.INCG:
+            lines.append(f"gp[{arg[0]}] += {arg[1]}")
+        elif op == Op.START:
+            pass
+        elif op == Op.JUMP:
+            spill()
+            lines.append(f"return {arg}")
+        elif op in (Op.JZ, Op.JNZ):
+            value = take()
+            spill()
+            lines.append(f"if {value} {'==' if op == Op.JZ else '!='} 0:")
+            lines.append(f"    return {arg}")
+        elif op in COMPARE_JUMP:
+            spill()
+            lines.append(f"if gp[{arg[0]}] {'>' if op == Op.CMPJG else '<'} gp[{arg[1]}]:")
+            lines.append(f"    return {arg[2]}")
+        elif op == Op.STOP:
+            spill()
+            lines.append("return halt()")
+        else:
+            return None
+
+    if not lines or not lines[-1].startswith("return"):
+        spill()
+        lines.append(f"return {end}")
+
+    body = "\n".join("        " + line for line in lines)
+    return (f"def make({', '.join(ENVIRONMENT)}):\n"
+            f"    def block():\n{body}\n"
+            f"    return block\n")
+
+
+def compile_block(program, start, end):
+    """Compila o bloco com compile(); devolve (code object, source) ou None."""
+    source = block_source(program, start, end)
+    if source is None:
+        return None
+    return compile(source, f"<jit bloco {start}>", "exec"), source
+
+
+def instantiate(code, environment):
+    """Cria a closure do bloco ligada ao ambiente (pilha, memória, output) de uma execução."""
+    namespace = {}
+    exec(code, namespace)
+    return namespace["make"](*(environment[name] for name in ENVIRONMENT))
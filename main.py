@@ -1,20 +1,82 @@
-import sys, os
-from src.analise_sintatica import create_parser
-from src.analise_semantica import SemanticAnalyzer
-from src.otimizar_AST import collect_used_variables, prune_unused_var_declarations
-from src.codegen import CodeGenerator
-from vm import VirtualMachine
-from colorama import init
-init(autoreset=True)
-
-def main(pascal_file):
+import sys, os, argparse
+from src.cache import CompileCache, DEFAULT_DIR
+
+# As fases do compilador, a VM e o colorama são importados só quando são precisos: uma
+# compilação com a cache (ou com -c, sem VM) não paga o arranque dos módulos que não usa.
+
+def main(pascal_file, profile=None, optimize_code=False, write_vm_file=True, use_ir=False, cache=None,
+         verbose=False, compile_only=False):
     with open(pascal_file, 'r') as file:
         source_code = file.read()
 
+    vm = None if compile_only else create_vm(profile)
+    filename = os.path.basename(pascal_file).replace(".pas", ".vm")
+    output_dir = os.path.join("examples", "vm")
+    output_file = os.path.join(output_dir, filename)
+    if write_vm_file:
+        os.makedirs(output_dir, exist_ok=True)
+
+    # Cache de compilação: se o mesmo programa já foi compilado com as mesmas opções,
+    # nenhuma fase do compilador é executada
+    key = None
+    if cache is not None:
+        key = cache.key(source_code, {"optimize": optimize_code, "ir": use_ir})
+        code = cache.get(key)
+        if verbose:
+            print(f"Cache: {'acerto' if code is not None else 'falha'} ({key[:12]})", file=sys.stderr)
+        if code is not None:
+            if optimize_code:
+                # o relatório do peephole só existe quando o programa é compilado
+                print("Peephole: código da cache (relatório só ao compilar, ver --no-cache)", file=sys.stderr)
+            if write_vm_file:
+                with open(output_file, "w") as f:
+                    for line in code:
+                        f.write(line + "\n")
+            elif compile_only:
+                print("\n".join(code))
+            if vm is not None:
+                vm.load_code(code)
+                run_vm(vm, profile)
+            if verbose:
+                print(f"Cache: {cache.report()}", file=sys.stderr)
+            return
+
+    code = compile_program(source_code, vm, optimize_code, use_ir, output_file if write_vm_file else None)
+    if code is None:
+        return
+    if cache is not None:
+        cache.put(key, code)
+        if verbose:
+            print(f"Cache: {cache.report()}", file=sys.stderr)
+    if vm is None:
+        if not write_vm_file:
+            print("\n".join(code))
+        return
+    run_vm(vm, profile)
+
+
+def create_vm(profile=None):
+    from vm import VirtualMachine
+    from colorama import init
+    init(autoreset=True)
+    return VirtualMachine("profile" if profile else "table")
+
+
+def compile_program(source_code, vm=None, optimize_code=False, use_ir=False, output_file=None):
+    """
+    Compila o programa, escreve o código em output_file (se indicado) e carrega-o na VM (se
+    indicada). Devolve as linhas de código VM, ou None se houver erros.
+    """
+    from src.analise_sintatica import create_parser
+    from src.analise_semantica import SemanticAnalyzer
+    from src.otimizar_AST import collect_used_variables, prune_unused_var_declarations, propagate_constants, \
+        inline_functions
+    from src.codegen import CodeGenerator
+
     # Análise sintática
     parser = create_parser()
     ast = parser.parse(source_code)
-    
+
     used_vars = collect_used_variables(ast)
     prune_unused_var_declarations(ast, used_vars)
 
@@ -35,36 +97,123 @@ def main(pascal_file):
             print(" -", e)
         return
 
+    # Expansão de funções pequenas e cálculo e propagação de constantes na AST (depois da
+    # análise semântica do programa original, para -O aceitar exatamente os mesmos programas)
+    if optimize_code:
+        ast = propagate_constants(inline_functions(ast))
+        prune_unused_var_declarations(ast, collect_used_variables(ast))
+        analyzer = SemanticAnalyzer()  # tabela de símbolos do programa otimizado
+        if not analyzer.analyze(ast):
+            print_errors("Erros semânticos encontrados:", analyzer.errors)
+            return
+
     #print("--- Análise semântica concluída ---")
 
     # Code generator 
-    generator = CodeGenerator(analyzer.symtab)
-    code = generator.generate(ast)
+    generator = CodeGenerator(analyzer.symtab, optimize=optimize_code)
+
+    if optimize_code or use_ir:
+        if use_ir:
+            # Código gerado a partir da representação intermédia (CFG de blocos básicos)
+            from src.ir import lower_program
+            from src.ir_codegen import generate_from_ir
+            program = lower_program(ast, analyzer.symtab)
+            if program.errors:
+                print("Erros na geração da IR:")
+                for e in program.errors:
+                    print(" -", e)
+                return
+            code = generate_from_ir(program)
+        else:
+            code = generator.generate(ast)
+            if generator.errors:
+                print_errors("Erros na geração de código:", generator.errors)
+                return
+        if optimize_code:
+            # Otimização peephole do código VM (precisa do programa completo)
+            from src.peephole import optimize, instruction_count
+            before = instruction_count(code)
+            code = optimize(code)
+            after = instruction_count(code)
+            print(f"Peephole: {before} -> {after} instruções ({100 * (before - after) / max(before, 1):.1f}% menos)",
+                  file=sys.stderr)
+        if output_file:
+            with open(output_file, "w") as f:
+                for line in code:
+                    f.write(line + "\n")
+        if vm is not None:
+            vm.load_code(code)
+    elif output_file:
+        # o código é escrito no ficheiro à medida que é gerado
+        with open(output_file, "w") as f:
+            generator.generate(ast, f)
+        if generator.errors:
+            os.remove(output_file)  # código incompleto
+            print_errors("Erros na geração de código:", generator.errors)
+            return
+        if vm is not None:
+            vm.load_file(output_file)
+        with open(output_file, "r") as f:
+            code = f.read().splitlines()
+    elif vm is None:
+        code = generator.generate(ast)
+        if generator.errors:
+            print_errors("Erros na geração de código:", generator.errors)
+            return
+    else:
+        # o código vai diretamente para a VM, sem ficheiro .vm
+        from vm import CodeLoader
+        loader = CodeLoader(vm)
+        generator.generate(ast, loader)
+        if generator.errors:
+            print_errors("Erros na geração de código:", generator.errors)
+            return
+        loader.close()
+        code = loader.lines
 
+    #print(f"\nCódigo gerado em: {output_file}")
+    return code
 
 
+def print_errors(title, errors):
+    print(title)
+    for e in errors:
+        print(" -", e)
 
-    filename = os.path.basename(pascal_file).replace(".pas", ".vm")
-    output_dir = os.path.join("examples", "vm")
-    os.makedirs(output_dir, exist_ok=True)
-    output_file = os.path.join(output_dir, filename)
-
-    with open(output_file, "w") as f:
-        for line in code:
-            f.write(line + "\n")
 
-    #print(f"\nCódigo gerado em: {output_file}")
-
-    vm = VirtualMachine()
-    vm.load_code(code)
-    vm.run()
+def run_vm(vm, profile=None):
+    from vm import InputExhausted
+    try:
+        vm.run()
+    except InputExhausted as e:
+        print(f"\n{e}")
+    if profile:
+        print(vm.profile_json() if profile == "json" else vm.profile_report(), file=sys.stderr)
 
 
 
 
 if __name__ == "__main__":
-    if len(sys.argv) != 2: 
-        print("Comando correto: python3 main.py <ficheiro.pas>")
-    else:
-        pascal_file = sys.argv[1]
-        main(pascal_file)     # python3 main.py examples/pas/hello.pas
+    parser = argparse.ArgumentParser(description="Compilador Pascal para a EWVM",
+                                     usage="python3 main.py <ficheiro.pas> [-O] [--ir] [--no-vm-file] [--profile [table|json]] "
+                                           "[-c] [--no-cache] [-v]")
+    parser.add_argument("pascal_file")
+    parser.add_argument("-O", dest="optimize", action="store_true", help="otimiza o código VM gerado (peephole)")
+    parser.add_argument("--ir", action="store_true",
+                        help="gera o código VM a partir da representação intermédia (src/ir.py)")
+    parser.add_argument("--no-vm-file", action="store_true",
+                        help="passa o código gerado diretamente à VM, sem escrever examples/vm/<nome>.vm")
+    parser.add_argument("--profile", choices=("table", "json"), nargs="?", const="table",
+                        help="executa com o motor instrumentado da VM e mostra o relatório (tabela ou JSON)")
+    parser.add_argument("-c", "--compile-only", action="store_true",
+                        help="só compila (escreve examples/vm/<nome>.vm, ou o código no stdout com --no-vm-file), "
+                             "sem executar na VM")
+    parser.add_argument("--no-cache", action="store_true", help="compila sempre, sem usar a cache de compilação")
+    parser.add_argument("--cache-dir", default=DEFAULT_DIR, help=f"diretório da cache de compilação ({DEFAULT_DIR})")
+    parser.add_argument("--cache-size", type=int, default=16, help="tamanho máximo da cache em MB (16)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="mostra os acertos/falhas da cache (e conta-os nas estatísticas)")
+    args = parser.parse_args()
+    cache = None if args.no_cache else CompileCache(args.cache_dir, args.cache_size * 1024 * 1024,
+                                                        track_stats=args.verbose)
+    main(args.pascal_file, args.profile, args.optimize, not args.no_vm_file, args.ir, cache, args.verbose,
+         args.compile_only)     # python3 main.py examples/pas/hello.pas
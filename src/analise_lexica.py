@@ -1,5 +1,6 @@
 import ply.lex as lex
 import re 
+from src import tabelas_ply
 
 class Lexer:
     """
@@ -306,7 +307,12 @@ class Lexer:
         
         
     # BUILD LEXER 
-    def build(self, **kwargs):
+    def build(self, optimize=True, **kwargs):
+        # com optimize, as expressões regulares são lidas de src/tabelas_ply (ver tabelas_ply)
+        if optimize:
+            digest = tabelas_ply.rules_hash(self, 't_', self.tokens, int(re.IGNORECASE))
+            kwargs.update(optimize=1, lextab=tabelas_ply.table_module('lextab', digest),
+                          outputdir=tabelas_ply.DIRECTORY)
         self.lexer = lex.lex(module=self, reflags=re.IGNORECASE, **kwargs)
 
         return self.lexer
@@ -318,6 +324,6 @@ class Lexer:
 
 
 
-def create_lexer():
+def create_lexer(optimize=True):
     lexer = Lexer()
-    return lexer.build()
\ No newline at end of file
+    return lexer.build(optimize)
\ No newline at end of file
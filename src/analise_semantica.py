@@ -74,26 +74,50 @@ class SemanticAnalyzer:
             
     def _analyze_function_decl(self, node):
         func_id = node.children[0].leaf
-        param_list = node.children[1]
         return_type = node.children[2].leaf
+        self._analyze_subprogram(func_id, node.children[1], node.children[3], return_type, 'function')
 
-        # adiciona símbolo da função
-        self.symtab.add_symbol(func_id, type=return_type, kind='function')
+    def _analyze_procedure_decl(self, node):
+        self._analyze_subprogram(node.children[0].leaf, node.children[1], node.children[2], None, 'procedure')
+
+    def _analyze_subprogram(self, name, param_list, body, return_type, kind):
+        params = [(id_node.leaf, param.children[1].leaf)
+                  for param in param_list.children for id_node in param.children[0].children]
+
+        # adiciona símbolo da função (antes do corpo, para permitir chamadas recursivas)
+        self.symtab.add_symbol(name, type=return_type, kind=kind, params=[param_type for _, param_type in params])
 
         # entra no novo escopo
-        self.symtab.enter_scope(func_id)
+        self.symtab.enter_scope(name)
 
         # adiciona parâmetros ao escopo da função
-        for param in param_list.children:
-            ids, type_node = param.children
-            for id_node in ids.children:
-                self.symtab.add_symbol(id_node.leaf, type=type_node.leaf, kind='parameter')
+        for param_name, param_type in params:
+            self.symtab.add_symbol(param_name, type=param_type, kind='parameter')
 
         # analisa o corpo da função
-        self._analyze_node(node.children[3])
+        self._analyze_node(body)
 
         self.symtab.exit_scope()
 
+    def _check_call(self, node, missing):
+        """Verifica o subprograma chamado e os argumentos; devolve o símbolo (ou None)."""
+        name = node.children[0].leaf
+        args = node.children[1].children if len(node.children) > 1 else []
+        symbol = self.symtab.lookup(name)
+        if symbol is None or symbol.kind not in ('function', 'procedure'):
+            self.errors.append(missing.format(name))
+            return None
+        if len(args) != len(symbol.params):
+            self.errors.append(f"Erro: '{name}' espera {len(symbol.params)} argumento(s), recebeu {len(args)}")
+        for position, arg in enumerate(args, 1):
+            arg_type = self._get_expression_type(arg)
+            param_type = symbol.params[position - 1] if position <= len(symbol.params) else None
+            # mesma regra da atribuição: o argumento tem de ter o tipo do parâmetro
+            if arg_type and param_type and arg_type != param_type:
+                self.errors.append(f"Erro de tipo: argumento {position} de '{name}' deve ser '{param_type}', "
+                                   f"recebeu '{arg_type}'")
+        return symbol
+
 
     def _analyze_compound(self, node):
         return self._analyze_node(node.children[0])
@@ -130,10 +154,11 @@ class SemanticAnalyzer:
         self._analyze_node(node.children[3])  # corpo
 
     def _analyze_procedure_call(self, node):
-        proc_name = node.children[0].leaf
-        symbol = self.symtab.lookup(proc_name)
-        if not symbol:
-            self.errors.append(f"Erro: procedimento '{proc_name}' não declarado")
+        self._check_call(node, "Erro: procedimento '{}' não declarado")
+
+    def _analyze_function_call(self, node):
+        # chamada dentro de writeln/write, etc.: as outras expressões passam por _get_expression_type
+        return self._get_expression_type(node)
 
     def _analyze_writeln(self, node):
         if node.children:
@@ -231,4 +256,11 @@ class SemanticAnalyzer:
 
         elif node.type in ['binary_op', 'unary_op']:
             return self._analyze_node(node)
+
+        elif node.type == 'function_call':
+            symbol = self._check_call(node, "Erro: função '{}' não declarada")
+            if symbol is not None and symbol.kind != 'function':
+                self.errors.append(f"Erro: '{symbol.name}' é um procedimento e não devolve valor")
+                return None
+            return symbol.type if symbol else None
         return None
\ No newline at end of file
@@ -1,6 +1,7 @@
 import ply.yacc as yacc
 from src.analise_lexica import Lexer, create_lexer
 from src.tabela_simbolos import SymbolTable
+from src import tabelas_ply
 
 
 class Node:
@@ -19,12 +20,21 @@ class Parser:
     Analisador sintático. Cria a AST a partir dos tokens.
     """
     
-    def __init__(self):
-        self.lexer = create_lexer()
+    def __init__(self, optimize=True):
+        self.lexer = create_lexer(optimize)
         self.tokens = Lexer.tokens
         self.symtab = SymbolTable()
         self.errors = []
-        self.parser = yacc.yacc(module=self) # inicializa o parser. cria o parser ao compilar as regras p_ 
+        # inicializa o parser. cria o parser ao compilar as regras p_ 
+        # com optimize, as tabelas LALR são lidas de src/tabelas_ply sem validar de novo a gramática
+        # (e só são geradas quando o hash das regras muda)
+        if optimize:
+            digest = tabelas_ply.rules_hash(self, 'p_', self.tokens, getattr(self, 'precedence', None))
+            self.parser = yacc.yacc(module=self, optimize=1, debug=False,
+                                    tabmodule=tabelas_ply.table_module('parsetab', digest),
+                                    outputdir=tabelas_ply.DIRECTORY)
+        else:
+            self.parser = yacc.yacc(module=self)
         
     # Regra para a unidade de programa completa
     def p_program(self, p):
@@ -37,15 +47,18 @@ class Parser:
         p[0] = Node('block', [p[1], p[2]])
 
     def p_declarations(self, p):
-        '''declarations : VAR var_declarations
-                        | function_declaration
+        '''declarations : declaration_list
                         | empty'''
+        p[0] = Node('declarations', p[1])
+
+    # Lista de declarações: secções VAR, funções e procedimentos, por qualquer ordem
+    def p_declaration_list(self, p):
+        '''declaration_list : declaration_list declaration
+                            | declaration'''
         if len(p) == 3:
-            p[0] = Node('declarations', [p[2]])
-        elif p[1] is not None:
-            p[0] = Node('declarations', [p[1]])
+            p[0] = p[1] + [p[2]]
         else:
-            p[0] = Node('declarations')
+            p[0] = [p[1]]
         
     def p_function_block(self, p):
         '''function_block : VAR var_declarations compound_statement
@@ -60,8 +73,9 @@ class Parser:
 
     def p_declaration(self, p):
         '''declaration : VAR var_declarations
-                    | function_declaration'''
-        p[0] = p[2] if p[1].lower() == 'var' else p[1]
+                    | function_declaration
+                    | procedure_declaration'''
+        p[0] = p[2] if len(p) == 3 else p[1]
 
     # Regra para declarações de variáveis
     def p_var_declarations(self, p):
@@ -317,8 +331,20 @@ class Parser:
     
 
     def p_function_declaration(self, p):
-        '''function_declaration : FUNCTION ID LPAREN param_list RPAREN COLON type_spec SEMICOLON function_block SEMICOLON'''
-        p[0] = Node('function_decl', [Node('id', leaf=p[2]), p[4], p[7], p[9]])
+        '''function_declaration : FUNCTION ID LPAREN param_list RPAREN COLON type_spec SEMICOLON function_block SEMICOLON
+                                | FUNCTION ID COLON type_spec SEMICOLON function_block SEMICOLON'''
+        if len(p) == 11:
+            p[0] = Node('function_decl', [Node('id', leaf=p[2]), p[4], p[7], p[9]])
+        else:
+            p[0] = Node('function_decl', [Node('id', leaf=p[2]), Node('param_list'), p[4], p[6]])
+
+    def p_procedure_declaration(self, p):
+        '''procedure_declaration : PROCEDURE ID LPAREN param_list RPAREN SEMICOLON function_block SEMICOLON
+                                 | PROCEDURE ID SEMICOLON function_block SEMICOLON'''
+        if len(p) == 9:
+            p[0] = Node('procedure_decl', [Node('id', leaf=p[2]), p[4], p[7]])
+        else:
+            p[0] = Node('procedure_decl', [Node('id', leaf=p[2]), Node('param_list'), p[4]])
 
             
     def p_param_list(self, p):
@@ -359,7 +385,10 @@ class Parser:
 
     # Método para analisar uma string
     def parse(self, data):
+        # o mesmo Parser pode analisar vários programas (ver src/servico.py)
         self.errors = []
+        self.symtab = SymbolTable()
+        self.lexer.lineno = 1
         return self.parser.parse(data, lexer=self.lexer) 
     # Inicia a análise léxica e sintática ao mesmo tempo
     # O texto é entregue ao lexer, que transforma em TOKENS com base nas regras t_
@@ -373,8 +402,8 @@ class Parser:
 
 
 # Função para criar uma instância do parser
-def create_parser():
-    return Parser()
+def create_parser(optimize=True):
+    return Parser(optimize)
 
 
 
@@ -0,0 +1,191 @@
+"""
+Cache de compilação em disco: guarda o código VM gerado para cada combinação de código fonte,
+versão do compilador e opções, para que uma nova compilação do mesmo programa não repita
+nenhuma fase (léxica, sintática, semântica, otimizações e geração de código).
+
+A chave é o SHA-256 do código fonte, das opções e da versão do compilador (um hash dos
+ficheiros .py do compilador, pelo que qualquer alteração ao compilador invalida a cache).
+Cada entrada é um ficheiro <chave>.vm (e, opcionalmente, <chave>.ast com a AST e a tabela de
+símbolos em pickle). Quando o tamanho total passa de max_bytes são removidas as entradas
+usadas há mais tempo (LRU, pela data de modificação, que é atualizada em cada acerto).
+
+Os acertos, falhas e remoções só são contados com track_stats (main.py -v): cada evento é
+acrescentado ao fim de stats.log (O_APPEND), pelo que vários processos podem usar a mesma
+cache sem perder contagens e uma consulta sem estatísticas não escreve nada além do utime.
+Quando stats.log passa de STATS_LOG_MAX bytes é compactado (sob um lock exclusivo, flock): as
+linhas são substituídas pelos totais, uma por contador.
+"""
+import os, json, glob, fcntl, hashlib, tempfile
+
+DEFAULT_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")),
+                           "pl-ewvm")
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+STATS_LOG_MAX = 64 * 1024  # tamanho de stats.log a partir do qual é compactado
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_version = None
+
+
+def compiler_version():
+    """Hash dos ficheiros do compilador (src/*.py e main.py)."""
+    global _version
+    if _version is None:
+        digest = hashlib.sha256()
+        files = sorted(glob.glob(os.path.join(_ROOT, "src", "*.py"))) + [os.path.join(_ROOT, "main.py")]
+        for path in files:
+            if os.path.basename(path) in ("parsetab.py", "lextab.py"):
+                continue  # tabelas geradas pelo PLY
+            with open(path, "rb") as f:
+                digest.update(os.path.basename(path).encode() + b"\0" + f.read())
+        _version = digest.hexdigest()
+    return _version
+
+
+def _write_atomic(path, data):
+    """Escreve o ficheiro de uma só vez (outro processo nunca vê uma entrada a meio)."""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+class CompileCache:
+    def __init__(self, directory=DEFAULT_DIR, max_bytes=DEFAULT_MAX_BYTES, store_ast=False, track_stats=False):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.store_ast = store_ast  # guarda também a AST e a tabela de símbolos (ver load_ast)
+        self.track_stats = track_stats  # conta acertos, falhas e remoções em stats.log
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, source_code, options=None):
+        digest = hashlib.sha256()
+        digest.update(compiler_version().encode())
+        digest.update(json.dumps(options or {}, sort_keys=True).encode())
+        digest.update(source_code.encode())
+        return digest.hexdigest()
+
+    def _path(self, key, ext):
+        return os.path.join(self.directory, key + ext)
+
+    def get(self, key):
+        """Linhas de código VM guardadas para a chave, ou None (conta um acerto ou uma falha)."""
+        path = self._path(key, ".vm")
+        try:
+            with open(path, "r") as f:
+                code = f.read().splitlines()
+            os.utime(path)  # usada agora: passa a ser a entrada mais recente
+        except OSError:
+            self._count("misses")
+            return None
+        self._count("hits")
+        return code
+
+    def put(self, key, code, ast=None, symtab=None):
+        _write_atomic(self._path(key, ".vm"), "".join(line + "\n" for line in code).encode())
+        if self.store_ast and ast is not None:
+            import pickle  # só com store_ast
+            _write_atomic(self._path(key, ".ast"), pickle.dumps((ast, symtab)))
+        self._evict()
+
+    def load_ast(self, key):
+        """(ast, symtab) guardados com store_ast, ou None."""
+        import pickle
+        try:
+            with open(self._path(key, ".ast"), "rb") as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+    def entries(self):
+        """[(data de uso, tamanho em bytes, chave)] de todas as entradas."""
+        result = []
+        for path in glob.glob(os.path.join(self.directory, "*.vm")):
+            key = os.path.basename(path)[:-3]
+            try:
+                stat = os.stat(path)
+                size = stat.st_size
+                if os.path.exists(self._path(key, ".ast")):
+                    size += os.path.getsize(self._path(key, ".ast"))
+            except OSError:
+                continue  # removida entretanto por outro processo
+            result.append((stat.st_mtime, size, key))
+        return result
+
+    def _evict(self):
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        for _, size, key in entries:
+            if total <= self.max_bytes:
+                break
+            for ext in (".vm", ".ast"):
+                try:
+                    os.remove(self._path(key, ext))
+                except OSError:
+                    pass
+            total -= size
+            evicted += 1
+        if evicted:
+            self._count("evictions", evicted)
+
+    # -- estatísticas (acumuladas em stats.log, uma linha "<nome> <quantidade>" por evento) ----
+
+    def stats(self):
+        try:
+            fd = os.open(os.path.join(self.directory, "stats.log"), os.O_RDONLY)
+        except OSError:
+            return self._parse_stats(b"")
+        try:
+            fcntl.flock(fd, fcntl.LOCK_SH)
+            return self._parse_stats(self._read_all(fd))
+        finally:
+            os.close(fd)
+
+    @staticmethod
+    def _read_all(fd):
+        os.lseek(fd, 0, os.SEEK_SET)
+        chunks = []
+        while chunk := os.read(fd, 65536):
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    @staticmethod
+    def _parse_stats(data):
+        stats = {"hits": 0, "misses": 0, "evictions": 0}
+        for line in data.decode().splitlines():
+            name, _, amount = line.partition(" ")
+            if name in stats and amount.strip().isdigit():
+                stats[name] += int(amount)
+        return stats
+
+    def _count(self, name, amount=1):
+        if not self.track_stats:
+            return
+        # uma única escrita em modo append, com um lock partilhado: as linhas de processos
+        # diferentes não se misturam e nenhuma se perde durante uma compactação
+        fd = os.open(os.path.join(self.directory, "stats.log"), os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_SH)
+            os.write(fd, f"{name} {amount}\n".encode())
+            if os.fstat(fd).st_size > STATS_LOG_MAX:
+                self._compact_stats(fd)
+        finally:
+            os.close(fd)
+
+    def _compact_stats(self, fd):
+        """Substitui as linhas de stats.log pelos totais (com o lock exclusivo do ficheiro)."""
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        if os.fstat(fd).st_size <= STATS_LOG_MAX:
+            return  # já compactado por outro processo
+        stats = self._parse_stats(self._read_all(fd))
+        os.ftruncate(fd, 0)
+        os.write(fd, "".join(f"{name} {amount}\n" for name, amount in stats.items() if amount).encode())
+
+    def report(self):
+        stats = self.stats()
+        entries = self.entries()
+        lookups = stats.get("hits", 0) + stats.get("misses", 0)
+        rate = 100 * stats.get("hits", 0) / lookups if lookups else 0
+        return (f"{stats.get('hits', 0)} acertos, {stats.get('misses', 0)} falhas ({rate:.0f}% acertos), "
+                f"{stats.get('evictions', 0)} removidas; {len(entries)} entradas, "
+                f"{sum(size for _, size, _ in entries) / 1024:.1f} KB em {self.directory}")
@@ -1,39 +1,161 @@
+from src.otimizar_AST import assigned_variables, loop_invariants, is_straight_line, common_subexpressions
+
+
+class CodeStream:
+    """
+    Destino do código gerado, organizado em secções que são escritas pela ordem indicada.
+    A primeira secção ainda aberta é escrita diretamente no sink, em blocos de `buffer_lines`
+    linhas; as secções seguintes ficam em memória até todas as anteriores serem fechadas.
+    O sink pode ser uma lista (recebe as linhas) ou qualquer objeto com write() (ficheiro,
+    socket.makefile("w"), vm.CodeLoader, ...).
+    """
+    def __init__(self, sink, sections, buffer_lines=256):
+        self.sink = sink
+        self.sections = list(sections)
+        self.pending = {name: [] for name in self.sections}
+        self.closed = set()
+        self.current = 0       # índice da secção escrita diretamente no sink
+        self.buffer = []
+        self.buffer_lines = buffer_lines
+        self.lines = 0         # linhas já escritas no sink
+
+    def emit(self, section, line):
+        if section in self.closed:
+            raise ValueError(f"A secção '{section}' já foi fechada")
+        if section == self.sections[self.current]:
+            self.buffer.append(line)
+            if len(self.buffer) >= self.buffer_lines:
+                self.flush()
+        else:
+            self.pending[section].append(line)
+
+    def close(self, section):
+        """Fecha uma secção; se era a secção atual, passa a escrever diretamente a seguinte."""
+        self.closed.add(section)
+        while self.current < len(self.sections) and self.sections[self.current] in self.closed:
+            self.current += 1
+            if self.current < len(self.sections):
+                following = self.sections[self.current]
+                self.buffer.extend(self.pending[following])
+                self.pending[following] = []
+        if len(self.buffer) >= self.buffer_lines:
+            self.flush()
+
+    def flush(self):
+        if isinstance(self.sink, list):
+            self.sink.extend(self.buffer)
+        elif self.buffer:
+            self.sink.write("\n".join(self.buffer) + "\n")
+        self.lines += len(self.buffer)
+        self.buffer = []
+
+    def finish(self):
+        for section in self.sections:
+            self.close(section)
+        self.flush()
+
+
 class CodeGenerator:
-    def __init__(self, symtab):
+    # secções do código gerado, pela ordem em que aparecem no programa final
+    # (as funções ficam depois do 'stop' do programa principal)
+    SECTIONS = ("declarations", "main", "functions")
+
+    def __init__(self, symtab, optimize=False):
         self.symtab = symtab
-        self.code = []
+        self.optimize = optimize  # calcula as expressões invariantes dos ciclos antes do ciclo
         self.temp_counter = 0
         self.label_counter = 0
         self.current_offset = 0
-        self.counter = 0
-        self.var_declarations = []
-        self.main_code = []
+        self.counter = (0, False)  # (endereço, local?) da variável do ciclo 'for' atual
+        self.out = None  # CodeStream da geração em curso
+        self.frame = None  # frame da função a ser gerada (None no programa principal)
         self.errors = []
+        self.free_temps = []  # slots de temporários já libertados, reutilizáveis
+        self.hoisted = {}  # id(nó da expressão) -> slot global com o valor calculado antes do ciclo
+        self.cse_first = {}  # id(nó) -> chave do valor a guardar (subexpressões comuns do bloco atual)
+        self.cse_reuse = {}  # id(nó) -> chave do valor já guardado
+        self.cse_slots = {}  # chave -> slot global onde o valor está guardado
 
     def emit(self, instruction):
-        self.main_code.append(instruction)
+        self.out.emit("main", instruction)
+
+    def declare(self, instruction):
+        self.out.emit("declarations", instruction)
+
+    def _alloc_temp(self):
+        """
+        Reserva um slot para um temporário do compilador, reutilizando um livre se houver.
+        Não é gerada inicialização: o temporário é sempre escrito antes de ser lido (e a secção
+        de declarações pode já ter sido escrita). Dentro de uma função o slot é local ao frame,
+        para que as chamadas recursivas não o partilhem.
+        """
+        if self.free_temps:
+            return self.free_temps.pop()
+        if self.frame is not None:
+            return self._alloc_local()
+        slot = self.current_offset
+        self.current_offset += 1
+        return slot
+
+    def _alloc_local(self):
+        slot = self.frame["size"]
+        self.frame["size"] += 1
+        return slot
+
+    def _load(self, address, local):
+        self.emit(f"{'pushl' if local else 'pushg'} {address}")
+
+    def _store(self, address, local):
+        self.emit(f"{'storel' if local else 'storeg'} {address}")
+
+    def _load_temp(self, slot):
+        self._load(slot, self.frame is not None)
 
-    def generate(self, ast):
+    def _store_temp(self, slot):
+        self._store(slot, self.frame is not None)
+
+    def _variable_slot(self, symbol):
+        """(endereço, local?) de uma variável; o nome da função atual designa o valor de retorno."""
+        if symbol.kind == 'function' and self.frame is not None and self.frame["name"] == symbol.name:
+            return self.frame["result"], True
+        return symbol.address, symbol.scope != "global"
+
+    def _free_temp(self, slot):
+        """Liberta o slot de um temporário que já não é usado (por exemplo, no fim de um ciclo)."""
+        self.free_temps.append(slot)
+
+    def generate(self, ast, sink=None):
+        """
+        Gera o código VM da AST. Sem sink devolve a lista de linhas. Com sink (qualquer objeto
+        com write()) as linhas são escritas à medida que são geradas e é devolvido o número de
+        linhas escritas.
+        """
         if ast is None:
-            return []
+            return [] if sink is None else 0
 
-        self.code = []
-        self.var_declarations = []
-        self.main_code = []
-        self._generate_code(ast)
+        code = [] if sink is None else sink
+        self.out = CodeStream(code, self.SECTIONS)
+        self.free_temps = []
+        self.hoisted = {}
+        self.cse_first, self.cse_reuse, self.cse_slots = {}, {}, {}
 
-        # concatena declarações + start + código + stop
-        full_code = []
-        full_code += self.var_declarations
-        full_code.append("start")
-        full_code += self.main_code
-        full_code.append("stop")
+        # declarações + start + código + stop
+        self.emit("start")
+        self._generate_code(ast)
+        self.emit("stop")
+        self.out.finish()
 
-        return full_code
+        return code if sink is None else self.out.lines
 
     def _generate_code(self, node):
         if node is None:
             return
+        if id(node) in self.hoisted:
+            self._load_temp(self.hoisted[id(node)])
+            return
+        if id(node) in self.cse_reuse:
+            self._load_temp(self.cse_slots[self.cse_reuse[id(node)]])
+            return
 
         method = getattr(self, f"_generate_{node.type}", None)
         if method:
@@ -42,11 +164,21 @@ class CodeGenerator:
             for child in node.children:
                 self._generate_code(child)
 
+        if id(node) in self.cse_first:
+            # primeira ocorrência de uma subexpressão que se repete no bloco: guarda o valor
+            slot = self._alloc_temp()
+            self.cse_slots[self.cse_first[id(node)]] = slot
+            self.emit("dup 1")
+            self._store_temp(slot)
+
     def _generate_program(self, node):
         self._generate_code(node.children[0])
 
     def _generate_block(self, node):
         for child in node.children:
+            if child is None or child.type != 'declarations':
+                # as declarações estão completas: o código principal pode ser escrito diretamente
+                self.out.close("declarations")
             self._generate_code(child)
 
     def _generate_declarations(self, node):
@@ -68,30 +200,57 @@ class CodeGenerator:
             var_name = id_node.leaf
             symbol = self.symtab.lookup(var_name)
 
-            if symbol:
+            if symbol and self.frame is not None:
+                # variável local: fica no frame, inicializada a zero por 'pushn'
+                if symbol.type == "array":
+                    self.errors.append(f"Erro: arrays locais não são suportados ('{var_name}')")
+                elif symbol.address is None:
+                    symbol.address = self._alloc_local()
+            elif symbol:
                 if symbol.address is None:
                     symbol.address = self.current_offset
 
                     if symbol.type == "array":
-                        self.var_declarations.append(f"pushi {symbol.size}")    # total size
-                        self.var_declarations.append("allocn")                  # allocate on heap
-                        self.var_declarations.append(f"storeg {symbol.address}")  # store pointer in gp
-
-                        for i in range(symbol.size):
-                            self.var_declarations.append(f"pushst {symbol.address}")
-                            self.var_declarations.append(f"pushi 0")
-                            self.var_declarations.append(f"store {i}")
+                        # allocn devolve memória já preenchida a zero: não é preciso inicializar
+                        # cada elemento, e o código gerado não depende do tamanho do array
+                        self.declare(f"pushi {symbol.size}")    # total size
+                        self.declare("allocn")                  # allocate on heap
+                        self.declare(f"storeg {symbol.address}")  # store pointer in gp
 
                         self.current_offset += 1  # only one global slot is needed (for pointer)
                     else:
                         # Scalar variable
-                        self.var_declarations.append("pushi 0")
-                        self.var_declarations.append(f"storeg {symbol.address}")
+                        self.declare("pushi 0")
+                        self.declare(f"storeg {symbol.address}")
                         self.current_offset += 1
 
     def _generate_statement_list(self, node):
+        if not self.optimize:
+            for stmt in node.children:
+                self._generate_code(stmt)
+            return
+
+        # com otimização, os comandos em linha reta são gerados por blocos básicos (ver _generate_basic_block)
+        block = []
         for stmt in node.children:
+            if is_straight_line(stmt):
+                block.append(stmt)
+            else:
+                self._generate_basic_block(block)
+                block = []
+                self._generate_code(stmt)
+        self._generate_basic_block(block)
+
+    def _generate_basic_block(self, statements):
+        """Gera um bloco de comandos em linha reta, calculando uma só vez as subexpressões comuns."""
+        if not statements:
+            return
+        self.cse_first, self.cse_reuse = common_subexpressions(statements, self.hoisted)
+        for stmt in statements:
             self._generate_code(stmt)
+        for slot in self.cse_slots.values():
+            self._free_temp(slot)
+        self.cse_first, self.cse_reuse, self.cse_slots = {}, {}, {}
 
     def _generate_assignment(self, node):
         var_node = node.children[0]
@@ -101,7 +260,7 @@ class CodeGenerator:
 
         if var_node.type == 'variable':
             symbol = self.symtab.lookup(var_node.leaf)
-            self.emit(f"storeg {symbol.address}")
+            self._store(*self._variable_slot(symbol))
 
     def _generate_variable(self, node):
         symbol = self.symtab.lookup(node.leaf)
@@ -113,7 +272,7 @@ class CodeGenerator:
             self._after_loadn = False  # Resetar a flag
             return
             
-        self.emit(f"pushg {symbol.address}")  
+        self._load(*self._variable_slot(symbol))
 
 
     def _generate_integer(self, node):
@@ -170,11 +329,85 @@ class CodeGenerator:
             self.emit("pushi -1")
             self.emit("mul")
 
+    # Condições de if/while: em vez de calcular o valor 0/1 da condição e testá-lo, são geradas
+    # cadeias de saltos, e 'and'/'or' só avaliam o segundo operando quando é necessário.
+
+    def _condition_op(self, node):
+        """Operador de uma condição composta (None se já tiver sido calculada antes do ciclo)."""
+        if node.type in ('binary_op', 'unary_op') and id(node) not in self.hoisted:
+            return node.leaf.lower()
+        return None
+
+    def _jump_if_false(self, node, label):
+        """Gera o código que salta para `label` se a condição for falsa (e continua se for verdadeira)."""
+        op = self._condition_op(node)
+        if node.type == 'binary_op' and op == 'and':
+            self._jump_if_false(node.children[0], label)
+            self._jump_if_false(node.children[1], label)
+        elif node.type == 'binary_op' and op == 'or':
+            true_label = self._new_label("OR")
+            self._jump_if_true(node.children[0], true_label)
+            self._jump_if_false(node.children[1], label)
+            self.emit(f"{true_label}:")
+        elif node.type == 'unary_op' and op == 'not':
+            self._jump_if_true(node.children[0], label)
+        elif node.type == 'binary_op' and op == '<>':
+            self._generate_code(node.children[0])
+            self._generate_code(node.children[1])
+            self.emit("equal")
+            self.emit(f"jnz {label}")
+        else:
+            self._generate_code(node)
+            self.emit(f"jz {label}")
+
+    def _jump_if_true(self, node, label):
+        """Gera o código que salta para `label` se a condição for verdadeira (e continua se for falsa)."""
+        op = self._condition_op(node)
+        if node.type == 'binary_op' and op == 'and':
+            false_label = self._new_label("AND")
+            self._jump_if_false(node.children[0], false_label)
+            self._jump_if_true(node.children[1], label)
+            self.emit(f"{false_label}:")
+        elif node.type == 'binary_op' and op == 'or':
+            self._jump_if_true(node.children[0], label)
+            self._jump_if_true(node.children[1], label)
+        elif node.type == 'unary_op' and op == 'not':
+            self._jump_if_false(node.children[0], label)
+        elif node.type == 'binary_op' and op == '<>':
+            self._generate_code(node.children[0])
+            self._generate_code(node.children[1])
+            self.emit("equal")
+            self.emit(f"jz {label}")
+        else:
+            self._generate_code(node)
+            self.emit(f"jnz {label}")
+
+    def _hoist_invariants(self, loop, parts):
+        """
+        Com otimização ativa, calcula antes do ciclo as expressões de `parts` que não dependem
+        das variáveis alteradas pelo ciclo, guardando-as em temporários. Devolve os temporários.
+        As expressões já calculadas por um ciclo exterior continuam no temporário desse ciclo.
+        """
+        if not self.optimize:
+            return []
+        hoisted = []
+        for expr in loop_invariants(parts, assigned_variables(loop), self.hoisted):
+            self._generate_code(expr)
+            slot = self._alloc_temp()
+            self._store_temp(slot)
+            self.hoisted[id(expr)] = slot
+            hoisted.append((expr, slot))
+        return hoisted
+
+    def _release_hoisted(self, hoisted):
+        for expr, slot in hoisted:
+            del self.hoisted[id(expr)]
+            self._free_temp(slot)
+
     def _generate_if(self, node):
         false_label = self._new_label("ELSE")
         end_label = self._new_label("ENDIF")
-        self._generate_code(node.children[0])
-        self.emit(f"jz {false_label}")
+        self._jump_if_false(node.children[0], false_label)
         self._generate_code(node.children[1])
         self.emit(f"jump {end_label}")
         self.emit(f"{false_label}:")
@@ -186,12 +419,13 @@ class CodeGenerator:
         start_label = self._new_label("WHILE")
         end_label = self._new_label("ENDWHILE")
 
+        hoisted = self._hoist_invariants(node, node.children)
         self.emit(f"{start_label}:")
-        self._generate_code(node.children[0])
-        self.emit(f"jz {end_label}")
+        self._jump_if_false(node.children[0], end_label)
         self._generate_code(node.children[1])
         self.emit(f"jump {start_label}")
         self.emit(f"{end_label}:")
+        self._release_hoisted(hoisted)
 
 
     def _generate_for(self, node):
@@ -203,34 +437,37 @@ class CodeGenerator:
             self.errors.append(f"Erro: variável '{var_name}' não declarada")
             return
 
-        self.counter = symbol.address
+        variable = self._variable_slot(symbol)
+        self.counter = variable
         end_label = self._new_label("ENDFOR")
         start_label = self._new_label("FOR")
 
+        # os limites já são calculados uma única vez: só o corpo é analisado
+        hoisted = self._hoist_invariants(node, [node.children[3]])
+
         # Valor inicial
         self._generate_code(node.children[1])
-        self.emit(f"storeg {symbol.address}")
+        self._store(*variable)
 
-        # Reserva memória e guarda valor final
-        final_var = self.current_offset
-        self.current_offset += 1
-        self.var_declarations.append(f"pushi 0")
-        self.var_declarations.append(f"storeg {final_var}")
+        # Guarda o valor final num temporário (libertado no fim do ciclo)
+        final_var = self._alloc_temp()
         self._generate_code(node.children[2])
-        self.emit(f"storeg {final_var}")
+        self._store_temp(final_var)
         self.emit(f"{start_label}:")
-        self.emit(f"pushg {symbol.address}")
-        self.emit(f"pushg {final_var}")
+        self._load(*variable)
+        self._load_temp(final_var)
         self.emit("sup" if direction == "to" else "inf")
         self.emit("not")  # Inverte a condição
         self.emit(f"jz {end_label}")
         self._generate_code(node.children[3])
-        self.emit(f"pushg {symbol.address}")
+        self._load(*variable)
         self.emit(f"pushi {-1 if direction == 'downto' else 1}")
         self.emit("add")
-        self.emit(f"storeg {symbol.address}")
+        self._store(*variable)
         self.emit(f"jump {start_label}")
         self.emit(f"{end_label}:")
+        self._free_temp(final_var)
+        self._release_hoisted(hoisted)
 
     def _generate_writeln(self, node):
         if node.children:
@@ -270,7 +507,7 @@ class CodeGenerator:
                     self.emit("atof")
                 else:
                     self.emit("atoi")
-                self.emit(f"storeg {symbol.address}")
+                self._store(*self._variable_slot(symbol))
 
             elif var_node.type == 'array_access':
                 array_name = var_node.leaf
@@ -280,7 +517,7 @@ class CodeGenerator:
                     continue
 
                 self.emit(f"pushst {symbol.address}")
-                self.emit(f"pushg {self.counter}")
+                self._load(*self.counter)
                 self.emit(f"pushi 1")
                 self.emit("sub")
                 self.emit(f"read")
@@ -301,7 +538,7 @@ class CodeGenerator:
 
         # Push the base address (pointer stored in gp[symbol.address])
         self.emit(f"pushst {symbol.address}")
-        self.emit(f"pushg {self.counter}")
+        self._load(*self.counter)
         self.emit(f"pushi 1")
         self.emit("sub")
         self.emit("loadn")
@@ -309,6 +546,73 @@ class CodeGenerator:
         self._generate_code(index_expr)
 
 
+    # Funções e procedimentos: o chamador empilha o espaço do valor de retorno (só funções) e os
+    # argumentos e faz 'pusha; call'; o frame começa no topo da pilha nesse momento. Com k
+    # parâmetros, o parâmetro i está em fp + i - k e o valor de retorno em fp - k - 1; as variáveis
+    # locais e os temporários da função ocupam fp + 0, fp + 1, ... (reservados com 'pushn').
+
+    def _generate_function_decl(self, node):
+        self._generate_subprogram(node.children[0].leaf, node.children[1], node.children[3])
+
+    def _generate_procedure_decl(self, node):
+        self._generate_subprogram(node.children[0].leaf, node.children[1], node.children[2])
+
+    def _generate_subprogram(self, name, param_list, block):
+        params = [id_node.leaf for param in param_list.children for id_node in param.children[0].children]
+        outer = (self.out, self.frame, self.free_temps, self.counter)
+
+        self.symtab.reenter_scope(name)
+        for i, param in enumerate(params):
+            self.symtab.lookup(param, current_scope_only=True).address = i - len(params)
+
+        # o corpo é gerado à parte: o tamanho do frame só é conhecido no fim
+        body = []
+        self.out = CodeStream(body, self.SECTIONS)
+        self.frame = {"name": name, "size": 0, "result": -len(params) - 1}
+        self.free_temps = []
+        self._generate_code(block)
+        self.out.finish()
+        size = self.frame["size"]
+
+        self.out, self.frame, self.free_temps, self.counter = outer
+        self.symtab.exit_scope()
+
+        self.out.emit("functions", f"{self._function_label(name)}:")
+        if size:
+            self.out.emit("functions", f"pushn {size}")
+        for line in body:
+            self.out.emit("functions", line)
+        self.out.emit("functions", "return")
+
+    def _function_label(self, name):
+        return f"FUNC_{name}"
+
+    def _generate_call(self, node):
+        """Chamada de uma função ou procedimento; uma função deixa o resultado no topo da pilha."""
+        name = node.children[0].leaf
+        args = node.children[1].children if len(node.children) > 1 else []
+        symbol = self.symtab.lookup(name)
+        is_function = symbol is not None and symbol.kind == 'function'
+        if is_function:
+            self.emit("pushi 0")  # espaço para o valor de retorno
+        for arg in args:
+            self._generate_code(arg)
+        self.emit(f"pusha {self._function_label(name)}")
+        self.emit("call")
+        return is_function, len(args)
+
+    def _generate_function_call(self, node):
+        _, count = self._generate_call(node)
+        if count:
+            self.emit(f"pop {count}")
+        # o valor de retorno está agora no topo da pilha
+
+    def _generate_procedure_call(self, node):
+        is_function, count = self._generate_call(node)
+        count += 1 if is_function else 0  # o resultado de uma função chamada como comando é descartado
+        if count:
+            self.emit(f"pop {count}")
+
     def _new_label(self, base):
         label = f"{base}{self.label_counter}"
         self.label_counter += 1
@@ -0,0 +1,115 @@
+"""
+Análises de fluxo de dados sobre o CFG da IR (src/ir.py), por Function.
+
+  - liveness: variáveis e temporários vivos à entrada e à saída de cada bloco;
+  - reaching_definitions: definições (bloco, índice) que chegam a cada bloco;
+  - dominators / immediate_dominators: dominadores de cada bloco.
+
+As análises só consideram os operandos explícitos das instruções: uma chamada não é tratada
+como uma leitura ou escrita das variáveis globais que o subprograma usa.
+"""
+from src.ir import Temp, Var
+
+
+def _is_value(operand):
+    return isinstance(operand, (Temp, Var))
+
+
+def uses(instr):
+    """Operandos (Temp ou Var) lidos pela instrução."""
+    return [arg for arg in instr.args if _is_value(arg)]
+
+
+def defs(instr):
+    """Operandos definidos pela instrução (o destino, se houver)."""
+    return [instr.dest] if _is_value(instr.dest) else []
+
+
+def block_use_def(block):
+    """(use, def) do bloco: valores lidos antes de serem definidos no bloco e valores definidos."""
+    use, define = set(), set()
+    for instr in block.instrs + [block.terminator]:
+        use.update(value for value in uses(instr) if value not in define)
+        define.update(defs(instr))
+    return use, define
+
+
+def liveness(function):
+    """Devolve (live_in, live_out): bloco -> conjunto de valores vivos."""
+    use_def = {block: block_use_def(block) for block in function.blocks}
+    live_in = {block: set() for block in function.blocks}
+    live_out = {block: set() for block in function.blocks}
+    changed = True
+    while changed:
+        changed = False
+        for block in reversed(function.blocks):
+            out = set().union(*(live_in[succ] for succ in block.succs))
+            use, define = use_def[block]
+            new_in = use | (out - define)
+            if out != live_out[block] or new_in != live_in[block]:
+                live_out[block], live_in[block] = out, new_in
+                changed = True
+    return live_in, live_out
+
+
+def reaching_definitions(function):
+    """
+    Devolve (reach_in, reach_out): bloco -> conjunto de definições (bloco, índice da instrução)
+    que chegam à entrada / saída do bloco.
+    """
+    definitions = {}  # valor -> todas as definições
+    for block in function.blocks:
+        for index, instr in enumerate(block.instrs):
+            for value in defs(instr):
+                definitions.setdefault(value, set()).add((block.label, index))
+
+    gen, kill = {}, {}
+    for block in function.blocks:
+        last = {}
+        for index, instr in enumerate(block.instrs):
+            for value in defs(instr):
+                last[value] = (block.label, index)
+        gen[block] = set(last.values())
+        kill[block] = set().union(*(definitions[value] for value in last)) - gen[block]
+
+    reach_in = {block: set() for block in function.blocks}
+    reach_out = {block: set(gen[block]) for block in function.blocks}
+    changed = True
+    while changed:
+        changed = False
+        for block in function.blocks:
+            new_in = set().union(*(reach_out[pred] for pred in block.preds))
+            new_out = gen[block] | (new_in - kill[block])
+            if new_in != reach_in[block] or new_out != reach_out[block]:
+                reach_in[block], reach_out[block] = new_in, new_out
+                changed = True
+    return reach_in, reach_out
+
+
+def dominators(function):
+    """Devolve bloco -> conjunto dos blocos que o dominam (incluindo o próprio)."""
+    blocks = set(function.blocks)
+    dom = {block: set(blocks) for block in function.blocks}
+    dom[function.entry] = {function.entry}
+    changed = True
+    while changed:
+        changed = False
+        for block in function.blocks:
+            if block is function.entry:
+                continue
+            new = set.intersection(*(dom[pred] for pred in block.preds)) | {block} if block.preds else {block}
+            if new != dom[block]:
+                dom[block] = new
+                changed = True
+    return dom
+
+
+def immediate_dominators(function):
+    """Devolve bloco -> dominador imediato (None para a entrada)."""
+    dom = dominators(function)
+    idom = {}
+    for block, dominated_by in dom.items():
+        strict = dominated_by - {block}
+        # o dominador imediato é o dominador estrito dominado por todos os outros
+        idom[block] = next((candidate for candidate in strict if strict <= dom[candidate]), None)
+    return idom
@@ -0,0 +1,508 @@
+"""
+Representação intermédia (IR) do compilador: um grafo de fluxo de controlo (CFG) por
+subprograma, com blocos básicos de instruções de três endereços.
+
+Os operandos são constantes (Const), variáveis do programa (Var, globais ou locais ao frame
+de uma função) e temporários virtuais (Temp), definidos uma única vez. Cada bloco termina numa
+instrução de controlo ('jump', 'branch', 'return' ou 'stop') e conhece os seus sucessores e
+predecessores. A AST é convertida para a IR com Lowering; ir_codegen.py gera o código EWVM a
+partir da IR e dataflow.py tem as análises (liveness, reaching definitions, dominadores).
+
+Instruções (dest = op args):
+    copy a                  cópia (dest é um Temp ou uma Var)
+    add/sub/.../or a, b     operações binárias, com o nome da instrução da VM
+    not/neg/atoi/atof a     operações unárias
+    addr A                  endereço da heap do array A
+    loadn base, i           elemento i (a contar de 0) do array
+    storen base, i, v       (sem dest) guarda v no elemento i do array
+    read                    lê uma linha do input
+    write a                 (sem dest) escreve a; extra é 'writei', 'writes' ou 'writef'
+    writeln                 (sem dest)
+    call a1, ..., ak        chama extra = (nome, é função?); dest recebe o valor de retorno
+Instruções de controlo:
+    jump                    extra = bloco destino
+    branch c                extra = (bloco se c != 0, bloco se c == 0)
+    return / stop
+"""
+
+BINARY_OPS = {
+    '+': 'add', '-': 'sub', '*': 'mul', 'div': 'div', '/': 'fdiv', 'mod': 'mod',
+    '=': 'equal', '<': 'inf', '<=': 'infeq', '>': 'sup', '>=': 'supeq', 'and': 'and', 'or': 'or',
+}
+
+TERMINATORS = ('jump', 'branch', 'return', 'stop')
+
+
+class Temp:
+    """Temporário virtual."""
+    def __init__(self, index):
+        self.index = index
+
+    def __repr__(self):
+        return f"t{self.index}"
+
+
+class Const:
+    def __init__(self, value, type='integer'):
+        self.value = value
+        self.type = type    # 'integer', 'real' ou 'string'
+
+    def __repr__(self):
+        return f'"{self.value}"' if self.type == 'string' else str(self.value)
+
+
+class Var:
+    """
+    Variável do programa. kind é 'variable', 'array', 'parameter' ou 'result' (o valor de
+    retorno da função); as variáveis locais, parâmetros e resultado têm local=True.
+    """
+    def __init__(self, name, local=False, kind='variable', size=1):
+        self.name = name
+        self.local = local
+        self.kind = kind
+        self.size = size
+
+    def __eq__(self, other):
+        return isinstance(other, Var) and (self.name, self.local) == (other.name, other.local)
+
+    def __hash__(self):
+        return hash((self.name, self.local))
+
+    def __repr__(self):
+        return f"%{self.name}" if self.local else self.name
+
+
+class Instr:
+    def __init__(self, op, dest=None, args=(), extra=None):
+        self.op = op
+        self.dest = dest
+        self.args = list(args)
+        self.extra = extra
+
+    def __repr__(self):
+        if self.op == 'jump':
+            return f"jump {self.extra.label}"
+        if self.op == 'branch':
+            return f"branch {self.args[0]}, {self.extra[0].label}, {self.extra[1].label}"
+        text = self.op
+        if self.op == 'call':
+            text = f"call {self.extra[0]}"
+        elif self.op == 'write':
+            text = self.extra
+        if self.args:
+            text += " " + ", ".join(repr(arg) for arg in self.args)
+        return f"{self.dest!r} = {text}" if self.dest is not None else text
+
+
+class BasicBlock:
+    def __init__(self, label):
+        self.label = label
+        self.instrs = []
+        self.terminator = None
+        self.succs = []
+        self.preds = []
+
+    def __repr__(self):
+        return f"BasicBlock({self.label})"
+
+
+class Function:
+    """CFG de um subprograma (ou do programa principal, com name None)."""
+    def __init__(self, name, params=(), is_function=False):
+        self.name = name
+        self.params = list(params)      # Vars dos parâmetros, pela ordem da declaração
+        self.is_function = is_function
+        self.locals = []                # Vars locais (inicializadas a zero)
+        self.blocks = []                # pela ordem em que o código vai ser gerado
+        self.entry = None
+        self.temps = 0
+
+    def link(self):
+        """Calcula sucessores e predecessores e remove os blocos inalcançáveis a partir da entrada."""
+        for block in self.blocks:
+            term = block.terminator
+            if term.op == 'jump':
+                block.succs = [term.extra]
+            elif term.op == 'branch':
+                block.succs = list(dict.fromkeys(term.extra))
+            else:
+                block.succs = []
+        reachable = set()
+        stack = [self.entry]
+        while stack:
+            block = stack.pop()
+            if id(block) not in reachable:
+                reachable.add(id(block))
+                stack.extend(block.succs)
+        self.blocks = [block for block in self.blocks if id(block) in reachable]
+        for block in self.blocks:
+            block.preds = []
+        for block in self.blocks:
+            for succ in block.succs:
+                succ.preds.append(block)
+
+
+class Program:
+    def __init__(self, name):
+        self.name = name
+        self.globals = []               # Vars globais, pela ordem da declaração
+        self.main = None                # Function do programa principal
+        self.functions = []             # Functions dos subprogramas
+        self.errors = []
+
+    def dump(self, annotate=None):
+        """
+        Texto da IR. `annotate(function, block)` pode devolver uma linha extra por bloco
+        (por exemplo, o resultado de uma análise).
+        """
+        lines = [f"program {self.name}"]
+        if self.globals:
+            lines.append("globals " + ", ".join(
+                f"{var}[{var.size}]" if var.kind == 'array' else repr(var) for var in self.globals))
+        for function in [self.main] + self.functions:
+            lines.append("")
+            if function.name is None:
+                lines.append("main:")
+            else:
+                kind = "function" if function.is_function else "procedure"
+                lines.append(f"{kind} {function.name}({', '.join(map(repr, function.params))}):")
+                if function.locals:
+                    lines.append("  locals " + ", ".join(map(repr, function.locals)))
+            for block in function.blocks:
+                preds = ", ".join(pred.label for pred in block.preds) or "-"
+                lines.append(f"  {block.label}:    ; preds: {preds}")
+                if annotate:
+                    note = annotate(function, block)
+                    if note:
+                        lines.append(f"    ; {note}")
+                for instr in block.instrs + [block.terminator]:
+                    lines.append(f"    {instr!r}")
+        return "\n".join(lines)
+
+
+class Lowering:
+    """Converte a AST (já analisada semanticamente) para a IR."""
+
+    def __init__(self, symtab):
+        self.symtab = symtab
+        self.label_counter = 0
+        self.function = None    # Function em construção
+        self.block = None       # bloco atual
+        self.errors = []
+
+    def lower(self, ast):
+        program = Program(ast.leaf)
+        program.errors = self.errors
+        block = ast.children[0]
+        declarations, compound = block.children
+
+        for decl in declarations.children:
+            if decl.type == 'var_declarations':
+                program.globals.extend(self._declared_vars(decl, local=False))
+            elif decl.type in ('function_decl', 'procedure_decl'):
+                program.functions.append(self._lower_subprogram(decl))
+
+        program.main = self._begin_function(Function(None))
+        self._lower_statement(compound)
+        self._terminate(Instr('stop'))
+        program.main.link()
+        return program
+
+    # -- construção dos blocos -------------------------------------------------
+
+    def _new_block(self):
+        block = BasicBlock(f"L{self.label_counter}")
+        self.label_counter += 1
+        return block
+
+    def _begin_function(self, function):
+        self.function = function
+        function.entry = self._new_block()
+        self._start_block(function.entry)
+        return function
+
+    def _start_block(self, block):
+        """Passa a gerar instruções em `block` (o bloco anterior continua para ele se não tiver terminado)."""
+        if self.block is not None and self.block.terminator is None:
+            self.block.terminator = Instr('jump', extra=block)
+        self.function.blocks.append(block)
+        self.block = block
+
+    def _terminate(self, instr):
+        if self.block.terminator is None:
+            self.block.terminator = instr
+
+    def _emit(self, op, args=(), extra=None, dest=None):
+        if self.block.terminator is not None:
+            # código depois de um 'halt': fica num bloco inalcançável (removido por link())
+            self._start_block(self._new_block())
+        self.block.instrs.append(Instr(op, dest, args, extra))
+        return dest
+
+    def _temp(self):
+        self.function.temps += 1
+        return Temp(self.function.temps - 1)
+
+    def _value(self, op, args=(), extra=None):
+        """Emite uma instrução com um novo temporário como destino e devolve-o."""
+        return self._emit(op, args, extra, dest=self._temp())
+
+    # -- declarações e subprogramas --------------------------------------------
+
+    def _declared_vars(self, var_declarations, local):
+        variables = []
+        for decl in var_declarations.children:
+            for id_node in decl.children[0].children:
+                symbol = self.symtab.lookup(id_node.leaf)
+                if symbol is None:
+                    continue
+                if symbol.type == 'array':
+                    if local:
+                        self.errors.append(f"Erro: arrays locais não são suportados ('{symbol.name}')")
+                        continue
+                    variables.append(Var(symbol.name, False, 'array', symbol.size))
+                else:
+                    variables.append(Var(symbol.name, local))
+        return variables
+
+    def _lower_subprogram(self, decl):
+        name = decl.children[0].leaf
+        param_list = decl.children[1]
+        block = decl.children[-1]
+        params = [Var(id_node.leaf, True, 'parameter')
+                  for param in param_list.children for id_node in param.children[0].children]
+
+        self.symtab.reenter_scope(name)
+        outer = (self.function, self.block)
+        self.block = None
+        function = self._begin_function(Function(name, params, decl.type == 'function_decl'))
+        declarations, compound = block.children
+        for var_declarations in declarations.children:
+            function.locals.extend(self._declared_vars(var_declarations, local=True))
+        self._lower_statement(compound)
+        self._terminate(Instr('return'))
+        function.link()
+        self.function, self.block = outer
+        self.symtab.exit_scope()
+        return function
+
+    def _variable(self, name):
+        """Var correspondente a um nome usado no código."""
+        symbol = self.symtab.lookup(name)
+        if symbol is None:
+            self.errors.append(f"Erro: variável '{name}' não declarada")
+            return Var(name, self.function.name is not None, 'variable')  # o programa não chega ao codegen
+        function = self.function
+        if symbol.kind == 'function' and function.name == symbol.name:
+            return Var(name, True, 'result')
+        if symbol.scope != 'global':
+            return Var(name, True, 'parameter' if symbol.kind == 'parameter' else 'variable')
+        return Var(name, False, 'array' if symbol.type == 'array' else 'variable', symbol.size)
+
+    # -- comandos ----------------------------------------------------------------
+
+    def _lower_statement(self, node):
+        if node is None:
+            return
+        method = getattr(self, f"_lower_{node.type}", None)
+        if method is None:
+            self.errors.append(f"Erro: comando '{node.type}' não suportado pela IR")
+            return
+        method(node)
+
+    def _lower_compound(self, node):
+        for child in node.children:
+            self._lower_statement(child)
+
+    def _lower_statement_list(self, node):
+        for child in node.children:
+            self._lower_statement(child)
+
+    def _lower_assignment(self, node):
+        target, expr = node.children
+        if target.type == 'array_access':
+            base, index = self._element(target)
+            value = self._operand(expr)
+            self._emit('storen', [base, index, value])
+            return
+        var = self._variable(target.leaf)
+        value = self._operand(expr)
+        last = self.block.instrs[-1] if self.block.instrs else None
+        if isinstance(value, Temp) and last is not None and last.dest is value:
+            last.dest = var  # o resultado da expressão vai diretamente para a variável
+        else:
+            self._emit('copy', [value], dest=var)
+
+    def _lower_if(self, node):
+        then_block = self._new_block()
+        end_block = self._new_block()
+        else_block = self._new_block() if len(node.children) > 2 else end_block
+        self._condition(node.children[0], then_block, else_block)
+        self._start_block(then_block)
+        self._lower_statement(node.children[1])
+        self._terminate(Instr('jump', extra=end_block))
+        if else_block is not end_block:
+            self._start_block(else_block)
+            self._lower_statement(node.children[2])
+        self._start_block(end_block)
+
+    def _lower_while(self, node):
+        header = self._new_block()
+        body = self._new_block()
+        end_block = self._new_block()
+        self._start_block(header)
+        self._condition(node.children[0], body, end_block)
+        self._start_block(body)
+        self._lower_statement(node.children[1])
+        self._terminate(Instr('jump', extra=header))
+        self._start_block(end_block)
+
+    def _lower_for(self, node):
+        var = self._variable(node.children[0].leaf)
+        step, compare = (1, 'sup') if node.leaf == 'to' else (-1, 'inf')
+        header = self._new_block()
+        body = self._new_block()
+        end_block = self._new_block()
+
+        self._emit('copy', [self._operand(node.children[1])], dest=var)
+        final = self._operand(node.children[2])
+        if not isinstance(final, Const):
+            final = self._value('copy', [final])  # o valor final é calculado uma só vez
+        self._start_block(header)
+        done = self._value(compare, [var, final])
+        self._terminate(Instr('branch', args=[done], extra=(end_block, body)))
+        self._start_block(body)
+        self._lower_statement(node.children[3])
+        self._emit('add', [var, Const(step)], dest=var)
+        self._terminate(Instr('jump', extra=header))
+        self._start_block(end_block)
+
+    def _lower_writeln(self, node):
+        self._lower_write(node)
+        self._emit('writeln')
+
+    def _lower_write(self, node):
+        if not node.children:
+            return
+        for expr in node.children[0].children:
+            if expr.type == 'formatted_output':
+                kind = 'writef' if self._type(expr.children[0]) == 'real' else 'writei'
+                self._emit('write', [self._operand(expr.children[0])], kind)
+            else:
+                kind = {'string': 'writes', 'real': 'writef'}.get(expr.type, 'writei')
+                self._emit('write', [self._operand(expr)], kind)
+
+    def _lower_readln(self, node):
+        for var_node in node.children:
+            if var_node.type == 'array_access':
+                base, index = self._element(var_node)
+                value = self._value('atoi', [self._value('read')])
+                self._emit('storen', [base, index, value])
+            elif var_node.type == 'variable':
+                convert = 'atof' if self._type(var_node) == 'real' else 'atoi'
+                self._emit(convert, [self._value('read')], dest=self._variable(var_node.leaf))
+
+    def _lower_procedure_call(self, node):
+        self._call(node, result=False)
+
+    def _lower_halt(self, node):
+        self._terminate(Instr('stop'))
+
+    # -- condições ---------------------------------------------------------------
+
+    def _condition(self, node, true_block, false_block):
+        """Termina o bloco atual com saltos para true_block/false_block ('and'/'or' em curto-circuito)."""
+        op = node.leaf.lower() if node.type in ('binary_op', 'unary_op') else None
+        if node.type == 'binary_op' and op in ('and', 'or'):
+            middle = self._new_block()
+            if op == 'and':
+                self._condition(node.children[0], middle, false_block)
+            else:
+                self._condition(node.children[0], true_block, middle)
+            self._start_block(middle)
+            self._condition(node.children[1], true_block, false_block)
+        elif node.type == 'unary_op' and op == 'not':
+            self._condition(node.children[0], false_block, true_block)
+        elif node.type == 'binary_op' and op == '<>':
+            equal = self._binary('equal', node.children[0], node.children[1])
+            self._terminate(Instr('branch', args=[equal], extra=(false_block, true_block)))
+        else:
+            value = self._operand(node)
+            if not isinstance(value, Temp):
+                value = self._value('copy', [value])
+            self._terminate(Instr('branch', args=[value], extra=(true_block, false_block)))
+
+    # -- expressões --------------------------------------------------------------
+
+    def _is_leaf(self, node):
+        return node.type in ('integer', 'real', 'string', 'boolean', 'variable')
+
+    def _type(self, node):
+        if node.type in ('variable', 'array_access'):
+            symbol = self.symtab.lookup(node.leaf)
+            if symbol is not None:
+                return symbol.element_type if symbol.type == 'array' else symbol.type
+        return node.type
+
+    def _operand(self, node, force_temp=False):
+        """
+        Operando com o valor da expressão: uma constante, uma variável ou o temporário com o
+        resultado das instruções emitidas. Com force_temp o valor é sempre copiado para um
+        temporário (para ficar calculado antes das instruções que se seguem).
+        """
+        if node.type in ('integer', 'real', 'string', 'boolean'):
+            if node.type == 'boolean':
+                value = Const(1 if node.leaf == 'true' else 0)
+            else:
+                value = Const(node.leaf, node.type)
+        elif node.type == 'variable':
+            value = self._variable(node.leaf)
+        elif node.type == 'binary_op':
+            op = node.leaf.lower()
+            if op == '<>':
+                return self._value('not', [self._binary('equal', *node.children)])
+            return self._binary(BINARY_OPS[op], *node.children)
+        elif node.type == 'unary_op':
+            op = 'not' if node.leaf.lower() == 'not' else 'neg'
+            return self._value(op, [self._operand(node.children[0])])
+        elif node.type == 'array_access':
+            return self._value('loadn', self._element(node))
+        elif node.type == 'function_call':
+            return self._call(node, result=True)
+        elif node.type == 'formatted_output':
+            return self._operand(node.children[0], force_temp)
+        else:
+            self.errors.append(f"Erro: expressão '{node.type}' não suportada pela IR")
+            value = Const(0)
+        return self._value('copy', [value]) if force_temp else value
+
+    def _binary(self, op, left, right):
+        # se o operando direito gerar instruções, o esquerdo é calculado antes delas
+        a = self._operand(left, force_temp=not self._is_leaf(right))
+        b = self._operand(right)
+        return self._value(op, [a, b])
+
+    def _element(self, node):
+        """(endereço do array, índice a contar de 0) de um acesso a um elemento."""
+        symbol = self.symtab.lookup(node.leaf)
+        base = self._value('addr', [self._variable(node.leaf)])
+        index = self._operand(node.children[0])
+        lower = symbol.dimensions[0] if symbol.dimensions else 0
+        if lower:
+            index = self._value('sub', [index, Const(lower)])
+        return base, index
+
+    def _call(self, node, result):
+        name = node.children[0].leaf
+        args = node.children[1].children if len(node.children) > 1 else []
+        symbol = self.symtab.lookup(name)
+        is_function = symbol is not None and symbol.kind == 'function'
+        # os argumentos ficam em temporários, pela ordem em que são empilhados
+        values = [self._operand(arg, force_temp=True) for arg in args]
+        dest = self._temp() if result else None
+        return self._emit('call', values, (name, is_function), dest)
+
+
+def lower_program(ast, symtab):
+    """Constrói a IR (Program) de uma AST já analisada pelo SemanticAnalyzer."""
+    return Lowering(symtab).lower(ast)
@@ -0,0 +1,251 @@
+"""
+Gerador de código EWVM a partir da IR (src/ir.py).
+
+Os temporários usados uma única vez, no mesmo bloco onde são definidos, ficam na pilha da VM
+entre a definição e o uso (é o caso de quase todos os resultados intermédios das expressões).
+Os restantes são guardados em slots: globais no programa principal e locais ao frame nas
+funções. Dois temporários partilham um slot quando não estão vivos nos mesmos blocos (ver
+dataflow.liveness).
+
+O frame das funções segue a convenção do CodeGenerator: o chamador empilha o espaço do valor de
+retorno (funções) e os argumentos e faz 'pusha FUNC_nome; call'; os parâmetros ficam em fp - k
+.. fp - 1, o valor de retorno em fp - k - 1 e as variáveis locais e slots em fp + 0, fp + 1, ...
+"""
+from src.ir import Temp, Const, Var, Instr
+from src.dataflow import liveness, uses
+
+UNARY = {'not': ["not"], 'neg': ["pushi -1", "mul"], 'atoi': ["atoi"], 'atof': ["atof"]}
+BINARY = ('add', 'sub', 'mul', 'div', 'fdiv', 'mod', 'equal', 'inf', 'infeq', 'sup', 'supeq', 'and', 'or')
+
+
+class IRCodeGenerator:
+    def __init__(self, program):
+        self.program = program
+        self.code = []
+
+    def generate(self):
+        """Devolve a lista de linhas de código VM do programa."""
+        program = self.program
+        lines = []
+        self.global_slots = len(program.globals)
+        self.addresses = {var: address for address, var in enumerate(program.globals)}
+        for address, var in enumerate(program.globals):
+            if var.kind == 'array':
+                lines.extend([f"pushi {var.size}", "allocn", f"storeg {address}"])
+            else:
+                lines.extend(["pushi 0", f"storeg {address}"])
+
+        lines.append("start")
+        lines.extend(self._function(program.main))
+        for function in program.functions:
+            lines.extend(self._function(function))
+
+        # só ficam as labels que são destino de algum salto ou chamada
+        targets = {line.split()[1] for line in lines if line.split()[0] in ("jump", "jz", "jnz", "pusha")}
+        return [line for line in lines if not line.endswith(":") or line[:-1] in targets]
+
+    # -- funções -------------------------------------------------------------------
+
+    def _function(self, function):
+        self.function = function
+        self.local = function.name is not None
+        if self.local:
+            k = len(function.params)
+            self.addresses = {var: var_addr for var, var_addr in self.addresses.items() if not var.local}
+            self.addresses.update((param, i - k) for i, param in enumerate(function.params))
+            self.addresses[Var(function.name, True, 'result')] = -k - 1
+            self.addresses.update((var, i) for i, var in enumerate(function.locals))
+            self.frame_size = len(function.locals)
+
+        self._analyze(function)
+        self.slots = {}         # temporário -> slot
+        self.slot_blocks = []   # slot -> blocos onde algum dos seus temporários está vivo
+        self.code = []
+        for position, block in enumerate(function.blocks):
+            following = function.blocks[position + 1] if position + 1 < len(function.blocks) else None
+            self._block(block, following)
+
+        if not self.local:
+            return self.code
+        header = [f"FUNC_{function.name}:"]
+        if self.frame_size:
+            header.append(f"pushn {self.frame_size}")
+        return header + self.code
+
+    def _analyze(self, function):
+        """Classifica os temporários (pilha ou slot) e calcula onde cada chamada reserva o valor de retorno."""
+        live_in, live_out = liveness(function)
+        definition = {}     # temporário -> (bloco, índice)
+        use_sites = {}      # temporário -> [(bloco, índice)]
+        for block in function.blocks:
+            for index, instr in enumerate(block.instrs + [block.terminator]):
+                if isinstance(instr.dest, Temp):
+                    definition[instr.dest] = (block, index)
+                for arg in uses(instr):
+                    if isinstance(arg, Temp):
+                        use_sites.setdefault(arg, []).append((block, index))
+
+        self.stack_temps = set()
+        for temp, (block, index) in definition.items():
+            sites = use_sites.get(temp, [])
+            if len(sites) == 1 and sites[0][0] is block and sites[0][1] > index:
+                self.stack_temps.add(temp)
+
+        # blocos onde cada temporário está vivo (para partilhar slots)
+        self.temp_blocks = {}
+        for temp, (block, _) in definition.items():
+            blocks = {id(block)} | {id(site_block) for site_block, _ in use_sites.get(temp, [])}
+            blocks |= {id(b) for b in function.blocks if temp in live_in[b] or temp in live_out[b]}
+            self.temp_blocks[temp] = blocks
+
+        # uma função com argumentos na pilha precisa do espaço do valor de retorno por baixo deles:
+        # 'pushi 0' é emitido antes da primeira instrução que calcula o primeiro argumento
+        self.reserve = {}
+        for block in function.blocks:
+            instrs = block.instrs
+            start = {}
+            for index, instr in enumerate(instrs):
+                if isinstance(instr.dest, Temp):
+                    start[instr.dest] = min([index] + [start[arg] for arg in instr.args
+                                                       if arg in self.stack_temps and arg in start])
+                if instr.op == 'call' and instr.extra[1] and instr.args and instr.args[0] in self.stack_temps:
+                    self.reserve.setdefault((id(block), start[instr.args[0]]), []).append(instr)
+
+    # -- blocos e instruções ---------------------------------------------------------
+
+    def _block(self, block, following):
+        self.emit(f"{block.label}:")
+        self.pending = []   # temporários (e reservas de valores de retorno) na pilha da VM
+        for index, instr in enumerate(block.instrs):
+            for call in self.reserve.get((id(block), index), []):
+                self.emit("pushi 0")
+                self.pending.append(call)
+            self._instr(instr)
+
+        term = block.terminator
+        if term.op == 'jump':
+            self._spill()
+            if term.extra is not following:
+                self.emit(f"jump {term.extra.label}")
+        elif term.op == 'branch':
+            true_block, false_block = term.extra
+            self._push_args(term.args)
+            if true_block is following:
+                self.emit(f"jz {false_block.label}")
+            elif false_block is following:
+                self.emit(f"jnz {true_block.label}")
+            else:
+                self.emit(f"jz {false_block.label}")
+                self.emit(f"jump {true_block.label}")
+        else:
+            self._spill()
+            self.emit(term.op)
+
+    def _instr(self, instr):
+        op = instr.op
+        if op == 'copy':
+            self._push_args(instr.args)
+        elif op in BINARY:
+            self._push_args(instr.args)
+            self.emit(op)
+        elif op in UNARY:
+            self._push_args(instr.args)
+            for line in UNARY[op]:
+                self.emit(line)
+        elif op == 'addr':
+            self.emit(f"pushst {self.addresses[instr.args[0]]}")
+        elif op in ('loadn', 'storen'):
+            self._push_args(instr.args)
+            self.emit(op)
+        elif op == 'read':
+            self.emit("read")
+        elif op == 'write':
+            self._push_args(instr.args)
+            self.emit(instr.extra)
+        elif op == 'writeln':
+            self.emit("writeln")
+        elif op == 'call':
+            name, is_function = instr.extra
+            self._push_args(instr.args, instr if is_function else None)
+            self.emit(f"pusha FUNC_{name}")
+            self.emit("call")
+            count = len(instr.args) + (1 if is_function and instr.dest is None else 0)
+            if count:
+                self.emit(f"pop {count}")
+        self._result(instr.dest)
+
+    def _push_args(self, args, reserved=None):
+        """Deixa os operandos no topo da pilha, pela ordem; `reserved` é a chamada cujo valor de retorno vai por baixo."""
+        expected = ([reserved] if reserved is not None else []) + list(args)
+        pending = self.pending
+        # quantos dos primeiros operandos já estão no topo da pilha
+        k = len(expected)
+        while k and not (len(pending) >= k and all(a is b for a, b in zip(pending[len(pending) - k:], expected))):
+            k -= 1
+        rest = expected[k:]
+        if any(isinstance(arg, (Temp, Instr)) and any(arg is item for item in pending) for arg in rest):
+            self._spill()
+            rest = expected
+        else:
+            del pending[len(pending) - k:]
+        for arg in rest:
+            self._push(arg)
+
+    def _push(self, arg):
+        if isinstance(arg, Const):
+            if arg.type == 'string':
+                self.emit(f"pushs \"{arg.value}\"")
+            else:
+                self.emit(f"{'pushf' if arg.type == 'real' else 'pushi'} {arg.value}")
+        elif isinstance(arg, Var):
+            self.emit(f"{'pushl' if arg.local else 'pushg'} {self.addresses[arg]}")
+        elif isinstance(arg, Temp):
+            self.emit(f"{'pushl' if self.local else 'pushg'} {self._slot(arg)}")
+        else:
+            self.emit("pushi 0")  # espaço para o valor de retorno de uma chamada
+
+    def _result(self, dest):
+        if dest is None:
+            return
+        if isinstance(dest, Var):
+            self.emit(f"{'storel' if dest.local else 'storeg'} {self.addresses[dest]}")
+        elif dest in self.stack_temps:
+            self.pending.append(dest)
+        else:
+            self._store_temp(dest)
+
+    def _spill(self):
+        """Guarda em slots os temporários que estão na pilha (e descarta as reservas)."""
+        for item in reversed(self.pending):
+            if isinstance(item, Temp):
+                self._store_temp(item)
+            else:
+                self.emit("pop 1")
+        self.pending = []
+
+    def _store_temp(self, temp):
+        self.emit(f"{'storel' if self.local else 'storeg'} {self._slot(temp)}")
+
+    def _slot(self, temp):
+        """Slot do temporário: reutiliza um slot cujos temporários não estão vivos nos mesmos blocos."""
+        if temp not in self.slots:
+            blocks = self.temp_blocks.get(temp, set())
+            slot = next((i for i, used in enumerate(self.slot_blocks) if not used & blocks), None)
+            if slot is None:
+                slot = len(self.slot_blocks)
+                self.slot_blocks.append(set())
+            self.slot_blocks[slot] |= blocks
+            self.slots[temp] = slot
+        slot = self.slots[temp]
+        if self.local:
+            self.frame_size = max(self.frame_size, len(self.function.locals) + slot + 1)
+            return len(self.function.locals) + slot
+        return self.global_slots + slot
+
+    def emit(self, line):
+        self.code.append(line)
+
+
+def generate_from_ir(program):
+    """Código VM (lista de linhas) de um Program da IR."""
+    return IRCodeGenerator(program).generate()
@@ -1,3 +1,4 @@
+import copy
 from src.analise_sintatica import Node
 
 def collect_used_variables(node, used_vars=None):
@@ -12,6 +13,8 @@ def collect_used_variables(node, used_vars=None):
     elif node.type == 'assignment':
         if node.children[0].type == 'variable':
             used_vars.add(node.children[0].leaf)
+    elif node.type == 'for':
+        used_vars.add(node.children[0].leaf)  # o contador é atribuído mesmo sem ser lido no corpo
 
     for child in node.children:
         collect_used_variables(child, used_vars)
@@ -46,3 +49,422 @@ def prune_unused_var_declarations(node, used_vars):
     # Recursivamente percorre a árvore
     for child in node.children:
         prune_unused_var_declarations(child, used_vars)
+
+
+# ---------------------------------------------------------------------------
+# Cálculo de constantes (constant folding) e propagação de constantes
+# ---------------------------------------------------------------------------
+# Só são calculadas expressões inteiras e booleanas: '/' produz sempre um real e os reais
+# continuam a ser calculados pela VM. 'div' e 'mod' só são calculados com operandos não
+# negativos, onde a semântica do Pascal (truncar) e a da VM (arredondar para baixo) coincidem.
+
+def _constant_value(node):
+    """Valor Python de um literal inteiro ou booleano, ou None se o nó não for uma dessas constantes."""
+    if node is None:
+        return None
+    if node.type == 'integer':
+        return node.leaf
+    if node.type == 'boolean':
+        return node.leaf == 'true'
+    return None
+
+
+def _constant_node(value):
+    if isinstance(value, bool):
+        return Node('boolean', leaf='true' if value else 'false')
+    return Node('integer', leaf=value)
+
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _fold_binary(op, a, b):
+    """Resultado de `a op b` se puder ser calculado em tempo de compilação, ou None."""
+    if _is_int(a) and _is_int(b):
+        if op == '+':
+            return a + b
+        if op == '-':
+            return a - b
+        if op == '*':
+            return a * b
+        if op in ('div', 'mod') and a >= 0 and b > 0:
+            return a // b if op == 'div' else a % b
+        comparisons = {'=': a == b, '<>': a != b, '<': a < b, '<=': a <= b, '>': a > b, '>=': a >= b}
+        return comparisons.get(op)
+    if isinstance(a, bool) and isinstance(b, bool):
+        logical = {'and': a and b, 'or': a or b, '=': a == b, '<>': a != b}
+        return logical.get(op)
+    return None
+
+
+def fold_expression(node, constants=None):
+    """
+    Calcula as subexpressões constantes de uma expressão, substituindo as variáveis com valor
+    conhecido (dicionário `constants`). Devolve o novo nó.
+    Os índices de arrays não são alterados: o gerador de código espera lá a variável do ciclo.
+    """
+    if node is None:
+        return None
+    if node.type == 'variable':
+        if constants and node.leaf in constants:
+            return _constant_node(constants[node.leaf])
+        return node
+    if node.type in ('array_access', 'formatted_output', 'function_call'):
+        return node
+
+    node.children = [fold_expression(child, constants) for child in node.children]
+    if node.type == 'binary_op':
+        value = _fold_binary(node.leaf.lower(), *(_constant_value(child) for child in node.children))
+        if value is not None:
+            return _constant_node(value)
+    elif node.type == 'unary_op':
+        value = _constant_value(node.children[0])
+        if node.leaf == 'not' and isinstance(value, bool):
+            return _constant_node(not value)
+        if node.leaf == '-' and _is_int(value):
+            return _constant_node(-value)
+    return node
+
+
+def assigned_variables(node, names=None):
+    """Nomes das variáveis escalares que podem ser alteradas dentro de `node`."""
+    if names is None:
+        names = set()
+    if node is None:
+        return names
+    if node.type == 'assignment' and node.children[0].type == 'variable':
+        names.add(node.children[0].leaf)
+    elif node.type == 'for':
+        names.add(node.children[0].leaf)
+    elif node.type == 'readln':
+        names.update(child.leaf for child in node.children if child.type == 'variable')
+    for child in node.children:
+        assigned_variables(child, names)
+    return names
+
+
+def _calls_subprogram(node):
+    if node is None:
+        return False
+    if node.type in ('procedure_call', 'function_call'):
+        return True
+    return any(_calls_subprogram(child) for child in node.children)
+
+
+def propagate_constants(node, constants=None):
+    """
+    Propaga constantes pelo código em linha reta e calcula as expressões constantes.
+    `constants` (variável -> valor) é atualizado com o estado no fim do nó.
+    Condições de if/while que ficam constantes eliminam o ramo morto.
+    Devolve o novo nó (None se o comando desaparecer).
+    """
+    if constants is None:
+        constants = {}
+    if node is None:
+        return None
+
+    if node.type in ('program', 'block', 'compound', 'statement_list'):
+        children = [propagate_constants(child, constants) for child in node.children]
+        if node.type == 'statement_list':
+            children = [child for child in children if child is not None]
+        node.children = children
+        return node
+
+    if node.type in ('declarations', 'var_declarations', 'function_decl', 'procedure_decl'):
+        return node
+
+    if _calls_subprogram(node):
+        # um subprograma pode alterar qualquer variável global
+        constants.clear()
+        return node
+
+    if node.type == 'assignment':
+        target, expr = node.children
+        node.children[1] = fold_expression(expr, constants)
+        if target.type == 'variable':
+            value = _constant_value(node.children[1])
+            if value is None:
+                constants.pop(target.leaf, None)
+            else:
+                constants[target.leaf] = value
+        return node
+
+    if node.type == 'if':
+        node.children[0] = fold_expression(node.children[0], constants)
+        condition = _constant_value(node.children[0])
+        if isinstance(condition, bool):
+            branch = node.children[1] if condition else (node.children[2] if len(node.children) > 2 else None)
+            return propagate_constants(branch, constants)
+        changed = set()
+        for i in range(1, len(node.children)):
+            changed |= assigned_variables(node.children[i])
+            node.children[i] = propagate_constants(node.children[i], dict(constants))
+        for name in changed:
+            constants.pop(name, None)
+        return node
+
+    if node.type == 'while':
+        for name in assigned_variables(node.children[1]):
+            constants.pop(name, None)
+        node.children[0] = fold_expression(node.children[0], constants)
+        if _constant_value(node.children[0]) is False:
+            return None
+        node.children[1] = propagate_constants(node.children[1], dict(constants))
+        return node
+
+    if node.type == 'for':
+        node.children[1] = fold_expression(node.children[1], constants)
+        node.children[2] = fold_expression(node.children[2], constants)
+        for name in assigned_variables(node):
+            constants.pop(name, None)
+        node.children[3] = propagate_constants(node.children[3], dict(constants))
+        return node
+
+    if node.type == 'readln':
+        for name in assigned_variables(node):
+            constants.pop(name, None)
+        return node
+
+    if node.type in ('writeln', 'write') and node.children:
+        node.children[0].children = [fold_expression(expr, constants) for expr in node.children[0].children]
+    return node
+
+
+# ---------------------------------------------------------------------------
+# Expressões invariantes de ciclos (usadas pelo CodeGenerator para as calcular antes do ciclo)
+# ---------------------------------------------------------------------------
+
+def _is_invariant(node, assigned):
+    if node.type in ('integer', 'real', 'string', 'boolean'):
+        return True
+    if node.type == 'variable':
+        return node.leaf not in assigned
+    if node.type == 'binary_op':
+        if node.leaf.lower() in ('div', 'mod', '/'):
+            # calcular antes do ciclo não pode introduzir uma divisão por zero
+            divisor = node.children[1]
+            if divisor.type not in ('integer', 'real') or divisor.leaf == 0:
+                return False
+        return all(_is_invariant(child, assigned) for child in node.children)
+    if node.type == 'unary_op':
+        return _is_invariant(node.children[0], assigned)
+    return False
+
+
+def loop_invariants(parts, assigned, opaque=()):
+    """
+    Subexpressões invariantes maximais das partes de um ciclo (condição e/ou corpo): operações
+    cujas variáveis não estão em `assigned` (as variáveis que o ciclo altera). Não entram acessos
+    a arrays, chamadas de funções nem divisões por um divisor que não seja uma constante não nula.
+    Se o ciclo chamar um subprograma nada é calculado antes (pode alterar qualquer variável global).
+    Os nós em `opaque` (já calculados antes de um ciclo exterior) são tratados como folhas.
+    """
+    if any(_calls_subprogram(part) for part in parts):
+        return []
+    found = []
+
+    def visit(node):
+        if node is None or id(node) in opaque or node.type in ('array_access', 'function_call', 'formatted_output'):
+            return
+        if node.type in ('binary_op', 'unary_op') and _is_invariant(node, assigned):
+            found.append(node)
+            return
+        for child in node.children:
+            visit(child)
+
+    for part in parts:
+        visit(part)
+    return found
+
+
+# ---------------------------------------------------------------------------
+# Subexpressões comuns em blocos básicos (usadas pelo CodeGenerator com otimização)
+# ---------------------------------------------------------------------------
+
+def is_straight_line(statement):
+    """Comandos sem saltos nem chamadas, que podem fazer parte de um bloco básico."""
+    return statement is not None and statement.type in ('assignment', 'write', 'writeln', 'readln') \
+        and not _calls_subprogram(statement)
+
+
+def common_subexpressions(statements, opaque=()):
+    """
+    Numeração de valores sobre uma sequência de comandos em linha reta.
+    Cada expressão pura (operação ou leitura de array) recebe uma chave que depende da versão
+    das variáveis e arrays que usa; uma atribuição cria uma nova versão da variável (ou do array)
+    e invalida assim as expressões anteriores que a usavam.
+    Devolve (first, reuse): id(nó) -> chave, para a primeira ocorrência de cada valor que se repete
+    (cujo resultado deve ser guardado) e para as ocorrências seguintes (que o podem reutilizar).
+    Os nós em `opaque` (por exemplo, já calculados antes do ciclo) são tratados como folhas.
+    """
+    versions = {}      # variável ou array -> versão atual
+    first_node = {}    # chave -> primeira ocorrência
+    reuse = {}
+
+    def value_key(node):
+        """Chave do valor de uma expressão (None se não for pura)."""
+        if id(node) in opaque:
+            return ('opaque', id(node))
+        if node.type in ('integer', 'real', 'string', 'boolean'):
+            return (node.type, node.leaf)
+        if node.type == 'variable':
+            return ('var', node.leaf, versions.get(node.leaf, 0))
+        if node.type == 'array_access':
+            index = value_key(node.children[0])
+            return None if index is None else ('array', node.leaf, versions.get(('array', node.leaf), 0), index)
+        if node.type in ('binary_op', 'unary_op'):
+            operands = tuple(value_key(child) for child in node.children)
+            return None if None in operands else (node.type, node.leaf.lower()) + operands
+        return None
+
+    def visit(node):
+        if node is None or id(node) in opaque:
+            return
+        if node.type in ('binary_op', 'unary_op', 'array_access'):
+            value = value_key(node)
+            if value is not None:
+                if value in first_node:
+                    reuse[id(node)] = value
+                    return  # os operandos não vão ser gerados
+                first_node[value] = node
+            if node.type == 'array_access':
+                return  # o índice é gerado à parte pelo CodeGenerator
+        for child in node.children:
+            visit(child)
+
+    for statement in statements:
+        if statement.type == 'assignment':
+            target, expr = statement.children
+            visit(expr)
+            name = target.leaf if target.type == 'variable' else ('array', target.leaf)
+            versions[name] = versions.get(name, 0) + 1
+        elif statement.type == 'readln':
+            for target in statement.children:
+                name = target.leaf if target.type == 'variable' else ('array', target.leaf)
+                versions[name] = versions.get(name, 0) + 1
+        elif statement.children:
+            for expr in statement.children[0].children:
+                visit(expr)
+
+    reused = set(reuse.values())
+    first = {id(node): value for value, node in first_node.items() if value in reused}
+    return first, reuse
+
+
+# ---------------------------------------------------------------------------
+# Expansão de funções pequenas no local da chamada (inlining)
+# ---------------------------------------------------------------------------
+
+# número máximo de nós da expressão de uma função para ser expandida
+INLINE_LIMIT = 16
+
+
+def _node_count(node):
+    return 1 + sum(_node_count(child) for child in node.children)
+
+
+def _variable_uses(node, counts):
+    if node.type == 'variable':
+        counts[node.leaf] = counts.get(node.leaf, 0) + 1
+    for child in node.children:
+        _variable_uses(child, counts)
+    return counts
+
+
+def _is_pure_expression(node, params):
+    """Expressão só com literais, parâmetros e operadores (sem chamadas, arrays nem globais)."""
+    if node.type in ('integer', 'real', 'string', 'boolean'):
+        return True
+    if node.type == 'variable':
+        return node.leaf in params
+    if node.type in ('binary_op', 'unary_op'):
+        return all(_is_pure_expression(child, params) for child in node.children)
+    return False
+
+
+def _inline_candidate(decl):
+    """
+    (parâmetros, expressão) de uma função cujo corpo é só 'F := expressão', com uma expressão
+    pura e pequena (no máximo INLINE_LIMIT nós), ou None. Uma função destas não é recursiva.
+    """
+    name, param_list, _, block = decl.children
+    declarations, compound = block.children
+    if declarations.children:
+        return None
+    statements = compound.children[0].children
+    if len(statements) != 1 or statements[0].type != 'assignment':
+        return None
+    target, expr = statements[0].children
+    params = [id_node.leaf for param in param_list.children for id_node in param.children[0].children]
+    if target.type != 'variable' or target.leaf != name.leaf or len(set(params)) != len(params):
+        return None
+    if not _is_pure_expression(expr, params) or _node_count(expr) > INLINE_LIMIT:
+        return None
+    return params, expr
+
+
+def _substitute(node, values):
+    """Cópia da expressão com cada parâmetro substituído pelo argumento correspondente."""
+    if node.type == 'variable' and node.leaf in values:
+        return copy.deepcopy(values[node.leaf])
+    return Node(node.type, [_substitute(child, values) for child in node.children], node.leaf)
+
+
+def _expand_call(call, candidates):
+    """Expressão que substitui a chamada, ou None se não puder ser expandida."""
+    name = call.children[0].leaf
+    if name not in candidates:
+        return None
+    params, expr = candidates[name]
+    args = call.children[1].children if len(call.children) > 1 else []
+    if len(args) != len(params) or any(_calls_subprogram(arg) for arg in args):
+        return None
+    uses = _variable_uses(expr, {})
+    for param, arg in zip(params, args):
+        # um argumento usado várias vezes só é copiado se for um literal ou uma variável
+        if uses.get(param, 0) > 1 and arg.type not in ('integer', 'real', 'string', 'boolean', 'variable'):
+            return None
+    return _substitute(expr, dict(zip(params, args)))
+
+
+def _inline_calls(node, candidates, remaining):
+    """Expande as chamadas em `node`; conta em `remaining` as chamadas que ficam por expandir."""
+    for i, child in enumerate(node.children):
+        if child is None:
+            continue
+        _inline_calls(child, candidates, remaining)
+        if child.type == 'function_call':
+            expanded = _expand_call(child, candidates)
+            if expanded is not None:
+                node.children[i] = expanded
+                continue
+        if child.type in ('function_call', 'procedure_call'):
+            name = child.children[0].leaf
+            remaining[name] = remaining.get(name, 0) + 1
+
+
+def inline_functions(ast):
+    """
+    Expande no local da chamada as funções pequenas e não recursivas (ver _inline_candidate),
+    substituindo os parâmetros pelos argumentos. As funções expandidas que deixam de ser
+    chamadas são removidas. Devolve a AST.
+    """
+    if ast is None:
+        return ast
+    declarations = ast.children[0].children[0]
+    candidates = {}
+    for decl in declarations.children:
+        if decl.type == 'function_decl':
+            candidate = _inline_candidate(decl)
+            if candidate is not None:
+                candidates[decl.children[0].leaf] = candidate
+    if not candidates:
+        return ast
+
+    remaining = {}
+    _inline_calls(ast, candidates, remaining)
+    declarations.children = [decl for decl in declarations.children
+                             if decl.type != 'function_decl' or decl.children[0].leaf not in candidates
+                             or remaining.get(decl.children[0].leaf)]
+    return ast
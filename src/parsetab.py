@@ -0,0 +1,125 @@
+
+# parsetab.py
+# This file is automatically generated. Do not edit.
+# pylint: disable=W,C,R
+_tabversion = '3.10'
+
+_lr_method = 'LALR'
+
+_lr_signature = 'AND APOSTROPHE ARRAY ASSIGN BEGIN BOOLEAN CASE CHAR_TYPE COLON COMMA COMMENT CONST DIV DIVIDE DO DOWNTO ELSE END EQ FALSE FILE FOR FUNCTION GE GOTO GT HALT ID IF IN INTEGER INTEGER_TYPE LABEL LBRACKET LE LPAREN LT MINUS MOD NEQ NIL NOT OF OR PACKED PERIOD PLUS PROCEDURE PROGRAM RBRACKET READ READLN REAL REAL_TYPE RECORD REPEAT RPAREN SEMICOLON SET STRING STRING_TYPE THEN TIMES TO TRUE TYPE UNTIL VAR WHILE WITH WRITE WRITELNprogram : PROGRAM ID SEMICOLON block PERIODblock : declarations compound_statementdeclarations : declaration_list\n                        | emptydeclaration_list : declaration_list declaration\n                            | declarationfunction_block : VAR var_declarations compound_statement\n                        | compound_statementdeclaration : VAR var_declarations\n                    | function_declaration\n                    | procedure_declarationvar_declarations : var_declarations var_declaration\n                           | var_declarationvar_declaration : id_list COLON type_spec SEMICOLONid_list : id_list COMMA ID\n                  | IDtype_spec : INTEGER_TYPE\n                     | REAL_TYPE\n                     | BOOLEAN\n                     | STRING_TYPE\n                     | CHAR_TYPE\n                     | array_typearray_type : ARRAY LBRACKET INTEGER PERIOD PERIOD INTEGER RBRACKET OF type_speccompound_statement : BEGIN statement_list ENDstatement_list : statement_list SEMICOLON statement\n                         | statementstatement : compound_statement\n                     | assignment_statement\n                     | if_statement\n                     | while_statement\n                     | for_statement\n                     | procedure_call_statement\n                     | halt_statement\n                     | emptyassignment_statement : variable ASSIGN expressionvariable : ID\n                | ID LBRACKET expression RBRACKETif_statement : IF expression THEN statement\n                        | IF expression THEN statement ELSE statementwhile_statement : WHILE expression DO statementfor_statement : FOR ID ASSIGN expression TO expression DO statement\n                        | FOR ID ASSIGN expression DOWNTO expression DO statementprocedure_call_statement : ID LPAREN expression_list RPAREN\n                                | ID LPAREN RPAREN\n                                | WRITELN LPAREN expression_list RPAREN\n                                | WRITELN LPAREN RPAREN\n                                | WRITE LPAREN expression_list RPAREN\n                                | WRITE LPAREN RPAREN\n                                | READLN LPAREN variable RPAREN\n                                | READLN LPAREN RPARENexpression_list : expression_list COMMA expression\n                       | expressionexpression : simple_expression\n                     | simple_expression relop simple_expressionrelop : EQ\n                | NEQ\n                | LT\n                | LE\n                | GT\n                | GE\n                | INsimple_expression : term\n                            | simple_expression addop termaddop : PLUS\n                | MINUS\n                | ORterm : factor\n                | term mulop factormulop : TIMES\n                | DIVIDE\n                | DIV\n                | MOD\n                | ANDfactor : variable\n                 | INTEGER\n                 | REAL\n                 | STRING\n                 | TRUE\n                 | FALSE\n                 | LPAREN expression RPAREN\n                 | NOT factor\n                 | function_callexpression : variable COLON INTEGER\n                    | variable COLON INTEGER COLON INTEGERfunction_call : ID LPAREN expression_list RPAREN\n                        | ID LPAREN RPARENfunction_declaration : FUNCTION ID LPAREN param_list RPAREN COLON type_spec SEMICOLON function_block SEMICOLON\n                                | FUNCTION ID COLON type_spec SEMICOLON function_block SEMICOLONprocedure_declaration : PROCEDURE ID LPAREN param_list RPAREN SEMICOLON function_block SEMICOLON\n                                 | PROCEDURE ID SEMICOLON function_block SEMICOLONparam_list : param_list SEMICOLON param\n                    | paramparam : id_list COLON type_spechalt_statement : HALT SEMICOLONempty :'
+    
+_lr_action_items = {'PROGRAM':([0,],[2,]),'$end':([1,15,],[0,-1,]),'ID':([2,10,13,14,17,19,20,36,37,38,44,46,47,49,52,53,65,66,70,71,72,73,74,91,95,96,97,98,99,100,101,102,103,104,105,106,107,109,110,111,112,113,114,115,119,120,132,135,140,152,164,167,168,181,182,],[3,22,23,24,39,22,-13,59,59,69,-12,84,22,22,39,59,59,59,59,59,59,59,131,22,39,59,59,-55,-56,-57,-58,-59,-60,-61,-64,-65,-66,59,-69,-70,-71,-72,-73,59,39,59,-14,22,22,59,39,59,59,39,39,]),'SEMICOLON':([3,17,24,25,26,27,28,29,30,31,32,33,34,43,51,52,55,56,57,58,59,60,61,62,63,64,67,75,76,77,78,79,80,81,82,85,86,88,89,90,92,93,94,95,117,118,119,122,126,128,130,138,141,142,143,144,145,147,148,149,151,153,154,155,156,159,160,161,163,164,166,171,173,174,175,181,182,184,185,186,190,],[4,-95,50,52,-26,-27,-28,-29,-30,-31,-32,-33,-34,75,-24,-95,-53,-74,-75,-62,-36,-67,-76,-77,-78,-79,-82,-94,132,-17,-18,-19,-20,-21,-22,135,-92,137,135,139,-8,-25,-35,-95,-81,-74,-95,-44,-46,-48,-50,162,-38,-54,-63,-83,-68,-86,-80,-40,-43,-37,-45,-47,-49,-91,-93,172,-7,-95,-85,179,180,-39,-84,-95,-95,188,-41,-42,-23,]),'BEGIN':([4,6,7,8,9,11,12,17,18,19,20,44,50,52,95,119,132,137,139,140,162,164,172,179,180,181,182,188,],[-95,17,-3,-4,-6,-10,-11,17,-5,-9,-13,-12,17,17,17,17,-14,17,-90,17,17,17,-88,17,-89,17,17,-87,]),'VAR':([4,7,9,11,12,18,19,20,44,50,132,137,139,162,172,179,180,188,],[10,10,-6,-10,-11,-5,-9,-13,-12,91,-14,91,-90,91,-88,91,-89,-87,]),'FUNCTION':([4,7,9,11,12,18,19,20,44,132,139,172,180,188,],[13,13,-6,-10,-11,-5,-9,-13,-12,-14,-90,-88,-89,-87,]),'PROCEDURE':([4,7,9,11,12,18,19,20,44,132,139,172,180,188,],[14,14,-6,-10,-11,-5,-9,-13,-12,-14,-90,-88,-89,-87,]),'PERIOD':([5,16,51,157,170,],[15,-2,-24,170,178,]),'IF':([17,52,95,119,164,181,182,],[36,36,36,36,36,36,36,]),'WHILE':([17,52,95,119,164,181,182,],[37,37,37,37,37,37,37,]),'FOR':([17,52,95,119,164,181,182,],[38,38,38,38,38,38,38,]),'WRITELN':([17,52,95,119,164,181,182,],[40,40,40,40,40,40,40,]),'WRITE':([17,52,95,119,164,181,182,],[41,41,41,41,41,41,41,]),'READLN':([17,52,95,119,164,181,182,],[42,42,42,42,42,42,42,]),'HALT':([17,52,95,119,164,181,182,],[43,43,43,43,43,43,43,]),'END':([17,25,26,27,28,29,30,31,32,33,34,51,52,55,56,57,58,59,60,61,62,63,64,67,75,93,94,95,117,118,119,122,126,128,130,141,142,143,144,145,147,148,149,151,153,154,155,156,164,166,174,175,181,182,185,186,],[-95,51,-26,-27,-28,-29,-30,-31,-32,-33,-34,-24,-95,-53,-74,-75,-62,-36,-67,-76,-77,-78,-79,-82,-94,-25,-35,-95,-81,-74,-95,-44,-46,-48,-50,-38,-54,-63,-83,-68,-86,-80,-40,-43,-37,-45,-47,-49,-95,-85,-39,-84,-95,-95,-41,-42,]),'COLON':([21,22,23,56,59,84,87,134,144,153,],[45,-16,48,108,-36,-15,136,158,165,-37,]),'COMMA':([21,22,55,56,57,58,59,60,61,62,63,64,67,84,87,117,118,121,123,125,127,142,143,144,145,146,147,148,153,166,169,175,],[46,-16,-53,-74,-75,-62,-36,-67,-76,-77,-78,-79,-82,-15,46,-81,-74,152,-52,152,152,-54,-63,-83,-68,152,-86,-80,-37,-85,-51,-84,]),'LPAREN':([23,24,36,37,39,40,41,42,53,59,65,66,70,71,72,73,96,97,98,99,100,101,102,103,104,105,106,107,109,110,111,112,113,114,115,120,152,167,168,],[47,49,65,65,70,72,73,74,65,115,65,65,65,65,65,65,65,65,-55,-56,-57,-58,-59,-60,-61,-64,-65,-66,65,-69,-70,-71,-72,-73,65,65,65,65,65,]),'ELSE':([27,28,29,30,31,32,33,34,51,55,56,57,58,59,60,61,62,63,64,67,75,94,95,117,118,119,122,126,128,130,141,142,143,144,145,147,148,149,151,153,154,155,156,164,166,174,175,181,182,185,186,],[-27,-28,-29,-30,-31,-32,-33,-34,-24,-53,-74,-75,-62,-36,-67,-76,-77,-78,-79,-82,-94,-35,-95,-81,-74,-95,-44,-46,-48,-50,164,-54,-63,-83,-68,-86,-80,-40,-43,-37,-45,-47,-49,-95,-85,-39,-84,-95,-95,-41,-42,]),'ASSIGN':([35,39,69,153,],[53,-36,120,-37,]),'INTEGER':([36,37,53,65,66,70,71,72,73,96,97,98,99,100,101,102,103,104,105,106,107,108,109,110,111,112,113,114,115,120,133,152,165,167,168,178,],[57,57,57,57,57,57,57,57,57,57,57,-55,-56,-57,-58,-59,-60,-61,-64,-65,-66,144,57,-69,-70,-71,-72,-73,57,57,157,57,175,57,57,183,]),'REAL':([36,37,53,65,66,70,71,72,73,96,97,98,99,100,101,102,103,104,105,106,107,109,110,111,112,113,114,115,120,152,167,168,],[61,61,61,61,61,61,61,61,61,61,61,-55,-56,-57,-58,-59,-60,-61,-64,-65,-66,61,-69,-70,-71,-72,-73,61,61,61,61,61,]),'STRING':([36,37,53,65,66,70,71,72,73,96,97,98,99,100,101,102,103,104,105,106,107,109,110,111,112,113,114,115,120,152,167,168,],[62,62,62,62,62,62,62,62,62,62,62,-55,-56,-57,-58,-59,-60,-61,-64,-65,-66,62,-69,-70,-71,-72,-73,62,62,62,62,62,]),'TRUE':([36,37,53,65,66,70,71,72,73,96,97,98,99,100,101,102,103,104,105,106,107,109,110,111,112,113,114,115,120,152,167,168,],[63,63,63,63,63,63,63,63,63,63,63,-55,-56,-57,-58,-59,-60,-61,-64,-65,-66,63,-69,-70,-71,-72,-73,63,63,63,63,63,]),'FALSE':([36,37,53,65,66,70,71,72,73,96,97,98,99,100,101,102,103,104,105,106,107,109,110,111,112,113,114,115,120,152,167,168,],[64,64,64,64,64,64,64,64,64,64,64,-55,-56,-57,-58,-59,-60,-61,-64,-65,-66,64,-69,-70,-71,-72,-73,64,64,64,64,64,]),'NOT':([36,37,53,65,66,70,71,72,73,96,97,98,99,100,101,102,103,104,105,106,107,109,110,111,112,113,114,115,120,152,167,168,],[66,66,66,66,66,66,66,66,66,66,66,-55,-56,-57,-58,-59,-60,-61,-64,-65,-66,66,-69,-70,-71,-72,-73,66,66,66,66,66,]),'LBRACKET':([39,59,83,131,],[71,71,133,71,]),'INTEGER_TYPE':([45,48,136,158,189,],[77,77,77,77,77,]),'REAL_TYPE':([45,48,136,158,189,],[78,78,78,78,78,]),'BOOLEAN':([45,48,136,158,189,],[79,79,79,79,79,]),'STRING_TYPE':([45,48,136,158,189,],[80,80,80,80,80,]),'CHAR_TYPE':([45,48,136,158,189,],[81,81,81,81,81,]),'ARRAY':([45,48,136,158,189,],[83,83,83,83,83,]),'THEN':([54,55,56,57,58,59,60,61,62,63,64,67,117,118,142,143,144,145,147,148,153,166,175,],[95,-53,-74,-75,-62,-36,-67,-76,-77,-78,-79,-82,-81,-74,-54,-63,-83,-68,-86,-80,-37,-85,-84,]),'DO':([55,56,57,58,59,60,61,62,63,64,67,68,117,118,142,143,144,145,147,148,153,166,175,176,177,],[-53,-74,-75,-62,-36,-67,-76,-77,-78,-79,-82,119,-81,-74,-54,-63,-83,-68,-86,-80,-37,-85,-84,181,182,]),'RPAREN':([55,56,57,58,59,60,61,62,63,64,67,70,72,73,74,77,78,79,80,81,82,85,86,89,115,116,117,118,121,123,125,127,129,131,142,143,144,145,146,147,148,153,159,160,166,169,175,190,],[-53,-74,-75,-62,-36,-67,-76,-77,-78,-79,-82,122,126,128,130,-17,-18,-19,-20,-21,-22,134,-92,138,147,148,-81,-74,151,-52,154,155,156,-36,-54,-63,-83,-68,166,-86,-80,-37,-91,-93,-85,-51,-84,-23,]),'RBRACKET':([55,56,57,58,59,60,61,62,63,64,67,117,118,124,142,143,144,145,147,148,153,166,175,183,],[-53,-74,-75,-62,-36,-67,-76,-77,-78,-79,-82,-81,-74,153,-54,-63,-83,-68,-86,-80,-37,-85,-84,187,]),'TO':([55,56,57,58,59,60,61,62,63,64,67,117,118,142,143,144,145,147,148,150,153,166,175,],[-53,-74,-75,-62,-36,-67,-76,-77,-78,-79,-82,-81,-74,-54,-63,-83,-68,-86,-80,167,-37,-85,-84,]),'DOWNTO':([55,56,57,58,59,60,61,62,63,64,67,117,118,142,143,144,145,147,148,150,153,166,175,],[-53,-74,-75,-62,-36,-67,-76,-77,-78,-79,-82,-81,-74,-54,-63,-83,-68,-86,-80,168,-37,-85,-84,]),'EQ':([55,56,57,58,59,60,61,62,63,64,67,117,118,143,145,147,148,153,166,],[98,-74,-75,-62,-36,-67,-76,-77,-78,-79,-82,-81,-74,-63,-68,-86,-80,-37,-85,]),'NEQ':([55,56,57,58,59,60,61,62,63,64,67,117,118,143,145,147,148,153,166,],[99,-74,-75,-62,-36,-67,-76,-77,-78,-79,-82,-81,-74,-63,-68,-86,-80,-37,-85,]),'LT':([55,56,57,58,59,60,61,62,63,64,67,117,118,143,145,147,148,153,166,],[100,-74,-75,-62,-36,-67,-76,-77,-78,-79,-82,-81,-74,-63,-68,-86,-80,-37,-85,]),'LE':([55,56,57,58,59,60,61,62,63,64,67,117,118,143,145,147,148,153,166,],[101,-74,-75,-62,-36,-67,-76,-77,-78,-79,-82,-81,-74,-63,-68,-86,-80,-37,-85,]),'GT':([55,56,57,58,59,60,61,62,63,64,67,117,118,143,145,147,148,153,166,],[102,-74,-75,-62,-36,-67,-76,-77,-78,-79,-82,-81,-74,-63,-68,-86,-80,-37,-85,]),'GE':([55,56,57,58,59,60,61,62,63,64,67,117,118,143,145,147,148,153,166,],[103,-74,-75,-62,-36,-67,-76,-77,-78,-79,-82,-81,-74,-63,-68,-86,-80,-37,-85,]),'IN':([55,56,57,58,59,60,61,62,63,64,67,117,118,143,145,147,148,153,166,],[104,-74,-75,-62,-36,-67,-76,-77,-78,-79,-82,-81,-74,-63,-68,-86,-80,-37,-85,]),'PLUS':([55,56,57,58,59,60,61,62,63,64,67,117,118,142,143,145,147,148,153,166,],[105,-74,-75,-62,-36,-67,-76,-77,-78,-79,-82,-81,-74,105,-63,-68,-86,-80,-37,-85,]),'MINUS':([55,56,57,58,59,60,61,62,63,64,67,117,118,142,143,145,147,148,153,166,],[106,-74,-75,-62,-36,-67,-76,-77,-78,-79,-82,-81,-74,106,-63,-68,-86,-80,-37,-85,]),'OR':([55,56,57,58,59,60,61,62,63,64,67,117,118,142,143,145,147,148,153,166,],[107,-74,-75,-62,-36,-67,-76,-77,-78,-79,-82,-81,-74,107,-63,-68,-86,-80,-37,-85,]),'TIMES':([56,57,58,59,60,61,62,63,64,67,117,118,143,145,147,148,153,166,],[-74,-75,110,-36,-67,-76,-77,-78,-79,-82,-81,-74,110,-68,-86,-80,-37,-85,]),'DIVIDE':([56,57,58,59,60,61,62,63,64,67,117,118,143,145,147,148,153,166,],[-74,-75,111,-36,-67,-76,-77,-78,-79,-82,-81,-74,111,-68,-86,-80,-37,-85,]),'DIV':([56,57,58,59,60,61,62,63,64,67,117,118,143,145,147,148,153,166,],[-74,-75,112,-36,-67,-76,-77,-78,-79,-82,-81,-74,112,-68,-86,-80,-37,-85,]),'MOD':([56,57,58,59,60,61,62,63,64,67,117,118,143,145,147,148,153,166,],[-74,-75,113,-36,-67,-76,-77,-78,-79,-82,-81,-74,113,-68,-86,-80,-37,-85,]),'AND':([56,57,58,59,60,61,62,63,64,67,117,118,143,145,147,148,153,166,],[-74,-75,114,-36,-67,-76,-77,-78,-79,-82,-81,-74,114,-68,-86,-80,-37,-85,]),'OF':([187,],[189,]),}
+
+_lr_action = {}
+for _k, _v in _lr_action_items.items():
+   for _x,_y in zip(_v[0],_v[1]):
+      if not _x in _lr_action:  _lr_action[_x] = {}
+      _lr_action[_x][_k] = _y
+del _lr_action_items
+
+_lr_goto_items = {'program':([0,],[1,]),'block':([4,],[5,]),'declarations':([4,],[6,]),'declaration_list':([4,],[7,]),'empty':([4,17,52,95,119,164,181,182,],[8,34,34,34,34,34,34,34,]),'declaration':([4,7,],[9,18,]),'function_declaration':([4,7,],[11,11,]),'procedure_declaration':([4,7,],[12,12,]),'compound_statement':([6,17,50,52,95,119,137,140,162,164,179,181,182,],[16,27,92,27,27,27,92,163,92,27,92,27,27,]),'var_declarations':([10,91,],[19,140,]),'var_declaration':([10,19,91,140,],[20,44,20,44,]),'id_list':([10,19,47,49,91,135,140,],[21,21,87,87,21,87,21,]),'statement_list':([17,],[25,]),'statement':([17,52,95,119,164,181,182,],[26,93,141,149,174,185,186,]),'assignment_statement':([17,52,95,119,164,181,182,],[28,28,28,28,28,28,28,]),'if_statement':([17,52,95,119,164,181,182,],[29,29,29,29,29,29,29,]),'while_statement':([17,52,95,119,164,181,182,],[30,30,30,30,30,30,30,]),'for_statement':([17,52,95,119,164,181,182,],[31,31,31,31,31,31,31,]),'procedure_call_statement':([17,52,95,119,164,181,182,],[32,32,32,32,32,32,32,]),'halt_statement':([17,52,95,119,164,181,182,],[33,33,33,33,33,33,33,]),'variable':([17,36,37,52,53,65,66,70,71,72,73,74,95,96,97,109,115,119,120,152,164,167,168,181,182,],[35,56,56,35,56,56,118,56,56,56,56,129,35,118,118,118,56,35,56,56,35,56,56,35,35,]),'expression':([36,37,53,65,70,71,72,73,115,120,152,167,168,],[54,68,94,116,123,124,123,123,123,150,169,176,177,]),'simple_expression':([36,37,53,65,70,71,72,73,96,115,120,152,167,168,],[55,55,55,55,55,55,55,55,142,55,55,55,55,55,]),'term':([36,37,53,65,70,71,72,73,96,97,115,120,152,167,168,],[58,58,58,58,58,58,58,58,58,143,58,58,58,58,58,]),'factor':([36,37,53,65,66,70,71,72,73,96,97,109,115,120,152,167,168,],[60,60,60,60,117,60,60,60,60,60,60,145,60,60,60,60,60,]),'function_call':([36,37,53,65,66,70,71,72,73,96,97,109,115,120,152,167,168,],[67,67,67,67,67,67,67,67,67,67,67,67,67,67,67,67,67,]),'type_spec':([45,48,136,158,189,],[76,88,160,171,190,]),'array_type':([45,48,136,158,189,],[82,82,82,82,82,]),'param_list':([47,49,],[85,89,]),'param':([47,49,135,],[86,86,159,]),'function_block':([50,137,162,179,],[90,161,173,184,]),'relop':([55,],[96,]),'addop':([55,142,],[97,97,]),'mulop':([58,143,],[109,109,]),'expression_list':([70,72,73,115,],[121,125,127,146,]),}
+
+_lr_goto = {}
+for _k, _v in _lr_goto_items.items():
+   for _x, _y in zip(_v[0], _v[1]):
+       if not _x in _lr_goto: _lr_goto[_x] = {}
+       _lr_goto[_x][_k] = _y
+del _lr_goto_items
+_lr_productions = [
+  ("S' -> program","S'",1,None,None,None),
+  ('program -> PROGRAM ID SEMICOLON block PERIOD','program',5,'p_program','analise_sintatica.py',31),
+  ('block -> declarations compound_statement','block',2,'p_block','analise_sintatica.py',36),
+  ('declarations -> declaration_list','declarations',1,'p_declarations','analise_sintatica.py',40),
+  ('declarations -> empty','declarations',1,'p_declarations','analise_sintatica.py',41),
+  ('declaration_list -> declaration_list declaration','declaration_list',2,'p_declaration_list','analise_sintatica.py',46),
+  ('declaration_list -> declaration','declaration_list',1,'p_declaration_list','analise_sintatica.py',47),
+  ('function_block -> VAR var_declarations compound_statement','function_block',3,'p_function_block','analise_sintatica.py',54),
+  ('function_block -> compound_statement','function_block',1,'p_function_block','analise_sintatica.py',55),
+  ('declaration -> VAR var_declarations','declaration',2,'p_declaration','analise_sintatica.py',65),
+  ('declaration -> function_declaration','declaration',1,'p_declaration','analise_sintatica.py',66),
+  ('declaration -> procedure_declaration','declaration',1,'p_declaration','analise_sintatica.py',67),
+  ('var_declarations -> var_declarations var_declaration','var_declarations',2,'p_var_declarations','analise_sintatica.py',72),
+  ('var_declarations -> var_declaration','var_declarations',1,'p_var_declarations','analise_sintatica.py',73),
+  ('var_declaration -> id_list COLON type_spec SEMICOLON','var_declaration',4,'p_var_declaration','analise_sintatica.py',82),
+  ('id_list -> id_list COMMA ID','id_list',3,'p_id_list','analise_sintatica.py',92),
+  ('id_list -> ID','id_list',1,'p_id_list','analise_sintatica.py',93),
+  ('type_spec -> INTEGER_TYPE','type_spec',1,'p_type_spec','analise_sintatica.py',102),
+  ('type_spec -> REAL_TYPE','type_spec',1,'p_type_spec','analise_sintatica.py',103),
+  ('type_spec -> BOOLEAN','type_spec',1,'p_type_spec','analise_sintatica.py',104),
+  ('type_spec -> STRING_TYPE','type_spec',1,'p_type_spec','analise_sintatica.py',105),
+  ('type_spec -> CHAR_TYPE','type_spec',1,'p_type_spec','analise_sintatica.py',106),
+  ('type_spec -> array_type','type_spec',1,'p_type_spec','analise_sintatica.py',107),
+  ('array_type -> ARRAY LBRACKET INTEGER PERIOD PERIOD INTEGER RBRACKET OF type_spec','array_type',9,'p_array_type','analise_sintatica.py',116),
+  ('compound_statement -> BEGIN statement_list END','compound_statement',3,'p_compound_statement','analise_sintatica.py',121),
+  ('statement_list -> statement_list SEMICOLON statement','statement_list',3,'p_statement_list','analise_sintatica.py',126),
+  ('statement_list -> statement','statement_list',1,'p_statement_list','analise_sintatica.py',127),
+  ('statement -> compound_statement','statement',1,'p_statement','analise_sintatica.py',140),
+  ('statement -> assignment_statement','statement',1,'p_statement','analise_sintatica.py',141),
+  ('statement -> if_statement','statement',1,'p_statement','analise_sintatica.py',142),
+  ('statement -> while_statement','statement',1,'p_statement','analise_sintatica.py',143),
+  ('statement -> for_statement','statement',1,'p_statement','analise_sintatica.py',144),
+  ('statement -> procedure_call_statement','statement',1,'p_statement','analise_sintatica.py',145),
+  ('statement -> halt_statement','statement',1,'p_statement','analise_sintatica.py',146),
+  ('statement -> empty','statement',1,'p_statement','analise_sintatica.py',147),
+  ('assignment_statement -> variable ASSIGN expression','assignment_statement',3,'p_assignment_statement','analise_sintatica.py',152),
+  ('variable -> ID','variable',1,'p_variable','analise_sintatica.py',156),
+  ('variable -> ID LBRACKET expression RBRACKET','variable',4,'p_variable','analise_sintatica.py',157),
+  ('if_statement -> IF expression THEN statement','if_statement',4,'p_if_statement','analise_sintatica.py',166),
+  ('if_statement -> IF expression THEN statement ELSE statement','if_statement',6,'p_if_statement','analise_sintatica.py',167),
+  ('while_statement -> WHILE expression DO statement','while_statement',4,'p_while_statement','analise_sintatica.py',176),
+  ('for_statement -> FOR ID ASSIGN expression TO expression DO statement','for_statement',8,'p_for_statement','analise_sintatica.py',181),
+  ('for_statement -> FOR ID ASSIGN expression DOWNTO expression DO statement','for_statement',8,'p_for_statement','analise_sintatica.py',182),
+  ('procedure_call_statement -> ID LPAREN expression_list RPAREN','procedure_call_statement',4,'p_procedure_call_statement','analise_sintatica.py',188),
+  ('procedure_call_statement -> ID LPAREN RPAREN','procedure_call_statement',3,'p_procedure_call_statement','analise_sintatica.py',189),
+  ('procedure_call_statement -> WRITELN LPAREN expression_list RPAREN','procedure_call_statement',4,'p_procedure_call_statement','analise_sintatica.py',190),
+  ('procedure_call_statement -> WRITELN LPAREN RPAREN','procedure_call_statement',3,'p_procedure_call_statement','analise_sintatica.py',191),
+  ('procedure_call_statement -> WRITE LPAREN expression_list RPAREN','procedure_call_statement',4,'p_procedure_call_statement','analise_sintatica.py',192),
+  ('procedure_call_statement -> WRITE LPAREN RPAREN','procedure_call_statement',3,'p_procedure_call_statement','analise_sintatica.py',193),
+  ('procedure_call_statement -> READLN LPAREN variable RPAREN','procedure_call_statement',4,'p_procedure_call_statement','analise_sintatica.py',194),
+  ('procedure_call_statement -> READLN LPAREN RPAREN','procedure_call_statement',3,'p_procedure_call_statement','analise_sintatica.py',195),
+  ('expression_list -> expression_list COMMA expression','expression_list',3,'p_expression_list','analise_sintatica.py',214),
+  ('expression_list -> expression','expression_list',1,'p_expression_list','analise_sintatica.py',215),
+  ('expression -> simple_expression','expression',1,'p_expression','analise_sintatica.py',225),
+  ('expression -> simple_expression relop simple_expression','expression',3,'p_expression','analise_sintatica.py',226),
+  ('relop -> EQ','relop',1,'p_relop','analise_sintatica.py',234),
+  ('relop -> NEQ','relop',1,'p_relop','analise_sintatica.py',235),
+  ('relop -> LT','relop',1,'p_relop','analise_sintatica.py',236),
+  ('relop -> LE','relop',1,'p_relop','analise_sintatica.py',237),
+  ('relop -> GT','relop',1,'p_relop','analise_sintatica.py',238),
+  ('relop -> GE','relop',1,'p_relop','analise_sintatica.py',239),
+  ('relop -> IN','relop',1,'p_relop','analise_sintatica.py',240),
+  ('simple_expression -> term','simple_expression',1,'p_simple_expression','analise_sintatica.py',245),
+  ('simple_expression -> simple_expression addop term','simple_expression',3,'p_simple_expression','analise_sintatica.py',246),
+  ('addop -> PLUS','addop',1,'p_addop','analise_sintatica.py',254),
+  ('addop -> MINUS','addop',1,'p_addop','analise_sintatica.py',255),
+  ('addop -> OR','addop',1,'p_addop','analise_sintatica.py',256),
+  ('term -> factor','term',1,'p_term','analise_sintatica.py',261),
+  ('term -> term mulop factor','term',3,'p_term','analise_sintatica.py',262),
+  ('mulop -> TIMES','mulop',1,'p_mulop','analise_sintatica.py',270),
+  ('mulop -> DIVIDE','mulop',1,'p_mulop','analise_sintatica.py',271),
+  ('mulop -> DIV','mulop',1,'p_mulop','analise_sintatica.py',272),
+  ('mulop -> MOD','mulop',1,'p_mulop','analise_sintatica.py',273),
+  ('mulop -> AND','mulop',1,'p_mulop','analise_sintatica.py',274),
+  ('factor -> variable','factor',1,'p_factor','analise_sintatica.py',279),
+  ('factor -> INTEGER','factor',1,'p_factor','analise_sintatica.py',280),
+  ('factor -> REAL','factor',1,'p_factor','analise_sintatica.py',281),
+  ('factor -> STRING','factor',1,'p_factor','analise_sintatica.py',282),
+  ('factor -> TRUE','factor',1,'p_factor','analise_sintatica.py',283),
+  ('factor -> FALSE','factor',1,'p_factor','analise_sintatica.py',284),
+  ('factor -> LPAREN expression RPAREN','factor',3,'p_factor','analise_sintatica.py',285),
+  ('factor -> NOT factor','factor',2,'p_factor','analise_sintatica.py',286),
+  ('factor -> function_call','factor',1,'p_factor','analise_sintatica.py',287),
+  ('expression -> variable COLON INTEGER','expression',3,'p_formatted_expression','analise_sintatica.py',305),
+  ('expression -> variable COLON INTEGER COLON INTEGER','expression',5,'p_formatted_expression','analise_sintatica.py',306),
+  ('function_call -> ID LPAREN expression_list RPAREN','function_call',4,'p_function_call','analise_sintatica.py',315),
+  ('function_call -> ID LPAREN RPAREN','function_call',3,'p_function_call','analise_sintatica.py',316),
+  ('function_declaration -> FUNCTION ID LPAREN param_list RPAREN COLON type_spec SEMICOLON function_block SEMICOLON','function_declaration',10,'p_function_declaration','analise_sintatica.py',324),
+  ('function_declaration -> FUNCTION ID COLON type_spec SEMICOLON function_block SEMICOLON','function_declaration',7,'p_function_declaration','analise_sintatica.py',325),
+  ('procedure_declaration -> PROCEDURE ID LPAREN param_list RPAREN SEMICOLON function_block SEMICOLON','procedure_declaration',8,'p_procedure_declaration','analise_sintatica.py',332),
+  ('procedure_declaration -> PROCEDURE ID SEMICOLON function_block SEMICOLON','procedure_declaration',5,'p_procedure_declaration','analise_sintatica.py',333),
+  ('param_list -> param_list SEMICOLON param','param_list',3,'p_param_list','analise_sintatica.py',341),
+  ('param_list -> param','param_list',1,'p_param_list','analise_sintatica.py',342),
+  ('param -> id_list COLON type_spec','param',3,'p_param','analise_sintatica.py',350),
+  ('halt_statement -> HALT SEMICOLON','halt_statement',2,'p_halt_statement','analise_sintatica.py',356),
+  ('empty -> <empty>','empty',0,'p_empty','analise_sintatica.py',362),
+]
@@ -0,0 +1,197 @@
+"""
+Otimizador peephole sobre o código EWVM gerado pelo CodeGenerator (lista de linhas de texto).
+
+As regras são aplicadas repetidamente até o código deixar de mudar:
+  - encadeamento de saltos (um salto para uma label seguida de 'jump M' passa a saltar para M);
+  - remoção de 'jump L' imediatamente antes de 'L:' e de código inalcançável depois de jump/stop/return;
+  - remoção de labels que nenhum salto (ou 'pusha') usa;
+  - cálculo de operações entre constantes ('pushi a; pushi b; add' -> 'pushi a+b');
+  - 'not; jz L' -> 'jnz L' (e 'not; jnz L' -> 'jz L');
+  - saltos condicionais sobre constantes;
+  - 'storeg X; pushg X' -> 'dup 1; storeg X'.
+"""
+
+JUMPS = ("jump", "jz", "jnz")
+# instruções que referem labels (os saltos e o endereço de uma função, empilhado antes de 'call')
+LABEL_REFERENCES = JUMPS + ("pusha",)
+
+# operações binárias calculadas quando os dois operandos são constantes inteiras
+FOLDABLE = {
+    "add": lambda a, b: a + b,
+    "sub": lambda a, b: a - b,
+    "mul": lambda a, b: a * b,
+    "div": lambda a, b: a // b,
+    "mod": lambda a, b: a % b,
+    "sup": lambda a, b: int(a > b),
+    "inf": lambda a, b: int(a < b),
+    "supeq": lambda a, b: int(a >= b),
+    "infeq": lambda a, b: int(a <= b),
+    "equal": lambda a, b: int(a == b),
+    "and": lambda a, b: int(bool(a) and bool(b)),
+    "or": lambda a, b: int(bool(a) or bool(b)),
+}
+
+
+def is_label(line):
+    return line.endswith(":") and '"' not in line
+
+
+def split(line):
+    """Devolve (instrução, operando) de uma linha de código VM; o operando fica em texto (ou None)."""
+    parts = line.split(None, 1)
+    return parts[0].lower(), parts[1] if len(parts) > 1 else None
+
+
+def instruction_count(code):
+    """Número de instruções (sem labels, linhas vazias e comentários)."""
+    return sum(1 for line in code if line and not is_label(line) and not line.startswith("//"))
+
+
+def _int_constant(line):
+    """Valor de 'pushi N', ou None se a linha não for um pushi."""
+    op, arg = split(line) if line and not is_label(line) else (None, None)
+    if op != "pushi":
+        return None
+    try:
+        return int(arg)
+    except ValueError:
+        return None
+
+
+def _label_targets(code):
+    """label -> destino final, seguindo labels cuja primeira instrução é 'jump M'."""
+    first = {}  # label -> primeira instrução depois dela
+    pending = []
+    for line in code:
+        if is_label(line):
+            pending.append(line[:-1])
+        elif line and not line.startswith("//"):
+            for label in pending:
+                first[label] = line
+            pending = []
+
+    def resolve(label, seen):
+        op, arg = split(first[label]) if label in first else (None, None)
+        if op == "jump" and arg not in seen:
+            seen.add(arg)
+            return resolve(arg, seen)
+        return label
+
+    return {label: resolve(label, {label}) for label in first}, first
+
+
+def thread_jumps(code):
+    """Encadeia saltos para 'jump' e troca 'jump L' por 'stop' se L começar com 'stop'."""
+    targets, first = _label_targets(code)
+    result = []
+    for line in code:
+        if not is_label(line) and line:
+            op, arg = split(line)
+            if op in JUMPS and arg in targets:
+                target = targets[arg]
+                if op == "jump" and first.get(target) == "stop":
+                    line = "stop"
+                else:
+                    line = f"{op} {target}"
+        result.append(line)
+    return result
+
+
+def remove_unreachable(code):
+    """Remove as instruções entre um 'jump'/'stop'/'return' e a label seguinte."""
+    result = []
+    reachable = True
+    for line in code:
+        if is_label(line):
+            reachable = True
+        elif not reachable:
+            continue
+        result.append(line)
+        if line and not is_label(line) and split(line)[0] in ("jump", "stop", "return"):
+            reachable = False
+    return result
+
+
+def remove_dead_labels(code):
+    """Remove as labels que não são destino de nenhum salto nem endereço de uma função."""
+    used = {split(line)[1] for line in code if line and not is_label(line) and split(line)[0] in LABEL_REFERENCES}
+    return [line for line in code if not is_label(line) or line[:-1] in used]
+
+
+def _rewrite(code, i):
+    """
+    Tenta reescrever a janela que começa em code[i].
+    Devolve (nº de linhas substituídas, linhas novas) ou None se nenhuma regra se aplicar.
+    """
+    line = code[i]
+    if is_label(line) or not line:
+        return None
+    op, arg = split(line)
+    nxt = code[i + 1] if i + 1 < len(code) else ""
+    next_op, next_arg = split(nxt) if nxt and not is_label(nxt) else (None, None)
+
+    # jump L; [outras labels]; L:
+    if op == "jump":
+        j = i + 1
+        while j < len(code) and is_label(code[j]):
+            if code[j][:-1] == arg:
+                return 1, []
+            j += 1
+
+    # not; jz L -> jnz L    not; jnz L -> jz L
+    if op == "not" and next_op in ("jz", "jnz"):
+        return 2, [f"{'jnz' if next_op == 'jz' else 'jz'} {next_arg}"]
+
+    a = _int_constant(line)
+    if a is not None:
+        # pushi c; not
+        if next_op == "not":
+            return 2, [f"pushi {int(not a)}"]
+        # pushi c; jz L / jnz L
+        if next_op in ("jz", "jnz"):
+            taken = (a == 0) == (next_op == "jz")
+            return 2, [f"jump {next_arg}"] if taken else []
+        # pushi a; pushi b; op
+        b = _int_constant(nxt)
+        if b is not None and i + 2 < len(code) and not is_label(code[i + 2]) and code[i + 2]:
+            fold = FOLDABLE.get(split(code[i + 2])[0])
+            if fold and not (b == 0 and split(code[i + 2])[0] in ("div", "mod")):
+                return 3, [f"pushi {fold(a, b)}"]
+
+    # pushf x; pushi -1; mul -> pushf -x
+    if op == "pushf" and _int_constant(nxt) == -1 and i + 2 < len(code) and code[i + 2] == "mul":
+        return 3, [f"pushf {arg[1:] if arg.startswith('-') else '-' + arg}"]
+
+    # storeg X; pushg X -> dup 1; storeg X
+    if op == "storeg" and next_op == "pushg" and next_arg == arg:
+        return 2, ["dup 1", line]
+
+    return None
+
+
+def apply_rewrites(code):
+    result = []
+    i = 0
+    while i < len(code):
+        match = _rewrite(code, i)
+        if match:
+            length, replacement = match
+            result.extend(replacement)
+            i += length
+        else:
+            result.append(code[i])
+            i += 1
+    return result
+
+
+PASSES = (thread_jumps, remove_unreachable, apply_rewrites, remove_dead_labels)
+
+
+def optimize(code):
+    """Aplica todas as regras até ao ponto fixo e devolve o novo código."""
+    while True:
+        previous = code
+        for optimization in PASSES:
+            code = optimization(code)
+        if code == previous:
+            return code
@@ -0,0 +1,314 @@
+"""
+Serviço de compilação e execução num conjunto limitado de processos "quentes" (usado pela
+interface web, web_interface/app.py).
+
+Cada processo cria o parser uma única vez (com as tabelas do PLY, ver src/tabelas_ply) e importa
+as fases do compilador e a VM no arranque; os pedidos correm depois nesses processos, sem
+arrancar um interpretador novo por pedido. Cada processo só corre um pedido de cada vez, pelo
+que os limites do processo são os limites do pedido:
+  - tempo: o prazo cobre todas as fases. A VM pára sozinha no prazo (timeout de
+    VirtualMachine.run) e um alarme (SIGALRM) interrompe as outras fases; se o processo ficar
+    preso em código C, o limite de CPU (RLIMIT_CPU) termina-o e o conjunto é recriado;
+  - memória: RLIMIT_AS do processo; um pedido que passe o limite termina com MemoryError, sem
+    afetar os outros pedidos;
+  - instruções: max_steps da VM.
+
+A compilação usa a mesma cache do main.py (src/cache.py), com a mesma chave (código fonte e
+opções -O/--ir): um programa já compilado só é executado.
+
+O resultado de cada pedido é um dict serializável em JSON com o estado final ("ok", "syntax",
+"semantic", "codegen", os estados da VM "error", "budget", "timeout" e "input", "memory",
+"crash" ou "busy") e a lista das fases executadas, cada uma com o tempo, os erros e as
+mensagens escritas no stdout.
+"""
+import io, time, signal, resource, threading
+from contextlib import redirect_stdout
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from src.cache import DEFAULT_DIR
+
+ACTIONS = ("tokens", "ast", "semantic", "compile_only", "run")
+ALARM_GRACE = 0.25  # a VM termina sozinha no prazo; o alarme só apanha as outras fases
+CPU_GRACE = 2       # segundos de CPU além do prazo até o processo ser terminado
+
+_parser = None  # parser do processo atual (criado em _init_worker)
+_vm = None      # VM reutilizada pelos pedidos do processo atual
+_cache = None   # cache de compilação partilhada pelos processos (None: sem cache)
+
+
+class JobTimeout(Exception):
+    """Lançada pelo alarme quando um pedido ultrapassa o prazo."""
+
+
+def _alarm(signum, frame):
+    raise JobTimeout()
+
+
+def _init_worker(memory_mb, cache_dir):
+    global _parser, _vm, _cache
+    from src.analise_sintatica import create_parser
+    from vm import VirtualMachine
+    import src.analise_semantica, src.otimizar_AST, src.codegen, src.peephole, src.ir, src.ir_codegen
+    _parser = create_parser()
+    _vm = VirtualMachine()
+    if cache_dir:
+        from src.cache import CompileCache
+        _cache = CompileCache(cache_dir)
+    signal.signal(signal.SIGALRM, _alarm)
+    if memory_mb:
+        _, hard = resource.getrlimit(resource.RLIMIT_AS)
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit if hard == resource.RLIM_INFINITY else min(limit, hard), hard))
+
+
+def _ping():
+    return True
+
+
+def _set_cpu_limit(seconds):
+    """Limite de CPU do processo: o já usado mais `seconds` (o RLIMIT_CPU conta desde o arranque)."""
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    used = int(usage.ru_utime + usage.ru_stime)
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    soft = used + int(seconds) + 1
+    resource.setrlimit(resource.RLIMIT_CPU, (soft if hard == resource.RLIM_INFINITY else min(soft, hard), hard))
+
+
+def _phase(phases, name, function):
+    """
+    Executa uma fase (function devolve (valor, erros)) e acrescenta o seu registo a `phases`.
+    Devolve o valor, ou None se a fase tiver erros.
+    """
+    record = {"phase": name, "ok": False, "time_ms": 0.0, "errors": [], "messages": ""}
+    phases.append(record)
+    output = io.StringIO()
+    start = time.perf_counter()
+    try:
+        with redirect_stdout(output):
+            value, errors = function()
+    finally:
+        record["time_ms"] = round(1000 * (time.perf_counter() - start), 3)
+        record["messages"] = output.getvalue()
+    record["errors"] = list(errors)
+    record["ok"] = not errors
+    return None if errors else value
+
+
+def ast_lines(node, indent=0):
+    """Linhas da AST indentadas (o formato de test.py ast)."""
+    if node is None:
+        return []
+    lines = ["  " * indent + f"{node.type}: {node.leaf}"]
+    for child in node.children:
+        lines.extend(ast_lines(child, indent + 1))
+    return lines
+
+
+def _pipeline(result, source_code, action, input_text, optimize_code, use_ir, deadline, max_steps):
+    from vm import InputExhausted
+    phases = result["phases"]
+
+    # Análise léxica (só para ver os tokens)
+    if action == "tokens":
+        def tokens():
+            lexer = _parser.lexer
+            lexer.lineno = 1
+            lexer.input(source_code)
+            return [{"type": tok.type, "value": tok.value, "line": tok.lineno} for tok in lexer], []
+        result["tokens"] = _phase(phases, "lexica", tokens)
+        return
+
+    # Cache de compilação: um acerto salta todas as fases do compilador
+    code = key = None
+    if _cache is not None and action in ("compile_only", "run"):
+        key = _cache.key(source_code, {"optimize": optimize_code, "ir": use_ir})
+        code = _phase(phases, "cache", lambda: (_cache.get(key), []))
+        result["cached"] = code is not None
+    if code is None:
+        code = _compile(result, source_code, action, optimize_code, use_ir)
+        if code is None:
+            return
+        if key is not None:
+            _cache.put(key, code)
+    result["code"] = code
+    if action == "compile_only":
+        return
+
+    # Execução na VM, com o tempo que falta até ao prazo
+    def execute():
+        output = io.StringIO()
+        _vm.reset(output, input_text)
+        _vm.load_code(code)
+        try:
+            run = _vm.run(max_steps=max_steps, timeout=max(deadline - time.perf_counter(), 0))
+        except InputExhausted as e:
+            _vm.output.flush()
+            result["run"] = {"status": "input", "steps": None, "output": output.getvalue()}
+            return None, [str(e)]
+        result["run"] = {"status": run.status, "steps": run.steps, "output": run.output}
+        errors = {"finished": [], "error": [run.error], "budget": [f"Limite de {max_steps} instruções atingido"],
+                  "timeout": ["Prazo de execução ultrapassado"]}[run.status]
+        return run, errors
+    if _phase(phases, "execucao", execute) is None:
+        result["status"] = result["run"]["status"]
+
+
+def _compile(result, source_code, action, optimize_code, use_ir):
+    """Fases do compilador; devolve o código VM, ou None com erros (ou nas ações que não geram código)."""
+    from src.analise_semantica import SemanticAnalyzer
+    from src.otimizar_AST import collect_used_variables, prune_unused_var_declarations, propagate_constants, \
+        inline_functions
+    from src.codegen import CodeGenerator
+    phases = result["phases"]
+
+    # Análise sintática
+    def parse():
+        ast = _parser.parse(source_code)
+        return ast, _parser.errors or ([] if ast else ["Erro de sintaxe"])
+    ast = _phase(phases, "sintatica", parse)
+    if ast is None:
+        result["status"] = "syntax"
+        return
+    if action == "ast":
+        result["ast"] = "\n".join(ast_lines(ast))
+        return
+
+    # Análise semântica
+    def semantic(tree):
+        prune_unused_var_declarations(tree, collect_used_variables(tree))
+        analyzer = SemanticAnalyzer()
+        analyzer.analyze(tree)
+        return analyzer.symtab, analyzer.errors
+    symtab = _phase(phases, "semantica", lambda: semantic(ast))
+    if symtab is None:
+        result["status"] = "semantic"
+        return
+    if action == "semantic":
+        return
+
+    # Otimizações na AST (como main.py -O), depois da análise semântica do programa original;
+    # a tabela de símbolos usada pelo codegen é a do programa otimizado
+    if optimize_code:
+        def optimize_ast():
+            tree = propagate_constants(inline_functions(ast))
+            table, errors = semantic(tree)
+            return (tree, table), errors
+        optimized = _phase(phases, "otimizacao", optimize_ast)
+        if optimized is None:
+            result["status"] = "semantic"
+            return
+        ast, symtab = optimized
+
+    # Geração de código
+    def generate():
+        if use_ir:
+            from src.ir import lower_program
+            from src.ir_codegen import generate_from_ir
+            program = lower_program(ast, symtab)
+            if program.errors:
+                return None, program.errors
+            code = generate_from_ir(program)
+        else:
+            generator = CodeGenerator(symtab, optimize=optimize_code)
+            code = generator.generate(ast)
+            if generator.errors:
+                return None, generator.errors
+        if optimize_code:
+            from src.peephole import optimize
+            code = optimize(code)
+        return code, []
+    code = _phase(phases, "codegen", generate)
+    if code is None:
+        result["status"] = "codegen"
+        return
+    return code
+
+
+def _fail(result, status, message):
+    result["status"] = status
+    result["error"] = message
+    if result["phases"]:
+        result["phases"][-1]["ok"] = False
+        result["phases"][-1]["errors"].append(message)
+
+
+def _run_job(source_code, action, input_text, optimize_code, use_ir, time_limit, max_steps):
+    """Executa um pedido no processo atual (um dos processos do CompileService)."""
+    start = time.perf_counter()
+    result = {"action": action, "status": "ok", "phases": []}
+    _set_cpu_limit(time_limit + CPU_GRACE)
+    signal.setitimer(signal.ITIMER_REAL, time_limit + ALARM_GRACE)
+    try:
+        _pipeline(result, source_code, action, input_text, optimize_code, use_ir, start + time_limit, max_steps)
+    except JobTimeout:
+        _fail(result, "timeout", f"Prazo de {time_limit}s ultrapassado")
+    except MemoryError:
+        _fail(result, "memory", "Limite de memória ultrapassado")
+    except Exception as e:
+        _fail(result, "error", f"Erro inesperado: {e}")
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+    result["time_ms"] = round(1000 * (time.perf_counter() - start), 3)
+    return result
+
+
+class CompileService:
+    """
+    Conjunto de `workers` processos quentes que compilam e executam programas Pascal.
+    No máximo `workers` pedidos correm ao mesmo tempo e `max_pending` esperam pela sua vez;
+    com a fila cheia, o pedido é recusado de imediato (estado "busy").
+    """
+    def __init__(self, workers=2, time_limit=3.0, memory_mb=256, max_steps=50_000_000, max_pending=32,
+                 cache_dir=DEFAULT_DIR):
+        self.workers = workers
+        self.time_limit = time_limit  # segundos por pedido (todas as fases)
+        self.memory_mb = memory_mb    # memória virtual de cada processo (None: sem limite)
+        self.max_steps = max_steps    # instruções da VM por pedido
+        self.cache_dir = cache_dir    # diretório da cache de compilação (None: sem cache)
+        self._slots = threading.BoundedSemaphore(workers + max_pending)
+        self._lock = threading.Lock()
+        self._pool = None
+        self.start()
+
+    def start(self):
+        """Cria os processos (e o parser de cada um) já, em vez de no primeiro pedido."""
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                         initargs=(self.memory_mb, self.cache_dir))
+        for future in [self._pool.submit(_ping) for _ in range(self.workers)]:
+            future.result()
+
+    def run(self, source_code, action="run", input_text="", optimize_code=False, use_ir=False):
+        """Compila (e, com action "run", executa) o programa num dos processos; devolve o dict do resultado."""
+        if action not in ACTIONS:
+            raise ValueError(f"Ação desconhecida: {action}. Usar {' | '.join(ACTIONS)}")
+        if not self._slots.acquire(blocking=False):
+            return {"action": action, "status": "busy", "phases": [], "error": "Servidor ocupado, tentar mais tarde"}
+        try:
+            pool = self._pool
+            try:
+                future = pool.submit(_run_job, source_code, action, input_text, optimize_code, use_ir,
+                                     self.time_limit, self.max_steps)
+                return future.result()
+            except BrokenProcessPool:
+                # um processo terminou a meio de um pedido (limite de CPU, falta de memória do sistema):
+                # os pedidos que estavam nesse conjunto de processos falham e o conjunto é recriado
+                self._restart(pool)
+                return {"action": action, "status": "crash", "phases": [],
+                        "error": "O processo que executava o pedido terminou (limite de tempo ou de memória)"}
+        finally:
+            self._slots.release()
+
+    def _restart(self, broken):
+        with self._lock:
+            if self._pool is broken:
+                broken.shutdown(wait=False, cancel_futures=True)
+                self.start()
+
+    def close(self):
+        self._pool.shutdown(cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -26,6 +26,7 @@ class SymbolTable:
         self.scopes = [{}]
         self.current_scope = 0
         self.scope_names = ["global"]
+        self.closed_scopes = {}  # escopos de funções já analisadas (usados pelo gerador de código)
         
     def enter_scope(self, name):
         """Cria um novo escopo aninhado."""
@@ -37,11 +38,17 @@ class SymbolTable:
     def exit_scope(self):
         """Sai do escopo atual e retorna para o escopo pai."""
         if self.current_scope > 0:
-            self.scopes.pop()
-            self.scope_names.pop()
+            self.closed_scopes[self.scope_names.pop()] = self.scopes.pop()
             self.current_scope -= 1
         return self.current_scope
 
+    def reenter_scope(self, name):
+        """Volta a entrar num escopo já fechado (por exemplo, o de uma função), com os mesmos símbolos."""
+        self.scopes.append(self.closed_scopes.get(name, {}))
+        self.current_scope += 1
+        self.scope_names.append(name)
+        return self.current_scope
+
     def add_symbol(self, name, type=None, value=None, kind=None, params=None, address=None, size=1, dimensions=None, element_type=None):
         """Adiciona um símbolo na tabela de símbolos, incluindo suporte para arrays."""
         scope_name = self.scope_names[self.current_scope]
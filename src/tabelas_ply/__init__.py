@@ -0,0 +1,48 @@
+"""
+Tabelas geradas pelo PLY para o lexer e o parser (lextab_<hash>.py e parsetab_<hash>.py).
+
+Com optimize=1 o PLY lê as tabelas sem validar de novo as regras nem recalcular as tabelas
+LALR, mas também não verifica se correspondem à gramática atual. Por isso o nome de cada
+ficheiro inclui um hash das regras (tokens, expressões regulares e produções): quando a
+gramática muda, o módulo com o novo hash ainda não existe e as tabelas são geradas outra vez
+(e as antigas removidas).
+"""
+import os, glob, hashlib
+
+DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+
+def rules_hash(obj, prefix, *extra):
+    """
+    Hash das regras PLY de obj: atributos com o prefixo ('t_' ou 'p_'), pela ordem em que as
+    funções estão definidas (que é a ordem usada pelo PLY), mais os valores em `extra`.
+    """
+    digest = hashlib.sha256(repr(extra).encode())
+    rules = []
+    for name in dir(type(obj)):
+        if not name.startswith(prefix):
+            continue
+        value = getattr(type(obj), name)
+        if callable(value):
+            rules.append((value.__code__.co_firstlineno, name, value.__doc__))
+        else:
+            rules.append((0, name, value))
+    for rule in sorted(rules, key=lambda rule: (rule[0], rule[1])):
+        digest.update(repr(rule).encode())
+    return digest.hexdigest()[:16]
+
+
+def table_module(kind, digest):
+    """Nome do módulo das tabelas (kind é 'lextab' ou 'parsetab')."""
+    remove_stale(kind, digest)
+    return f"{__name__}.{kind}_{digest}"
+
+
+def remove_stale(kind, digest):
+    """Remove as tabelas geradas para versões anteriores da gramática."""
+    for path in glob.glob(os.path.join(DIRECTORY, f"{kind}_*.py")):
+        if os.path.basename(path) != f"{kind}_{digest}.py":
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -2,6 +2,9 @@ import sys
 from src.analise_sintatica import create_parser
 from src.analise_lexica import create_lexer
 from src.analise_semantica import SemanticAnalyzer
+from src.otimizar_AST import collect_used_variables, prune_unused_var_declarations
+from src.ir import lower_program
+from src.dataflow import liveness, immediate_dominators
 
 def print_ast(node, indent=0):
     if node is None:
@@ -49,11 +52,43 @@ def run_semantic(source_code):
     else:
         print("Análise semântica concluída com sucesso!")
 
+def run_ir(source_code):
+    """Executa o parser + análise semântica e imprime a IR (CFG), com liveness e dominadores de cada bloco."""
+    parser = create_parser()
+    ast = parser.parse(source_code)
+    if not ast:
+        print("Erro: análise sintática falhou. IR não gerada.")
+        for error in parser.errors:
+            print(f"  - {error}")
+        return
+    prune_unused_var_declarations(ast, collect_used_variables(ast))
+    analyzer = SemanticAnalyzer()
+    if not analyzer.analyze(ast):
+        print("Análise semântica falhou. IR não gerada.")
+        for e in analyzer.errors:
+            print(" -", e)
+        return
+
+    program = lower_program(ast, analyzer.symtab)
+    analyses = {}
+    for function in [program.main] + program.functions:
+        analyses[id(function)] = (liveness(function)[1], immediate_dominators(function))
+
+    def annotate(function, block):
+        live_out, idom = analyses[id(function)]
+        live = ", ".join(sorted(map(repr, live_out[block]))) or "-"
+        dominator = idom[block].label if idom[block] else "-"
+        return f"idom: {dominator}  live-out: {live}"
+
+    print(program.dump(annotate))
+    for e in program.errors:
+        print(" -", e)
+
 
 if __name__ == "__main__":
     if len(sys.argv) < 3:
         print("Comando correto: python main.py <ficheiro.pas> <modo>")
-        print("Modos: tokens | ast | semantic")
+        print("Modos: tokens | ast | semantic | ir")
         sys.exit(1)
 
     pascal_file = sys.argv[1]
@@ -68,6 +103,8 @@ if __name__ == "__main__":
         run_ast(source_code)
     elif mode == "semantic":
         run_semantic(source_code)
+    elif mode == "ir":
+        run_ir(source_code)
     elif mode == "all":
         run_tokenizer(source_code)
         print('\n')
@@ -75,4 +112,4 @@ if __name__ == "__main__":
         print('\n')
         run_semantic(source_code)
     else:
-        print(f"Modo desconhecido: '{mode}'. Usar 'tokens', 'ast' ou 'semantic'.")
+        print(f"Modo desconhecido: '{mode}'. Usar 'tokens', 'ast', 'semantic' ou 'ir'.")
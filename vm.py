@@ -1,191 +1,1470 @@
-import sys, shlex
+import sys, os, io, time, json, shlex, codecs, argparse, resource
+from array import array
+from collections import deque
+
+
+class Op:
+    """Códigos numéricos das instruções da VM (usados no programa descodificado)."""
+    PUSHI = 0
+    PUSHF = 1
+    PUSHG = 2
+    PUSHS = 3
+    STOREG = 4
+    LOAD = 5
+    ADD = 6
+    SUB = 7
+    MUL = 8
+    DIV = 9
+    FDIV = 10
+    MOD = 11
+    SUP = 12
+    INF = 13
+    SUPEQ = 14
+    INFEQ = 15
+    EQUAL = 16
+    AND = 17
+    OR = 18
+    NOT = 19
+    READ = 20
+    ATOI = 21
+    ATOF = 22
+    WRITEI = 23
+    WRITES = 24
+    WRITELN = 25
+    JUMP = 26
+    STOREN = 27
+    LOADN = 28
+    STORE = 29
+    STRI = 30
+    STRF = 31
+    ALLOCN = 32
+    PUSHST = 33
+    JZ = 34
+    JNZ = 35
+    START = 36
+    STOP = 37
+    UNKNOWN = 38  # instrução desconhecida: o erro só é reportado se for executada
+    # superinstruções (geradas pela fusão de sequências frequentes no carregamento)
+    INCG = 39     # incg X K      == pushg X; pushi K; add; storeg X
+    CMPJG = 40    # cmpjg X Y L   == pushg X; pushg Y; sup; not; jz L
+    CMPJL = 41    # cmpjl X Y L   == pushg X; pushg Y; inf; not; jz L
+    LOADIDX = 42  # loadidx A C K == pushst A; pushg C; pushi K; sub; loadn
+    # instruções da EWVM acrescentadas depois das superinstruções (mantém os códigos do .vmb)
+    DUP = 43      # dup N: duplica os N valores do topo da pilha
+    # chamadas de funções: frames na pilha, endereçados a partir do frame pointer (fp)
+    PUSHA = 44    # pusha L: empilha o endereço da label L
+    CALL = 45     # call: desempilha um endereço e salta para ele, guardando (retorno, fp); fp = topo
+    RETURN = 46   # return: descarta o frame (pilha até fp) e repõe o endereço de retorno e o fp
+    PUSHL = 47    # pushl N: empilha a célula fp + N (N < 0: argumentos e valor de retorno)
+    STOREL = 48   # storel N: guarda o topo na célula fp + N
+    PUSHN = 49    # pushn N: empilha N zeros (variáveis locais)
+    POP = 50      # pop N: descarta N valores do topo
+
+
+# nome textual -> código numérico
+OPCODES = {name.lower(): code for name, code in vars(Op).items() if name.isupper() and name != "UNKNOWN"}
+
+# código numérico -> nome textual (inclui UNKNOWN)
+OPCODE_NAMES = {code: name.lower() for name, code in vars(Op).items() if name.isupper()}
+
+# classes de instruções usadas no relatório do profiler
+OPCODE_CLASSES = {
+    "pilha": (Op.PUSHI, Op.PUSHF, Op.PUSHS, Op.PUSHG, Op.PUSHST, Op.STOREG, Op.DUP,
+              Op.PUSHL, Op.STOREL, Op.PUSHN, Op.POP),
+    "memória": (Op.LOAD, Op.LOADN, Op.STORE, Op.STOREN, Op.ALLOCN),
+    "aritmética": (Op.ADD, Op.SUB, Op.MUL, Op.DIV, Op.FDIV, Op.MOD),
+    "comparação": (Op.SUP, Op.INF, Op.SUPEQ, Op.INFEQ, Op.EQUAL),
+    "lógica": (Op.AND, Op.OR, Op.NOT),
+    "conversão": (Op.ATOI, Op.ATOF, Op.STRI, Op.STRF),
+    "I/O": (Op.READ, Op.WRITEI, Op.WRITES, Op.WRITELN),
+    "salto": (Op.JUMP, Op.JZ, Op.JNZ, Op.PUSHA, Op.CALL, Op.RETURN),
+    "controlo": (Op.START, Op.STOP, Op.UNKNOWN),
+    "superinstrução": (Op.INCG, Op.CMPJG, Op.CMPJL, Op.LOADIDX),
+}
+OPCODE_CLASS = {op: name for name, ops in OPCODE_CLASSES.items() for op in ops}
+
+# valor devolvido por um handler do motor por tabela para terminar a execução
+HALT = -1
+
+# valor devolvido pelo handler de 'read' no motor assíncrono: pausa para obter o input
+READ_PAUSE = -2
+
+# instruções cujo operando é convertido na descodificação
+INT_OPERAND = {Op.PUSHI, Op.PUSHG, Op.STOREG, Op.LOAD, Op.STORE, Op.PUSHST, Op.DUP,
+               Op.PUSHL, Op.STOREL, Op.PUSHN, Op.POP}
+# operando é uma label (resolvida para o índice da instrução)
+JUMP_OPERAND = {Op.JUMP, Op.JZ, Op.JNZ, Op.PUSHA}
+# operando assumido quando a instrução aparece sem ele ('dup' é 'dup 1')
+DEFAULT_OPERAND = {Op.DUP: "1"}
+# superinstruções com vários operandos inteiros (em CMPJG/CMPJL o último é uma label)
+TUPLE_OPERAND = {Op.INCG, Op.CMPJG, Op.CMPJL, Op.LOADIDX}
+TUPLE_SIZE = {Op.INCG: 2, Op.CMPJG: 3, Op.CMPJL: 3, Op.LOADIDX: 3}
+COMPARE_JUMP = {Op.CMPJG, Op.CMPJL}
+
+
+class OutputBuffer:
+    """
+    Camada de output da VM: acumula o texto em memória e escreve-o no destino (sink) em bloco,
+    quando atinge `threshold` caracteres ou quando flush() é chamado explicitamente.
+    O destino pode ser qualquer objeto com write() (por omissão, o sys.stdout atual).
+    """
+    def __init__(self, sink=None, threshold=8192):
+        self.sink = sink
+        self.threshold = threshold
+        self._parts = []
+        self._size = 0
+
+    def write(self, text):
+        self._parts.append(text)
+        self._size += len(text)
+        if self._size >= self.threshold:
+            self.flush()
+
+    def getvalue(self):
+        """Output escrito até agora, se o destino for um buffer em memória (por exemplo io.StringIO)."""
+        if self.sink is None or not hasattr(self.sink, "getvalue"):
+            return None
+        self.flush()
+        return self.sink.getvalue()
+
+    def flush(self):
+        sink = self.sink if self.sink is not None else sys.stdout
+        if self._parts:
+            sink.write("".join(self._parts))
+            self._parts = []
+            self._size = 0
+        if hasattr(sink, "flush"):
+            sink.flush()
+
+
+class Memory:
+    """
+    Memória da VM, com duas regiões no mesmo espaço de endereços:
+      - global: endereços [0, global_size), uma lista de tamanho fixo (pushg/storeg);
+      - heap: endereços a partir de global_size, reservados por allocn.
+    A heap guarda inteiros num array('q') (8 bytes por célula) e duplica a capacidade quando cresce.
+    Se for guardado na heap um valor que não é um inteiro de 64 bits (real, string), a heap passa
+    a usar uma lista de objetos.
+    """
+    def __init__(self, global_size=1000):
+        self.global_size = global_size
+        self.globals = [0] * global_size
+        self.heap = array("q")
+        self.heap_top = 0      # células da heap em uso
+        self.peak_bytes = 0    # maior tamanho ocupado pela heap
+
+    @property
+    def typed(self):
+        return isinstance(self.heap, array)
+
+    def _heap_bytes(self):
+        if self.typed:
+            return self.heap.itemsize * len(self.heap)
+        return sys.getsizeof(self.heap)
+
+    def _reserve(self, cells):
+        """Garante capacidade para `cells` células na heap (crescimento amortizado, preenchido a zero)."""
+        capacity = len(self.heap)
+        if cells <= capacity:
+            return
+        extra = max(cells, 2 * capacity, 16) - capacity
+        if self.typed:
+            self.heap.frombytes(bytes(self.heap.itemsize * extra))
+        else:
+            self.heap.extend([0] * extra)
+        self.peak_bytes = max(self.peak_bytes, self._heap_bytes())
+
+    def _promote(self):
+        """Passa a heap de array('q') para lista de objetos, para aceitar reais e strings."""
+        self.heap = self.heap.tolist()
+        self.peak_bytes = max(self.peak_bytes, self._heap_bytes())
+
+    def allocn(self, n):
+        """Reserva n células (a zero) na heap e devolve o endereço da primeira."""
+        addr = self.global_size + self.heap_top
+        self._reserve(self.heap_top + n)
+        self.heap_top += n
+        return addr
+
+    def load(self, addr):
+        if addr < self.global_size:
+            return self.globals[addr]
+        index = addr - self.global_size
+        if index >= self.heap_top:
+            raise IndexError(addr)
+        return self.heap[index]
+
+    def store(self, addr, value):
+        if addr < self.global_size:
+            self.globals[addr] = value
+            return
+        index = addr - self.global_size
+        if index >= self.heap_top:
+            self._reserve(index + 1)  # escrita além do fim: a heap cresce
+            self.heap_top = index + 1
+        if self.typed:
+            if type(value) is int:
+                try:
+                    self.heap[index] = value
+                    return
+                except OverflowError:
+                    pass
+            self._promote()
+        self.heap[index] = value
+
+    def report(self):
+        """Resumo da ocupação de memória, incluindo o pico de memória residente do processo."""
+        globals_bytes = sys.getsizeof(self.globals)
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # KiB em Linux
+        return {
+            "global_cells": self.global_size,
+            "heap_cells": self.heap_top,
+            "heap_capacity": len(self.heap),
+            "heap_layout": "array('q')" if self.typed else "list",
+            "heap_bytes": self._heap_bytes(),
+            "peak_heap_bytes": self.peak_bytes,
+            "globals_bytes": globals_bytes,
+            "peak_rss_kib": peak_rss,
+        }
+
+
+class InputExhausted(EOFError):
+    """Lançada quando o programa executa 'read' e já não há input disponível."""
+
+
+class LoadError(ValueError):
+    """Lançada no carregamento de um programa inválido (label não definida, operando em falta ou inválido)."""
+
+
+class InputProvider:
+    """
+    Fonte de input da instrução 'read'. Cada 'read' consome uma linha.
+    Aceita uma string, um ficheiro (qualquer objeto com read()), um iterável de valores ou None.
+    Com None usa o stdin: linha a linha se for um terminal, em blocos de `chunk_size` caso contrário.
+    As linhas acrescentadas com feed() são lidas depois de a fonte se esgotar.
+    """
+    def __init__(self, source=None, chunk_size=65536):
+        self.chunk_size = chunk_size
+        self._lines = deque()
+        self._fed = deque()  # linhas acrescentadas com feed()
+        self._pending = ""   # texto lido que ainda não termina em '\n'
+        self._iterator = None
+        self._read_chunk = None
+
+        if isinstance(source, str):
+            self._lines.extend(source.splitlines())
+            self._read_chunk = lambda: ""
+        elif hasattr(source, "read"):
+            self._read_chunk = lambda: source.read(chunk_size)
+        elif source is not None:
+            self._iterator = iter(source)
+
+    def _stdin_reader(self):
+        """Escolhe como ler do sys.stdin atual (resolvido só no primeiro 'read')."""
+        stdin = sys.stdin
+        if stdin.isatty():
+            def read_line():
+                try:
+                    return input() + "\n"
+                except EOFError:
+                    return ""
+            return read_line
+        try:
+            fd = stdin.fileno()
+        except (AttributeError, OSError, ValueError):
+            return lambda: stdin.read(self.chunk_size)
+
+        decoder = codecs.getincrementaldecoder(stdin.encoding or "utf-8")()
+        def read_chunk():
+            # os.read devolve o que já estiver disponível, sem esperar por um bloco completo
+            data = os.read(fd, self.chunk_size)
+            return decoder.decode(data, final=not data)
+        return read_chunk
+
+    def feed(self, line):
+        """Acrescenta uma linha já obtida (por exemplo, de forma assíncrona), lida depois da fonte."""
+        self._fed.append(line)
+
+    def readline(self):
+        try:
+            return self._read_source()
+        except InputExhausted:
+            if self._fed:
+                return self._fed.popleft()
+            raise
+
+    def _read_source(self):
+        if self._iterator is not None:
+            try:
+                return str(next(self._iterator))
+            except StopIteration:
+                raise InputExhausted("Input esgotado: a instrução 'read' não tem mais valores para ler")
+
+        if self._read_chunk is None:
+            self._read_chunk = self._stdin_reader()
+
+        while not self._lines:
+            chunk = self._read_chunk()
+            if not chunk:
+                if self._pending:
+                    line, self._pending = self._pending, ""
+                    return line
+                raise InputExhausted("Input esgotado: a instrução 'read' não tem mais valores para ler")
+            lines = (self._pending + chunk).split("\n")
+            self._pending = lines.pop()
+            self._lines.extend(line.rstrip("\r") for line in lines)
+        return self._lines.popleft()
+
+
+class RunResult:
+    """
+    Resultado de VirtualMachine.run.
+    status: "finished" (stop ou fim do código), "error" (erro de execução), "budget" (limite de
+    instruções atingido) ou "timeout" (prazo de tempo ultrapassado).
+    """
+    def __init__(self, status, steps, elapsed, output=None, error=None):
+        self.status = status      # estado final da execução
+        self.steps = steps        # instruções executadas
+        self.elapsed = elapsed    # tempo de execução em segundos
+        self.output = output      # output produzido (se o destino for um buffer em memória)
+        self.error = error        # mensagem do erro de execução, se houver
+
+    def __repr__(self):
+        return f"RunResult(status='{self.status}', steps={self.steps}, elapsed={self.elapsed:.6f})"
+
+
+class CodeLoader:
+    """
+    Destino de texto para código VM (por exemplo, o sink de CodeGenerator.generate): recebe as
+    linhas à medida que são geradas e, em close(), carrega-as na VM, sem ficheiro intermédio.
+    """
+    def __init__(self, vm):
+        self.vm = vm
+        self.lines = []
+        self._pending = ""  # texto recebido que ainda não termina em '\n'
+
+    def write(self, text):
+        lines = (self._pending + text).split("\n")
+        self._pending = lines.pop()
+        self.lines.extend(line.strip() for line in lines)
+
+    def close(self):
+        if self._pending:
+            self.lines.append(self._pending.strip())
+            self._pending = ""
+        self.vm.load_code(self.lines)
+
 
 class VirtualMachine:
-    def __init__(self):
-        self.stack = []
-        self.gp = [0] * 1000  # memória global simulada
+    ENGINES = ("reference", "table", "profile", "jit")
+    JIT_THRESHOLD = 50  # entradas num bloco básico até o motor "jit" o compilar
+
+    def __init__(self, engine="table", fuse=True, output=None, output_buffer=8192, input=None):
+        if engine not in self.ENGINES:
+            raise ValueError(f"Motor de execução desconhecido: {engine}. Usar {' | '.join(self.ENGINES)}")
+        self.engine = engine
+        self.fuse = fuse
+        self.fusions = {}  # superinstrução -> número de fusões feitas no carregamento
+        self.fused_instructions = 0  # instruções originais cobertas pelas fusões
+        self.jit_cache = {}  # início do bloco -> (code object, source) ou None se não compilável
         self.labels = {}
-        self.ip = 0  # instruction pointer
         self.code = []
+        self.program = []  # instruções descodificadas: (opcode, operando)
+        self.output_buffer = output_buffer
+        self.reset(output, input)
+
+    def reset(self, output=None, input=None):
+        """Repõe o estado de execução (pilha, memória, output, input), para correr outro programa na mesma VM."""
+        self.stack = []
+        self.memory = Memory()
+        self.gp = self.memory.globals  # região global da memória
+        self.ip = 0  # instruction pointer
         self.running = True
+        self.error = None  # mensagem do último erro de execução
+        self.profile = None  # resultados do motor "profile" (dict serializável em JSON)
+        self.output = OutputBuffer(output, self.output_buffer)  # output das instruções write*
+        self.input = InputProvider(input)  # input da instrução read
+
+    def set_input(self, source):
+        """Define a fonte de input (string, ficheiro, iterável ou None para stdin)."""
+        self.input = InputProvider(source)
 
     def load_code(self, code_lines):
+        """Carrega o código textual e descodifica-o uma única vez para (opcode, operando)."""
         self.code = code_lines
         self._map_labels()
+        self.load_program(self._decode(), self.labels)
+
+    def load_program(self, program, labels):
+        """Carrega um programa já descodificado (por exemplo, lido de um ficheiro .vmb)."""
+        self.labels = dict(labels)
+        program = self._fuse(program) if self.fuse else program
+        # o operando de 'call' é o endereço de retorno (a instrução seguinte)
+        self.program = [(op, index + 1) if op == Op.CALL else (op, arg) for index, (op, arg) in enumerate(program)]
+        self.jit_cache = {}
+
+    def load_file(self, path):
+        """Carrega um ficheiro .vm (texto) ou .vmb (bytecode binário, lido via mmap)."""
+        if path.endswith(".vmb"):
+            from bytecode import read_bytecode
+            self.load_program(*read_bytecode(path))
+        else:
+            with open(path, "r") as f:
+                self.load_code([line.strip() for line in f.readlines()])
+
+    @staticmethod
+    def _is_ignored(line):
+        return line == "" or line.startswith("//")
 
     def _map_labels(self):
-        for i, line in enumerate(self.code):
+        """Associa cada label ao índice da instrução seguinte no programa descodificado."""
+        self.labels = {}
+        index = 0
+        for line in self.code:
+            line = line.strip()
             if line.endswith(":"):
-                label = line[:-1]
-                self.labels[label] = i
+                self.labels[line[:-1]] = index
+            elif not self._is_ignored(line):
+                index += 1
 
-    def run(self):
-        self.ip = 0
-        while self.running and self.ip < len(self.code):
-            line = self.code[self.ip]
-            if line.endswith(":"):
-                self.ip += 1
+    def _decode(self):
+        program = []
+        for line in self.code:
+            line = line.strip()
+            if line.endswith(":") or self._is_ignored(line):
                 continue
+            try:
+                program.append(self._decode_line(line))
+            except (IndexError, ValueError) as e:
+                if isinstance(e, LoadError):
+                    raise
+                raise LoadError(f"Operando em falta ou inválido: {line}") from None
+        return program
 
-            if line.strip().startswith("//") or line.strip() == "":
-                self.ip += 1
-                continue
+    def _decode_line(self, line):
+        """Descodifica uma instrução para (opcode, operando)."""
+        parts = shlex.split(line)
+        name = parts[0].lower()
+        op = OPCODES.get(name)
+        if len(parts) == 1 and op in DEFAULT_OPERAND:
+            parts.append(DEFAULT_OPERAND[op])
+
+        if op is None:
+            return Op.UNKNOWN, name
+        if op in INT_OPERAND:
+            return op, int(parts[1])
+        if op in JUMP_OPERAND:
+            if parts[1] not in self.labels:
+                raise LoadError(f"Label não definida: {parts[1]}")
+            return op, self.labels[parts[1]]
+        if op in COMPARE_JUMP:
+            if parts[3] not in self.labels:
+                raise LoadError(f"Label não definida: {parts[3]}")
+            return op, (int(parts[1]), int(parts[2]), self.labels[parts[3]])
+        if op in TUPLE_OPERAND:
+            if len(parts) != 1 + TUPLE_SIZE[op]:
+                raise LoadError(f"Operando em falta ou inválido: {line}")
+            return op, tuple(int(p) for p in parts[1:])
+        if op == Op.PUSHF:
+            return op, float(parts[1])
+        if op == Op.PUSHS:
+            return op, parts[1]
+        return op, None
+
+    def _match_superinstruction(self, program, i):
+        """
+        Devolve (instruções que substituem a sequência, nº de instruções originais) se houver uma
+        sequência fusível em i. A primeira instrução é a superinstrução.
+        """
+        ops = tuple(op for op, _ in program[i:i + 5])
+
+        if ops[:4] == (Op.PUSHG, Op.PUSHI, Op.ADD, Op.STOREG) and program[i][1] == program[i + 3][1]:
+            return [(Op.INCG, (program[i][1], program[i + 1][1]))], 4
+
+        # o mesmo incremento quando o valor ainda é usado (o peephole troca 'storeg X; pushg X'
+        # por 'dup 1; storeg X'): incg seguido de pushg X
+        if ops == (Op.PUSHG, Op.PUSHI, Op.ADD, Op.DUP, Op.STOREG) and program[i + 3][1] == 1 \
+                and program[i][1] == program[i + 4][1]:
+            return [(Op.INCG, (program[i][1], program[i + 1][1])), (Op.PUSHG, program[i][1])], 5
+
+        if ops in ((Op.PUSHG, Op.PUSHG, Op.SUP, Op.NOT, Op.JZ), (Op.PUSHG, Op.PUSHG, Op.INF, Op.NOT, Op.JZ)):
+            fused = Op.CMPJG if ops[2] == Op.SUP else Op.CMPJL
+            return [(fused, (program[i][1], program[i + 1][1], program[i + 4][1]))], 5
+
+        # a mesma sequência depois do otimizador peephole (not; jz -> jnz)
+        if ops[:4] in ((Op.PUSHG, Op.PUSHG, Op.SUP, Op.JNZ), (Op.PUSHG, Op.PUSHG, Op.INF, Op.JNZ)):
+            fused = Op.CMPJG if ops[2] == Op.SUP else Op.CMPJL
+            return [(fused, (program[i][1], program[i + 1][1], program[i + 3][1]))], 4
 
-            parts = shlex.split(line)
-            
-            instr = parts[0].lower()
-
-            match instr:
-                case "pushi":
-                    self.stack.append(int(parts[1]))
-                case "pushf":
-                    self.stack.append(float(parts[1]))
-                case "pushg":
-                    self.stack.append(self.gp[int(parts[1])])
-                case "pushs":
-                    self.stack.append(parts[1])
-                case "storeg":
-                    value = self.stack.pop()
-                    self.gp[int(parts[1])] = value
-
-                case "load":
-                    index = int(parts[1])
-                    if index != 0:
-                        print(f"LOAD só suporta índice 0. Recebido: {index}")
-                        self.running = False
-                        return
-                    addr = self.stack.pop()
-                    self.stack.append(self.gp[addr])
-
-                case "add":
-                    b, a = self.stack.pop(), self.stack.pop()
-                    self.stack.append(a + b)
-                case "sub":
-                    b, a = self.stack.pop(), self.stack.pop()
-                    self.stack.append(a - b)
-                case "mul":
-                    b, a = self.stack.pop(), self.stack.pop()
-                    self.stack.append(a * b)
-                case "div":
-                    b, a = self.stack.pop(), self.stack.pop()
-                    self.stack.append(a // b)
-                case "fdiv":
-                    b, a = self.stack.pop(), self.stack.pop()
-                    self.stack.append(a / b)
-                case "mod":
-                    b, a = self.stack.pop(), self.stack.pop()
-                    self.stack.append(a % b)
-                case "sup":
-                    b, a = self.stack.pop(), self.stack.pop()
-                    self.stack.append(int(a > b))
-                case "inf":
-                    b, a = self.stack.pop(), self.stack.pop()
-                    self.stack.append(int(a < b))
-                case "supeq":
-                    b, a = self.stack.pop(), self.stack.pop()
-                    self.stack.append(int(a >= b))
-                case "infeq":
-                    b, a = self.stack.pop(), self.stack.pop()
-                    self.stack.append(int(a <= b))
-                case "equal":
-                    b, a = self.stack.pop(), self.stack.pop()
-                    self.stack.append(int(a == b))
-                case "and":
-                    b, a = self.stack.pop(), self.stack.pop()
-                    self.stack.append(int(bool(a) and bool(b)))
-                case "or":
-                    b, a = self.stack.pop(), self.stack.pop()
-                    self.stack.append(int(bool(a) or bool(b)))
-                case "not":
-                    a = self.stack.pop()
-                    self.stack.append(int(not a))
-                case "read":
-                    value = input()
-                    self.stack.append(value)
-                case "atoi":
-                    s = self.stack.pop()
-                    self.stack.append(int(s))
-                case "atof":
-                    s = self.stack.pop()
-                    self.stack.append(float(s))
-                case "writei":
-                    print(self.stack.pop(), end=' ')
-                case "writes":
-                    print(self.stack.pop(), end=' ')
-                case "writeln":
-                    print()
-                case "jump":
-                    self.ip = self.labels[parts[1]]
+        if ops == (Op.PUSHST, Op.PUSHG, Op.PUSHI, Op.SUB, Op.LOADN):
+            return [(Op.LOADIDX, (program[i][1], program[i + 1][1], program[i + 2][1]))], 5
+
+        return None
+
+    def _fuse(self, program):
+        """
+        Substitui sequências frequentes geradas pelo CodeGenerator por superinstruções.
+        Uma sequência só é fundida se nenhum salto tiver como destino uma instrução interior.
+        Os destinos dos saltos e as labels são renumerados no fim.
+        """
+        targets = set(self.labels.values())
+        fused = []
+        new_index = [0] * (len(program) + 1)
+        self.fusions = {}
+        self.fused_instructions = 0
+
+        i = 0
+        while i < len(program):
+            new_index[i] = len(fused)
+            match = self._match_superinstruction(program, i)
+            if match and not any(t in targets for t in range(i + 1, i + match[1])):
+                instrs, length = match
+                fused.extend(instrs)
+                name = OPCODE_NAMES[instrs[0][0]]
+                self.fusions[name] = self.fusions.get(name, 0) + 1
+                # as instruções que ficam depois da superinstrução contam como não fundidas
+                self.fused_instructions += length - (len(instrs) - 1)
+                i += length
+            else:
+                fused.append(program[i])
+                i += 1
+        new_index[len(program)] = len(fused)
+
+        for k, (op, arg) in enumerate(fused):
+            if op in JUMP_OPERAND:
+                fused[k] = (op, new_index[arg])
+            elif op in COMPARE_JUMP:
+                fused[k] = (op, (arg[0], arg[1], new_index[arg[2]]))
+        self.labels = {label: new_index[index] for label, index in self.labels.items()}
+        return fused
+
+    def fusion_report(self):
+        """Resumo das fusões feitas no carregamento e da fração do programa que cobrem."""
+        total = len(self.program) - sum(self.fusions.values()) + self.fused_instructions
+        lines = [f"{name}: {count}" for name, count in sorted(self.fusions.items())]
+        coverage = 100 * self.fused_instructions / total if total else 0
+        lines.append(f"{sum(self.fusions.values())} fusões, {self.fused_instructions}/{total} instruções cobertas ({coverage:.1f}%)")
+        return "\n".join(lines)
+
+    def run(self, max_steps=None, timeout=None, check_every=4096):
+        """
+        Executa o programa carregado e devolve um RunResult.
+        max_steps limita o número de instruções executadas e timeout o tempo de execução (segundos).
+        Os limites só são verificados a cada `check_every` instruções (o limite de instruções é exato).
+        """
+        start = time.perf_counter()
+        deadline = start + timeout if timeout is not None else None
+        limits = (max_steps, deadline, check_every)
+        try:
+            if self.engine == "table":
+                steps, status = self._run_table(*limits)
+            elif self.engine == "profile":
+                steps, status = self._run_profile(*limits)
+            elif self.engine == "jit":
+                steps, status = self._run_jit(*limits)
+            else:
+                steps, status = self._run_reference(*limits)
+        finally:
+            self.output.flush()
+        if status == "finished" and self.error:
+            status = "error"
+        return RunResult(status, steps, time.perf_counter() - start, self.output.getvalue(), self.error)
+
+    async def run_async(self, input_stream=None, output_sink=None, yield_every=1024,
+                        max_steps=None, timeout=None):
+        """
+        Versão assíncrona de run(): executa com o motor por tabela em blocos de `yield_every`
+        instruções e devolve o controlo ao event loop entre blocos e em cada 'read', para que
+        várias execuções possam correr intercaladas no mesmo processo.
+        input_stream pode ser um objeto com readline() assíncrono (por exemplo asyncio.StreamReader)
+        ou um iterador assíncrono de valores, que substitui o input da VM; com None é usado o input
+        síncrono da VM.
+        output_sink, se indicado, substitui o destino do output (qualquer objeto com write()).
+        """
+        import asyncio
+
+        if output_sink is not None:
+            self.output = OutputBuffer(output_sink, self.output_buffer)
+        start = time.perf_counter()
+        deadline = start + timeout if timeout is not None else None
+        if input_stream is not None:
+            self.input = InputProvider(())  # cada 'read' lê só a linha obtida de input_stream
+
+        table = self._build_table()
+        read = table[Op.READ]
+        code = [(table[op], arg) for op, arg in self.program]
+        for index, (op, _) in enumerate(self.program):
+            if op == Op.READ:
+                code[index] = (lambda arg: READ_PAUSE, None)
+        size = len(code)
+        code.append((lambda arg: HALT, None))
+
+        ip = 0
+        steps = 0
+        status = "finished" if self.running else None
+        try:
+            while status == "finished":
+                status = self._limit_status(steps, max_steps, deadline) or "finished"
+                if status != "finished":
+                    break
+                budget = self._next_check(steps, max_steps, yield_every)
+                target = None
+                for step in range(budget):
+                    handler, arg = code[ip]
+                    ip += 1
+                    target = handler(arg)
+                    if target is not None:
+                        if target < 0:  # HALT ou READ_PAUSE
+                            break
+                        ip = target
+                else:
+                    steps += budget
+                    await asyncio.sleep(0)
                     continue
-                case "storen":
-                    val = self.stack.pop()
-                    index = self.stack.pop()
-                    addr = self.stack.pop()
-                    final_addr = addr + index
-                    if final_addr >= len(self.gp):
-                        self.gp.extend([0] * ((final_addr + 1) - len(self.gp)))  # Expande a memória se necessário
-                    self.gp[final_addr] = val
-                case "loadn":
-                    index = self.stack.pop()
-                    addr = self.stack.pop()
-                    final_addr = addr + index
-                    if final_addr >= len(self.gp):
-                        print(f"[ERRO] LOADN: endereço {final_addr} fora da memória")
-                        self.running = False
-                        return
-                    self.stack.append(self.gp[final_addr])
-                case "store":
-                    index = int(parts[1])
-                    val = self.stack.pop()
-                    addr = self.stack.pop()
-                    if addr + index >= len(self.gp):
-                        self.gp.extend([0] * ((addr + index + 1) - len(self.gp)))  # Expande memória se necessário
-                    self.gp[addr + index] = val
-                case "stri":
-                    val = self.stack.pop()
-                    self.stack.append(str(val))  # converte int para string
-                case "strf":
-                    val = self.stack.pop()
-                    self.stack.append(f"{val:.2f}")  # converte float para string com 2 casas decimais
-                case "allocn": # NOVO
-                    n = self.stack.pop()
-                    addr = len(self.gp)
-                    self.gp.extend([0] * n)
-                    self.stack.append(addr)
-                case "pushst":
-                    index = int(parts[1])
-                    addr = self.gp[index]  # Este é o endereço da heap guardado em gp[index]
-                    self.stack.append(addr)
-                case "jz":
-                    label = parts[1]
-                    val = self.stack.pop()
-                    if val == 0:
-                        self.ip = self.labels[label]
-                        continue
-                case "jnz":
-                    label = parts[1]
-                    val = self.stack.pop()
-                    if val != 0:
-                        self.ip = self.labels[label]
-                        continue
-                case "start":
+                steps += step + 1
+                if target == HALT:
+                    break
+                # 'read': o prompt é escrito antes de esperar pelo input
+                self.output.flush()
+                if input_stream is not None:
+                    self.input.feed(await self._read_async(input_stream))
+                read(None)
+                await asyncio.sleep(0)
+        finally:
+            self.output.flush()
+
+        if ip > size:
+            steps -= 1  # a sentinela não conta como instrução executada
+            ip = size
+        self.ip = ip
+        status = status or "finished"
+        if status == "finished" and self.error:
+            status = "error"
+        return RunResult(status, steps, time.perf_counter() - start, self.output.getvalue(), self.error)
+
+    @staticmethod
+    async def _read_async(input_stream):
+        """Lê a próxima linha de input de uma fonte assíncrona."""
+        if hasattr(input_stream, "readline"):
+            line = await input_stream.readline()
+            if isinstance(line, bytes):
+                line = line.decode("utf-8")
+            if not line:
+                raise InputExhausted("Input esgotado: a instrução 'read' não tem mais valores para ler")
+            return line.rstrip("\r\n")
+        try:
+            return str(await input_stream.__anext__())
+        except StopAsyncIteration:
+            raise InputExhausted("Input esgotado: a instrução 'read' não tem mais valores para ler")
+
+    @staticmethod
+    def _next_check(steps, max_steps, check_every):
+        """Número de instruções a executar até à próxima verificação dos limites."""
+        return check_every if max_steps is None else min(check_every, max_steps - steps)
+
+    @staticmethod
+    def _limit_status(steps, max_steps, deadline):
+        if max_steps is not None and steps >= max_steps:
+            return "budget"
+        if deadline is not None and time.perf_counter() >= deadline:
+            return "timeout"
+        return None
+
+    def _fail(self, message):
+        """Termina a execução com um erro de execução (a mensagem vai para o output)."""
+        self.output.write(message + "\n")
+        self.error = message
+        self.running = False
+
+    def _run_reference(self, max_steps, deadline, check_every):
+        """Motor de referência: um único match sobre o opcode de cada instrução."""
+        program = self.program
+        size = len(program)
+        stack = self.stack
+        push = stack.append
+        pop = stack.pop
+        gp = self.gp
+        memory = self.memory
+        write = self.output.write
+        frames = []  # (endereço de retorno, fp) de cada chamada em curso
+        fp = 0
+
+        ip = 0
+        steps = 0
+        next_check = self._next_check(steps, max_steps, check_every)
+        status = "finished"
+        while self.running and ip < size:
+            if steps >= next_check:
+                status = self._limit_status(steps, max_steps, deadline)
+                if status:
+                    break
+                status = "finished"
+                next_check = steps + self._next_check(steps, max_steps, check_every)
+            op, arg = program[ip]
+            ip += 1
+            steps += 1
+
+            match op:
+                case Op.PUSHI | Op.PUSHF | Op.PUSHS:
+                    push(arg)
+                case Op.PUSHG:
+                    push(gp[arg])
+                case Op.STOREG:
+                    gp[arg] = pop()
+
+                case Op.LOAD:
+                    if arg != 0:
+                        self._fail(f"LOAD só suporta índice 0. Recebido: {arg}")
+                        break
+                    push(memory.load(pop()))
+
+                case Op.ADD:
+                    b, a = pop(), pop()
+                    push(a + b)
+                case Op.SUB:
+                    b, a = pop(), pop()
+                    push(a - b)
+                case Op.MUL:
+                    b, a = pop(), pop()
+                    push(a * b)
+                case Op.DIV:
+                    b, a = pop(), pop()
+                    push(a // b)
+                case Op.FDIV:
+                    b, a = pop(), pop()
+                    push(a / b)
+                case Op.MOD:
+                    b, a = pop(), pop()
+                    push(a % b)
+                case Op.SUP:
+                    b, a = pop(), pop()
+                    push(int(a > b))
+                case Op.INF:
+                    b, a = pop(), pop()
+                    push(int(a < b))
+                case Op.SUPEQ:
+                    b, a = pop(), pop()
+                    push(int(a >= b))
+                case Op.INFEQ:
+                    b, a = pop(), pop()
+                    push(int(a <= b))
+                case Op.EQUAL:
+                    b, a = pop(), pop()
+                    push(int(a == b))
+                case Op.AND:
+                    b, a = pop(), pop()
+                    push(int(bool(a) and bool(b)))
+                case Op.OR:
+                    b, a = pop(), pop()
+                    push(int(bool(a) or bool(b)))
+                case Op.NOT:
+                    push(int(not pop()))
+                case Op.READ:
+                    self.output.flush()  # o prompt tem de aparecer antes de ler
+                    push(self.input.readline())
+                case Op.ATOI:
+                    push(int(pop()))
+                case Op.ATOF:
+                    push(float(pop()))
+                case Op.WRITEI | Op.WRITES:
+                    write(f"{pop()} ")
+                case Op.WRITELN:
+                    write("\n")
+                case Op.JUMP:
+                    ip = arg
+                case Op.STOREN:
+                    val = pop()
+                    index = pop()
+                    memory.store(pop() + index, val)  # a heap cresce se necessário
+                case Op.LOADN:
+                    index = pop()
+                    final_addr = pop() + index
+                    try:
+                        push(memory.load(final_addr))
+                    except IndexError:
+                        self._fail(f"[ERRO] LOADN: endereço {final_addr} fora da memória")
+                        break
+                case Op.STORE:
+                    val = pop()
+                    memory.store(pop() + arg, val)
+                case Op.STRI:
+                    push(str(pop()))  # converte int para string
+                case Op.STRF:
+                    push(f"{pop():.2f}")  # converte float para string com 2 casas decimais
+                case Op.ALLOCN:
+                    push(memory.allocn(pop()))
+                case Op.PUSHST:
+                    push(gp[arg])  # endereço da heap guardado em gp[arg]
+                case Op.DUP:
+                    if len(stack) < arg:
+                        self._fail(f"[ERRO] DUP {arg}: valores insuficientes na pilha")
+                        break
+                    stack.extend(stack[-arg:])
+                case Op.PUSHA:
+                    push(arg)
+                case Op.CALL:
+                    target = pop()
+                    frames.append((ip, fp))
+                    fp = len(stack)
+                    ip = target
+                case Op.RETURN:
+                    if not frames:
+                        self._fail("RETURN sem CALL correspondente")
+                        break
+                    del stack[fp:]
+                    ip, fp = frames.pop()
+                case Op.PUSHL:
+                    push(stack[fp + arg])
+                case Op.STOREL:
+                    val = pop()
+                    stack[fp + arg] = val
+                case Op.PUSHN:
+                    stack.extend([0] * arg)
+                case Op.POP:
+                    del stack[len(stack) - arg:]
+                case Op.JZ:
+                    if pop() == 0:
+                        ip = arg
+                case Op.JNZ:
+                    if pop() != 0:
+                        ip = arg
+                case Op.START:
                     pass
-                case "stop":
+                case Op.STOP:
                     self.running = False
+                    self.output.flush()
+                case Op.INCG:
+                    gp[arg[0]] += arg[1]
+                case Op.CMPJG:
+                    if gp[arg[0]] > gp[arg[1]]:
+                        ip = arg[2]
+                case Op.CMPJL:
+                    if gp[arg[0]] < gp[arg[1]]:
+                        ip = arg[2]
+                case Op.LOADIDX:
+                    final_addr = gp[arg[0]] + gp[arg[1]] - arg[2]
+                    try:
+                        push(memory.load(final_addr))
+                    except IndexError:
+                        self._fail(f"[ERRO] LOADN: endereço {final_addr} fora da memória")
+                        break
                 case _:
-                    print(f"Instrução desconhecida: {instr}")
-                    self.running = False
-            self.ip += 1
+                    self._fail(f"Instrução desconhecida: {arg}")
+        self.ip = ip
+        return steps, status
+
+    def _run_table(self, max_steps, deadline, check_every):
+        """
+        Motor por tabela: cada opcode indexa diretamente o seu handler.
+        As instruções são executadas em blocos de até `check_every`, entre os quais se verificam
+        os limites. Uma instrução sentinela no fim do código termina a execução, para que o ciclo
+        interior não tenha de testar o fim do programa.
+        """
+        table = self._build_table()
+        code = [(table[op], arg) for op, arg in self.program]
+        size = len(code)
+        code.append((lambda arg: HALT, None))
+
+        ip = 0
+        steps = 0
+        status = "finished" if self.running else None
+        while status == "finished":
+            budget = self._next_check(steps, max_steps, check_every)
+            status = self._limit_status(steps, max_steps, deadline) or "finished"
+            if status != "finished":
+                break
+            for step in range(budget):
+                handler, arg = code[ip]
+                ip += 1
+                target = handler(arg)
+                if target is not None:
+                    # os saltos devolvem o destino; HALT termina a execução
+                    if target == HALT:
+                        break
+                    ip = target
+            else:
+                steps += budget
+                continue
+            steps += step + 1
+            break
+
+        if ip > size:
+            steps -= 1  # a sentinela não conta como instrução executada
+            ip = size
+        self.ip = ip
+        return steps, status or "finished"
+
+    def _run_jit(self, max_steps, deadline, check_every):
+        """
+        Motor com compilação de blocos quentes: interpreta como o motor por tabela e conta as
+        entradas em cada bloco básico. Ao fim de JIT_THRESHOLD entradas o bloco é compilado para
+        uma closure Python (ver jit.py), que passa a ser usada nas entradas seguintes.
+        Blocos com 'read' (ou que não possam ser compilados) ficam sempre no interpretador.
+        """
+        import jit
+
+        table = self._build_table()
+        code = [(table[op], arg) for op, arg in self.program]
+        size = len(code)
+        block_end = jit.basic_blocks(self.program, self.labels)
+        counts = [0] * size
+        compiled = [None] * size
+
+        def halt():
+            self.running = False
+            self.output.flush()
+            return HALT
+
+        failed_at = None  # índice da instrução de um bloco compilado que terminou com erro
+
+        def fail(message, index=None):
+            nonlocal failed_at
+            failed_at = index
+            self._fail(message)
+            return halt()
+
+        environment = {
+            "gp": self.gp, "push": self.stack.append, "pop": self.stack.pop,
+            "load_cell": self.memory.load, "store_cell": self.memory.store,
+            "allocate": self.memory.allocn, "out": self.output.write, "fail": fail, "halt": halt,
+        }
+        for start, entry in self.jit_cache.items():
+            if entry is not None:
+                compiled[start] = (jit.instantiate(entry[0], environment), block_end[start] - start)
+
+        ip = 0
+        steps = 0
+        next_check = self._next_check(steps, max_steps, check_every)
+        status = "finished"
+        while self.running and ip < size:
+            if steps >= next_check:
+                status = self._limit_status(steps, max_steps, deadline)
+                if status:
+                    break
+                status = "finished"
+                next_check = steps + self._next_check(steps, max_steps, check_every)
+
+            block = compiled[ip]
+            if block is not None:
+                function, length = block
+                # perto de uma verificação dos limites, interpreta para manter o limite exato
+                if steps + length <= next_check:
+                    target = function()
+                    if target == HALT:
+                        # stop no fim do bloco, ou erro a meio: só contam as instruções executadas
+                        end = ip + length if failed_at is None else failed_at + 1
+                        steps += end - ip
+                        ip = end
+                        break
+                    steps += length
+                    ip = target
+                    continue
+            elif block_end[ip]:
+                counts[ip] += 1
+                if counts[ip] == self.JIT_THRESHOLD:
+                    if ip not in self.jit_cache:
+                        self.jit_cache[ip] = jit.compile_block(self.program, ip, block_end[ip])
+                    entry = self.jit_cache[ip]
+                    if entry is not None:
+                        compiled[ip] = (jit.instantiate(entry[0], environment), block_end[ip] - ip)
+                        continue
+
+            handler, arg = code[ip]
+            ip += 1
+            steps += 1
+            target = handler(arg)
+            if target is not None:
+                if target == HALT:
+                    break
+                ip = target
+        self.ip = ip
+        return steps, status
+
+    def _run_profile(self, max_steps, deadline, check_every):
+        """
+        Motor instrumentado: igual ao motor por tabela, mas conta e cronometra cada instrução
+        executada e regista a profundidade máxima da pilha. Os restantes motores não pagam nada
+        por isto. O resultado fica em self.profile.
+        """
+        table = self._build_table()
+        code = [(table[op], arg) for op, arg in self.program]
+        size = len(code)
+        stack = self.stack
+        hits = [0] * size
+        elapsed = [0.0] * size
+        peak_stack = len(stack)
+        clock = time.perf_counter
+
+        run_start = clock()
+        ip = 0 if self.running else size
+        steps = 0
+        next_check = self._next_check(steps, max_steps, check_every)
+        status = "finished"
+        try:
+            while ip < size:
+                if steps >= next_check:
+                    status = self._limit_status(steps, max_steps, deadline)
+                    if status:
+                        break
+                    status = "finished"
+                    next_check = steps + self._next_check(steps, max_steps, check_every)
+                steps += 1
+                handler, arg = code[ip]
+                current = ip
+                ip += 1
+                start = clock()
+                target = handler(arg)
+                elapsed[current] += clock() - start
+                hits[current] += 1
+                if len(stack) > peak_stack:
+                    peak_stack = len(stack)
+                if target is not None:
+                    if target == HALT:
+                        break
+                    ip = target
+        finally:
+            self.ip = ip
+            self.profile = self._collect_profile(hits, elapsed, peak_stack, clock() - run_start)
+        return steps, status
+
+    def _collect_profile(self, hits, elapsed, peak_stack, wall_time):
+        opcodes = {}
+        classes = {}
+        for (op, _), count, spent in zip(self.program, hits, elapsed):
+            if not count:
+                continue
+            for stats in (opcodes.setdefault(OPCODE_NAMES[op], {"count": 0, "time": 0.0}),
+                          classes.setdefault(OPCODE_CLASS[op], {"count": 0, "time": 0.0})):
+                stats["count"] += count
+                stats["time"] += spent
+
+        # entradas em cada bloco básico: execuções da instrução para onde a label aponta
+        labels = {label: hits[index] for label, index in self.labels.items() if index < len(hits)}
+        return {
+            "instructions": sum(hits),
+            "wall_time": wall_time,
+            "peak_stack": peak_stack,
+            "opcodes": dict(sorted(opcodes.items(), key=lambda item: -item[1]["count"])),
+            "classes": dict(sorted(classes.items(), key=lambda item: -item[1]["time"])),
+            "labels": dict(sorted(labels.items(), key=lambda item: -item[1])),
+        }
+
+    def profile_report(self):
+        """Relatório legível do último run com o motor "profile"."""
+        profile = self.profile
+        if profile is None:
+            return "Sem dados de profiling (usar engine=\"profile\")"
+        total = profile["instructions"] or 1
+        lines = [f"instruções executadas: {profile['instructions']}",
+                 f"tempo total: {profile['wall_time']:.6f}s",
+                 f"profundidade máxima da pilha: {profile['peak_stack']}",
+                 "",
+                 f"{'instrução':<16}{'execuções':>12}{'%':>8}{'tempo (s)':>12}"]
+        for name, stats in profile["opcodes"].items():
+            lines.append(f"{name:<16}{stats['count']:>12}{100 * stats['count'] / total:>7.1f}%{stats['time']:>12.6f}")
+        lines += ["", f"{'classe':<16}{'execuções':>12}{'%':>8}{'tempo (s)':>12}"]
+        for name, stats in profile["classes"].items():
+            lines.append(f"{name:<16}{stats['count']:>12}{100 * stats['count'] / total:>7.1f}%{stats['time']:>12.6f}")
+        lines += ["", f"{'label':<16}{'entradas':>12}"]
+        for label, count in profile["labels"].items():
+            lines.append(f"{label:<16}{count:>12}")
+        return "\n".join(lines)
+
+    def profile_json(self):
+        return json.dumps(self.profile, ensure_ascii=False, indent=2)
+
+    def _build_table(self):
+        """
+        Cria a tabela de handlers, indexada por opcode. Cada handler recebe o operando já
+        descodificado e devolve None, o índice de destino de um salto ou HALT.
+        A pilha e a memória global ficam ligadas como variáveis locais das closures.
+        """
+        vm = self
+        stack = self.stack
+        push = stack.append
+        pop = stack.pop
+        gp = self.gp
+        load_cell = self.memory.load
+        store_cell = self.memory.store
+        allocate = self.memory.allocn
+        output = self.output
+        out = output.write
+        readline = self.input.readline
+
+        def halt():
+            vm.running = False
+            output.flush()
+            return HALT
+
+        def fail(message):
+            vm._fail(message)
+            return halt()
+
+        def pushg(arg):
+            push(gp[arg])
+
+        def dup(arg):
+            if len(stack) < arg:
+                return fail(f"[ERRO] DUP {arg}: valores insuficientes na pilha")
+            if arg == 1:
+                push(stack[-1])
+            else:
+                stack.extend(stack[-arg:])
+
+        frames = []  # (endereço de retorno, fp) de cada chamada em curso
+        fp = 0
+
+        def call(arg):
+            nonlocal fp
+            target = pop()
+            frames.append((arg, fp))
+            fp = len(stack)
+            return target
+
+        def return_(arg):
+            nonlocal fp
+            if not frames:
+                return fail("RETURN sem CALL correspondente")
+            del stack[fp:]
+            target, fp = frames.pop()
+            return target
+
+        def pushl(arg):
+            push(stack[fp + arg])
+
+        def storel(arg):
+            stack[fp + arg] = pop()
+
+        def pushn(arg):
+            stack.extend([0] * arg)
+
+        def pop_(arg):
+            del stack[len(stack) - arg:]
+
+        def storeg(arg):
+            gp[arg] = pop()
+
+        def load(arg):
+            if arg != 0:
+                return fail(f"LOAD só suporta índice 0. Recebido: {arg}")
+            push(load_cell(pop()))
+
+        def add(arg):
+            b = pop()
+            push(pop() + b)
+
+        def sub(arg):
+            b = pop()
+            push(pop() - b)
+
+        def mul(arg):
+            b = pop()
+            push(pop() * b)
+
+        def div(arg):
+            b = pop()
+            push(pop() // b)
+
+        def fdiv(arg):
+            b = pop()
+            push(pop() / b)
+
+        def mod(arg):
+            b = pop()
+            push(pop() % b)
+
+        def sup(arg):
+            b = pop()
+            push(int(pop() > b))
+
+        def inf(arg):
+            b = pop()
+            push(int(pop() < b))
+
+        def supeq(arg):
+            b = pop()
+            push(int(pop() >= b))
+
+        def infeq(arg):
+            b = pop()
+            push(int(pop() <= b))
+
+        def equal(arg):
+            b = pop()
+            push(int(pop() == b))
+
+        def and_(arg):
+            b, a = pop(), pop()
+            push(int(bool(a) and bool(b)))
+
+        def or_(arg):
+            b, a = pop(), pop()
+            push(int(bool(a) or bool(b)))
+
+        def not_(arg):
+            push(int(not pop()))
+
+        def read(arg):
+            output.flush()  # o prompt tem de aparecer antes de ler
+            push(readline())
+
+        def atoi(arg):
+            push(int(pop()))
+
+        def atof(arg):
+            push(float(pop()))
+
+        def write(arg):
+            out(f"{pop()} ")
+
+        def writeln(arg):
+            out("\n")
+
+        def jump(arg):
+            return arg
+
+        def storen(arg):
+            val = pop()
+            index = pop()
+            store_cell(pop() + index, val)  # a heap cresce se necessário
+
+        def loadn(arg):
+            index = pop()
+            final_addr = pop() + index
+            try:
+                push(load_cell(final_addr))
+            except IndexError:
+                return fail(f"[ERRO] LOADN: endereço {final_addr} fora da memória")
+
+        def store(arg):
+            val = pop()
+            store_cell(pop() + arg, val)
+
+        def stri(arg):
+            push(str(pop()))
+
+        def strf(arg):
+            push(f"{pop():.2f}")
+
+        def allocn(arg):
+            push(allocate(pop()))
+
+        def jz(arg):
+            if pop() == 0:
+                return arg
+
+        def jnz(arg):
+            if pop() != 0:
+                return arg
+
+        def start(arg):
+            pass
+
+        def stop(arg):
+            return halt()
+
+        def unknown(arg):
+            return fail(f"Instrução desconhecida: {arg}")
+
+        def incg(arg):
+            gp[arg[0]] += arg[1]
+
+        def cmpjg(arg):
+            if gp[arg[0]] > gp[arg[1]]:
+                return arg[2]
+
+        def cmpjl(arg):
+            if gp[arg[0]] < gp[arg[1]]:
+                return arg[2]
+
+        def loadidx(arg):
+            final_addr = gp[arg[0]] + gp[arg[1]] - arg[2]
+            try:
+                push(load_cell(final_addr))
+            except IndexError:
+                return fail(f"[ERRO] LOADN: endereço {final_addr} fora da memória")
+
+        table = [None] * len(OPCODE_NAMES)
+        table[Op.PUSHI] = push
+        table[Op.PUSHF] = push
+        table[Op.PUSHS] = push
+        table[Op.PUSHG] = pushg
+        table[Op.PUSHST] = pushg  # o endereço da heap está guardado em gp[arg]
+        table[Op.STOREG] = storeg
+        table[Op.DUP] = dup
+        table[Op.PUSHA] = push
+        table[Op.CALL] = call
+        table[Op.RETURN] = return_
+        table[Op.PUSHL] = pushl
+        table[Op.STOREL] = storel
+        table[Op.PUSHN] = pushn
+        table[Op.POP] = pop_
+        table[Op.LOAD] = load
+        table[Op.ADD] = add
+        table[Op.SUB] = sub
+        table[Op.MUL] = mul
+        table[Op.DIV] = div
+        table[Op.FDIV] = fdiv
+        table[Op.MOD] = mod
+        table[Op.SUP] = sup
+        table[Op.INF] = inf
+        table[Op.SUPEQ] = supeq
+        table[Op.INFEQ] = infeq
+        table[Op.EQUAL] = equal
+        table[Op.AND] = and_
+        table[Op.OR] = or_
+        table[Op.NOT] = not_
+        table[Op.READ] = read
+        table[Op.ATOI] = atoi
+        table[Op.ATOF] = atof
+        table[Op.WRITEI] = write
+        table[Op.WRITES] = write
+        table[Op.WRITELN] = writeln
+        table[Op.JUMP] = jump
+        table[Op.STOREN] = storen
+        table[Op.LOADN] = loadn
+        table[Op.STORE] = store
+        table[Op.STRI] = stri
+        table[Op.STRF] = strf
+        table[Op.ALLOCN] = allocn
+        table[Op.JZ] = jz
+        table[Op.JNZ] = jnz
+        table[Op.START] = start
+        table[Op.STOP] = stop
+        table[Op.UNKNOWN] = unknown
+        table[Op.INCG] = incg
+        table[Op.CMPJG] = cmpjg
+        table[Op.CMPJL] = cmpjl
+        table[Op.LOADIDX] = loadidx
+        return table
+
+_batch_vm = None  # VM reutilizada por cada processo do modo batch
+# limites por omissão de cada programa do modo batch: um programa que não termina é interrompido
+# (estado "budget" ou "timeout") sem parar o batch
+BATCH_MAX_STEPS = 10_000_000
+BATCH_TIMEOUT = 10.0
+
+
+def _batch_init(engine, fuse):
+    global _batch_vm
+    _batch_vm = VirtualMachine(engine, fuse=fuse)
+
+
+def _batch_run(path, input_text, max_steps, timeout):
+    """Corre um programa na VM do processo atual e devolve (path, RunResult) com o output capturado."""
+    output = io.StringIO()
+    _batch_vm.reset(output, input_text)
+    start = time.perf_counter()
+    try:
+        _batch_vm.load_file(path)
+        result = _batch_vm.run(max_steps=max_steps, timeout=timeout)
+        result.elapsed = time.perf_counter() - start
+    except Exception as e:
+        # InputExhausted, ficheiro inválido, erro inesperado da VM: o batch continua
+        _batch_vm.output.flush()
+        status = "input" if isinstance(e, InputExhausted) else "error"
+        result = RunResult(status, None, time.perf_counter() - start, output.getvalue(), str(e))
+    return path, result
+
+
+def run_many(paths, workers=None, engine="table", fuse=True, input="", max_steps=BATCH_MAX_STEPS,
+             timeout=BATCH_TIMEOUT):
+    """
+    Executa vários programas (.vm ou .vmb) distribuídos por um ProcessPoolExecutor, com uma
+    VirtualMachine por processo. Todos recebem o mesmo input (string). Devolve a lista de
+    (path, RunResult) pela ordem de `paths`; o tempo de cada RunResult inclui o carregamento.
+    max_steps e timeout limitam cada programa (None: sem limite).
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    paths = list(paths)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_batch_init, initargs=(engine, fuse)) as pool:
+        n = len(paths)
+        return list(pool.map(_batch_run, paths, [input] * n, [max_steps] * n, [timeout] * n))
+
+
+def batch_report(results, wall_time):
+    """Tabela com estado, instruções e tempo de cada programa, e totais do batch."""
+    lines = [f"{'programa':<32}{'estado':>10}{'instruções':>14}{'tempo (s)':>12}"]
+    for path, result in results:
+        steps = "-" if result.steps is None else result.steps
+        lines.append(f"{os.path.basename(path):<32}{result.status:>10}{steps:>14}{result.elapsed:>12.4f}")
+    total_steps = sum(result.steps or 0 for _, result in results)
+    cpu_time = sum(result.elapsed for _, result in results)
+    finished = sum(result.status == "finished" for _, result in results)
+    stopped = sum(result.status in ("budget", "timeout") for _, result in results)
+    lines.append("")
+    lines.append(f"{finished}/{len(results)} programas terminaram normalmente, "
+                 f"{stopped} interrompidos por limite de instruções ou de tempo; "
+                 f"{total_steps} instruções em {wall_time:.3f}s de tempo real "
+                 f"({cpu_time:.3f}s somados nos programas)")
+    return "\n".join(lines)
+
 
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Comando correto: python3 vm.py <ficheiro.vm>")
+    parser = argparse.ArgumentParser(description="Máquina virtual EWVM")
+    parser.add_argument("vm_file", nargs="?", help="ficheiro .vm ou .vmb a executar")
+    parser.add_argument("--batch", metavar="DIR", help="executa todos os .vm/.vmb de DIR num conjunto de processos")
+    parser.add_argument("--workers", type=int, metavar="N", help="processos do modo batch (por omissão, nº de CPUs)")
+    parser.add_argument("--engine", choices=VirtualMachine.ENGINES, default="table", help="motor de execução")
+    parser.add_argument("--no-fuse", action="store_true", help="desativa a fusão de superinstruções")
+    parser.add_argument("--fusion-report", action="store_true", help="mostra as fusões feitas no carregamento")
+    parser.add_argument("--output-buffer", type=int, default=8192, metavar="N",
+                        help="caracteres acumulados antes de escrever o output (1 = sem buffer)")
+    parser.add_argument("--memory-report", action="store_true", help="mostra a ocupação de memória no fim")
+    parser.add_argument("--input", metavar="FICHEIRO", help="lê o input das instruções read deste ficheiro")
+    parser.add_argument("--profile", choices=("table", "json"), nargs="?", const="table",
+                        help="executa com o motor instrumentado e mostra o relatório (tabela ou JSON)")
+    parser.add_argument("--max-steps", type=int, metavar="N",
+                        help=f"limite de instruções executadas (no modo batch, {BATCH_MAX_STEPS} por omissão; "
+                             f"0 = sem limite)")
+    parser.add_argument("--timeout", type=float, metavar="S",
+                        help=f"limite de tempo de execução em segundos (no modo batch, {BATCH_TIMEOUT:g} por omissão; "
+                             f"0 = sem limite)")
+    args = parser.parse_args()
+    if (args.vm_file is None) == (args.batch is None):
+        parser.error("indicar um ficheiro .vm/.vmb ou --batch DIR")
+
+    if args.batch:
+        input_text = ""
+        if args.input:
+            with open(args.input, "r") as f:
+                input_text = f.read()
+        paths = sorted(os.path.join(args.batch, name) for name in os.listdir(args.batch)
+                       if name.endswith((".vm", ".vmb")))
+        max_steps = BATCH_MAX_STEPS if args.max_steps is None else args.max_steps or None
+        timeout = BATCH_TIMEOUT if args.timeout is None else args.timeout or None
+        start = time.perf_counter()
+        results = run_many(paths, args.workers, args.engine, not args.no_fuse, input_text, max_steps, timeout)
+        print(batch_report(results, time.perf_counter() - start))
+        sys.exit(0 if all(result.status == "finished" for _, result in results) else 1)
+
+    engine = "profile" if args.profile else args.engine
+    vm = VirtualMachine(engine, fuse=not args.no_fuse, output_buffer=args.output_buffer)
+    try:
+        vm.load_file(args.vm_file)
+    except LoadError as e:
+        print(f"Erro ao carregar {args.vm_file}: {e}", file=sys.stderr)
+        sys.exit(1)
+    if args.fusion_report:
+        print(vm.fusion_report(), file=sys.stderr)
+
+    input_file = open(args.input, "r") if args.input else None
+    try:
+        if input_file:
+            vm.set_input(input_file)
+        result = vm.run(max_steps=args.max_steps or None, timeout=args.timeout or None)
+        if result.status in ("budget", "timeout"):
+            print(f"\nExecução interrompida ({result.status}) após {result.steps} instruções", file=sys.stderr)
+            sys.exit(2)
+    except InputExhausted as e:
+        print(f"\n{e}", file=sys.stderr)
         sys.exit(1)
-    
-    vm_file = sys.argv[1]
-    with open(vm_file, "r") as f:
-        code = [line.strip() for line in f.readlines()]
-
-    vm = VirtualMachine()
-    vm.load_code(code)
-    vm.run()
+    finally:
+        if input_file:
+            input_file.close()
+        if args.memory_report:
+            for key, value in vm.memory.report().items():
+                print(f"{key}: {value}", file=sys.stderr)
+        if args.profile:
+            print(vm.profile_json() if args.profile == "json" else vm.profile_report(), file=sys.stderr)
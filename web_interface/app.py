@@ -1,17 +1,59 @@
 import re
-import subprocess
 import os
+import sys
+import threading
 from flask import Flask, render_template, request, jsonify
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.servico import CompileService
+
 app = Flask(__name__)
 
 # Caminho para os ficheiros .pas
 PAS_FILES_PATH = '../examples/pas'
 
+# Processos que compilam e executam os programas (criados no primeiro pedido, ver src/servico.py)
+WORKERS = int(os.environ.get("PL_WORKERS", "2"))
+service = None
+service_lock = threading.Lock()
+
+def get_service():
+    global service
+    with service_lock:
+        if service is None:
+            service = CompileService(workers=WORKERS, time_limit=3.0, memory_mb=256)
+    return service
+
 def strip_ansi(text):
     """Remove códigos ANSI (cores) da saída, para não quebrar o JSON no frontend."""
     return re.sub(r'\x1b\[[0-9;]*m', '', text)
 
+def format_output(result):
+    """Texto mostrado no frontend a partir do resultado estruturado de um pedido."""
+    if result["status"] in ("busy", "crash"):
+        return f"⚠️ {result['error']}"
+    lines = []
+    failed = next((phase for phase in result["phases"] if not phase["ok"]), None)
+    titles = {"sintatica": "Erros de parsing:", "semantica": "Erros semânticos encontrados:",
+              "codegen": "Erros na geração de código:", "otimizacao": "Erros na otimização:"}
+    if "tokens" in result and result["tokens"] is not None:
+        lines.extend(f"LexToken({tok['type']},{tok['value']!r},{tok['line']})" for tok in result["tokens"])
+    if "ast" in result:
+        lines.extend(["AST:", result["ast"], "Análise sintática concluída com sucesso!"])
+    if result["action"] == "semantic" and failed is None:
+        lines.append("Análise semântica concluída com sucesso!")
+    if result["action"] == "compile_only" and failed is None:
+        lines.append(f"✅ Compilação concluída: {len(result['code'])} linhas de código VM em examples/vm.")
+    if result.get("run"):
+        lines.append(result["run"]["output"])
+    if failed is not None:
+        if failed["phase"] == "execucao":
+            lines.extend(failed["errors"])
+        else:
+            lines.append(titles.get(failed["phase"], "Erros:"))
+            lines.extend(f" - {error}" for error in failed["errors"])
+    return strip_ansi("\n".join(lines))
+
 @app.route('/')
 def index():
     pas_files = os.listdir(PAS_FILES_PATH)
@@ -22,44 +64,32 @@ def index():
 def execute():
     filename = request.json.get('filename')
     action = request.json.get('action')
-    full_path = os.path.join(PAS_FILES_PATH, filename)
-
-    if action == "run":
-        cmd = ["python3", "../main.py", full_path]
-    elif action == "compile_only":
-        cmd = ["python3", "../main.py", full_path]
-    elif action in ["tokens", "ast", "semantic"]:
-        cmd = ["python3", "../test.py", full_path, action]
-    else:
+    user_input = request.json.get('input', '')  # input para as instruções 'read' (uma linha por valor)
+    optimize_code = bool(request.json.get('optimize', False))  # como main.py -O
+    full_path = os.path.join(PAS_FILES_PATH, os.path.basename(filename or ''))
+
+    if action not in ("run", "compile_only", "tokens", "ast", "semantic"):
         return jsonify({"output": "Ação inválida."})
 
     try:
-        timeout_value = 0.5 if action == "compile_only" else 3
-        result = subprocess.run(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            cwd=os.getcwd(),
-            timeout=timeout_value
-        )
-        output = result.stdout + ("\n" + result.stderr if result.stderr else "")
-        output = strip_ansi(output)
-    except subprocess.TimeoutExpired:
-        if action == "compile_only":
-            output = "✅ Compilação concluída. Ficheiro .vm provavelmente gerado com sucesso!"
-        else:
-            output = (
-                "⚠️ Erro: a execução foi interrompida.\n"
-                "Provavelmente o programa requere input (instrução 'read'),\n"
-                "mas não é possível interagir com input via interface web.\n"
-                "Executa este programa no terminal local se precisa de entrada de dados."
-            )
-    except Exception as e:
-        output = f"⚠️ Erro inesperado ao executar: {e}"
+        with open(full_path, 'r') as f:
+            source_code = f.read()
+    except OSError as e:
+        return jsonify({"output": f"⚠️ Erro ao ler {filename}: {e}"})
+
+    # Compilação (e execução) num dos processos do serviço; o resultado traz o estado e o
+    # tempo de cada fase, além do texto mostrado no frontend
+    result = get_service().run(source_code, action, user_input, optimize_code)
+    if result.get("code") is not None:
+        # código VM disponível para o botão "ver VM" (/get_vm)
+        os.makedirs('examples/vm', exist_ok=True)
+        base_name = os.path.splitext(os.path.basename(filename))[0]
+        with open(os.path.join('examples/vm', base_name + '.vm'), 'w') as f:
+            for line in result["code"]:
+                f.write(line + "\n")
 
-    # ✅ GARANTE QUE DEVOLVE SEMPRE RESPOSTA
-    return jsonify({"output": output})
+    result["output"] = format_output(result)
+    return jsonify(result)
 
 
 @app.route('/get_vm', methods=['POST'])